@@ -1,13 +1,31 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.responses import JSONResponse
+from starlette.responses import JSONResponse, Response
+
+from app import metrics
+from app.compression import COMPRESSION_STATS, CompressionMiddleware
+from app.config import (
+    COMPRESSION,
+    DB_MIGRATE_ON_STARTUP,
+    HEALTH_CHECK_INTERVAL,
+    METRICS_DUMP_INTERVAL,
+    METRICS_MULTIPROC_DIR,
+    READINESS_MAX_POOL_USAGE,
+)
+from app.health import HealthMonitor
 
 from .routers import products, customers
 from .telemetry import configure_telemetry
+from .database import engine, pool_metrics
+from .models import Base
 
 # app
 app = FastAPI(title="Mini Store API", version="0.1.0")
 
+# gzip / brotli for larger bodies (see app/compression.py)
+if COMPRESSION:
+    app.add_middleware(CompressionMiddleware)
+
 # dev-friendly CORS (tighten later)
 app.add_middleware(
     CORSMiddleware,
@@ -16,11 +34,57 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# health
+# health: liveness is static, readiness reads a background DB check
+HEALTH = HealthMonitor(engine, interval=HEALTH_CHECK_INTERVAL, max_pool_usage=READINESS_MAX_POOL_USAGE)
+
 @app.get("/health")
+@app.get("/health/live")
 def health():
     return {"status": "ok"}
 
+@app.get("/health/ready")
+async def ready():
+    is_ready, body = HEALTH.readiness()
+    return JSONResponse(status_code=200 if is_ready else 503, content=body)
+
+@app.on_event("startup")
+def prepare_worker():
+    # after fork: drop connections inherited from a preloading master
+    engine.dispose(close=False)
+    # dev convenience; with DB_MIGRATE_ON_STARTUP=0 create the schema out of band
+    if DB_MIGRATE_ON_STARTUP:
+        Base.metadata.create_all(bind=engine)
+
+@app.on_event("startup")
+def start_health_checks():
+    HEALTH.start()
+
+@app.on_event("shutdown")
+def stop_health_checks():
+    HEALTH.stop()
+
+# pool usage of the worker that served the request
+@app.get("/health/pool")
+def pool_health():
+    return pool_metrics()
+
+# prometheus text format, all workers when METRICS_MULTIPROC_DIR is set
+metrics.register_collector("db_pool", metrics.pool_collector(pool_metrics))
+metrics.register_collector("compression", metrics.compression_collector(COMPRESSION_STATS.stats))
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    return Response(metrics.exposition(), headers={"Content-Type": metrics.CONTENT_TYPE})
+
+@app.on_event("startup")
+def start_metrics_dump():
+    if METRICS_MULTIPROC_DIR:
+        metrics.start_worker_dump(METRICS_MULTIPROC_DIR, METRICS_DUMP_INTERVAL)
+
+@app.on_event("shutdown")
+def stop_metrics_dump():
+    metrics.stop_worker_dump()
+
 # routes
 app.include_router(products.router, prefix="/products", tags=["products"])
 app.include_router(customers.router, prefix="/customers", tags=["customers"])
@@ -30,10 +94,5 @@ app.include_router(customers.router, prefix="/customers", tags=["customers"])
 async def not_found(_, __):
     return JSONResponse(status_code=404, content={"detail": "Not Found"})
 
-# telemetry hook (no-op locally)
-configure_telemetry(app)
-
-# dev only: creates tables if missing 
-from .database import engine
-from .models import Base
-Base.metadata.create_all(bind=engine)
+# request timing + query counts (TELEMETRY=0 to disable)
+configure_telemetry(app, engines=[engine])
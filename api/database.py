@@ -4,18 +4,23 @@ from contextlib import contextmanager
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
+from app.db_pool import engine_options, install_sqlite_pragmas, is_sqlite, worker_pool_status
+
 # use SQLite locally. swap DATABASE_URL in Azure
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./store.db")
 
-connect_args = {}
-if DATABASE_URL.startswith("sqlite"):
-    connect_args = {"check_same_thread": False}
-
-engine = create_engine(DATABASE_URL, pool_pre_ping=True, connect_args=connect_args)
+# pool sizing / pre-ping / sqlite pragmas share the app's DB_POOL_* settings
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+if is_sqlite(DATABASE_URL):
+    install_sqlite_pragmas(engine)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
 Base = declarative_base()
 
+def pool_metrics() -> dict:
+    """checked-out/overflow/wait counters of this worker's pool"""
+    return worker_pool_status({"sync": engine})
+
 @contextmanager
 def get_session():
     """small helper to get a DB session with commit/rollback"""
@@ -28,3 +33,8 @@ def get_session():
         raise
     finally:
         db.close()
+
+def get_db():
+    """FastAPI dependency wrapping get_session (commit on success)"""
+    with get_session() as db:
+        yield db
@@ -1,19 +1,49 @@
-from typing import List
+from typing import Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from pydantic import ValidationError
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from app.bulk import bulk_import
+from app.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    after_cursor,
+    csv_response,
+    keyset_page,
+    ndjson_response,
+    set_next_cursor,
+)
 from .. import models, schemas
-from ..database import get_session
+from ..database import SessionLocal, get_db
 
 router = APIRouter()
 
 @router.get("/", response_model=List[schemas.CustomerRead])
-def list_customers(db: Session = Depends(get_session)):
-    return db.query(models.Customer).order_by(models.Customer.id.desc()).all()
+def list_customers(
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    output: str = Query("json", alias="format", regex="^(json|ndjson|csv)$"),
+    db: Session = Depends(get_db),
+):
+    """newest first; next page cursor in X-Next-Cursor / Link, or format=ndjson / csv to export all"""
+    if output != "json":
+        stmt = select(models.Customer.id, models.Customer.email, models.Customer.name)
+        stmt = after_cursor(stmt, models.Customer.id, cursor, descending=True)
+        respond = ndjson_response if output == "ndjson" else csv_response
+        return respond(SessionLocal, stmt)
+
+    customers, next_cursor = keyset_page(
+        db.query(models.Customer), models.Customer.id, cursor, limit, descending=True
+    )
+    set_next_cursor(request, response, next_cursor)
+    return customers
 
 @router.post("/", response_model=schemas.CustomerRead, status_code=201)
-def create_customer(data: schemas.CustomerCreate, db: Session = Depends(get_session)):
+def create_customer(data: schemas.CustomerCreate, db: Session = Depends(get_db)):
     exists = db.query(models.Customer).filter(models.Customer.email == data.email).first()
     if exists:
         raise HTTPException(status_code=400, detail="Email already exists")
@@ -21,3 +51,17 @@ def create_customer(data: schemas.CustomerCreate, db: Session = Depends(get_sess
     db.add(customer)
     db.flush()
     return customer
+
+def _clean_customer(record: Dict) -> Dict:
+    """one import record -> customers row, validated like POST /customers/"""
+    try:
+        data = schemas.CustomerCreate(email=record.get("email"), name=record.get("name") or None)
+    except ValidationError as e:
+        error = e.errors()[0]
+        raise ValueError(f"{'.'.join(map(str, error['loc']))}: {error['msg']}")
+    return data.dict()
+
+@router.post("/import")
+async def import_customers(request: Request, db: Session = Depends(get_db)):
+    """bulk create from a CSV (header with email[,name]) or NDJSON body; existing emails are reported per line"""
+    return await bulk_import(request, db, models.Customer.__table__, "email", _clean_customer)
@@ -1,22 +1,75 @@
 # app/routers/products.py
-from fastapi import APIRouter, HTTPException
+from typing import Optional
 
-from app.services.external_products import get_categories, get_products_by_category
+from fastapi import APIRouter, HTTPException, Query, Request
+
+from app.services.external_products import (
+    PRODUCT_FIELDS,
+    current_catalogue,
+    filter_products,
+    search_products,
+)
+from app.metrics import register_cache
+from app.pagination import parse_fields, project
+from app.services.response_cache import ResponseCache
 
 router = APIRouter()
 
+# rendered once per catalogue version, then served as raw bytes
+RESPONSES = ResponseCache()
+register_cache("product_responses", RESPONSES)
+
 
 @router.get("/categories")
-def list_categories():
+def list_categories(request: Request):
     try:
-        return get_categories()
+        catalogue = current_catalogue()
+        return RESPONSES.response(
+            request,
+            "categories",
+            catalogue.version,
+            lambda: list(catalogue.category_listing),
+        )
     except Exception:
         raise HTTPException(status_code=502, detail="Failed to fetch categories")
 
 
 @router.get("/category/{category}")
-def list_products(category: str):
+def list_products(
+    category: str,
+    request: Request,
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    sort: Optional[str] = Query(None, regex="^-?(price|id)$"),
+    currency: Optional[str] = Query(None, min_length=3, max_length=3),
+    fields: Optional[str] = None,
+):
+    # ?fields=title,price,image: only those fields of each product
+    selected = parse_fields(fields, PRODUCT_FIELDS)
+    # price range / sort / currency: computed on the price columns, not cached
+    if (min_price, max_price, sort, currency) != (None, None, None, None):
+        return filter_products(category, min_price, max_price, sort, currency, selected)
     try:
-        return get_products_by_category(category)
+        catalogue = current_catalogue()
+        # unknown ids share one cache entry so the cache stays bounded
+        key = catalogue.normalize_category(category) or ""
+        return RESPONSES.response(
+            request,
+            ("category", key, selected),
+            catalogue.version,
+            lambda: project(catalogue.by_category(key), selected),
+        )
     except Exception:
         raise HTTPException(status_code=502, detail="Failed to fetch products")
+
+
+@router.get("/search")
+def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    prefix: bool = True,
+    fields: Optional[str] = None,
+):
+    # ranked title/description search; the last word also matches as a prefix
+    return search_products(q, limit, offset, prefix, parse_fields(fields, PRODUCT_FIELDS))
@@ -1,6 +1,13 @@
-def configure_telemetry(app) -> None:
+from app.config import TELEMETRY, TELEMETRY_EXPORTER, TELEMETRY_FILE
+from app.telemetry import configure_telemetry as _configure, make_exporter
+
+
+def configure_telemetry(app, engines=()) -> None:
     """
-    Placeholder for Application Insights / OpenTelemetry.
-    Keeping it as a no-op so local dev is frictionless.
+    Request timing, per-route histograms and SQLAlchemy query hooks
+    (see app/telemetry.py). TELEMETRY=0 turns it off; TELEMETRY_EXPORTER
+    picks none/memory/file/otlp for per-request records.
     """
-    return
+    if not TELEMETRY:
+        return
+    _configure(app, engines=engines, exporter=make_exporter(TELEMETRY_EXPORTER, TELEMETRY_FILE))
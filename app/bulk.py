@@ -0,0 +1,232 @@
+# app/bulk.py
+"""
+Streaming bulk import for tables with a unique key (users / customers by
+email).
+
+The request body (CSV with a header row, or NDJSON; one record per line)
+is read as it arrives and written in batches of BULK_BATCH_SIZE rows:
+
+- each record is cleaned by the caller's `clean(record) -> row`, which
+  raises ValueError with a message for bad input;
+- duplicates within a batch are reported against their first line;
+- every batch is one INSERT ... ON CONFLICT (key) DO NOTHING RETURNING key
+  (executemany; on PostgreSQL + psycopg2 a COPY into a temp table first),
+  so rows already in the table are skipped by the unique index itself,
+  also when another request inserts them concurrently;
+- each batch commits, so memory stays flat and a failure mid-way keeps
+  the batches already written.
+
+The response reports counts, rows/sec and per-row errors by line number
+(the first BULK_MAX_ERRORS of them).
+"""
+import csv
+import io
+import json
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Set, Tuple
+
+from fastapi import HTTPException, Request
+from sqlalchemy import Table, select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.config import BULK_BATCH_SIZE, BULK_MAX_ERRORS
+from app.db_pool import dialect_insert
+
+CSV_TYPES = {"text/csv", "application/csv"}
+NDJSON_TYPES = {"application/x-ndjson", "application/jsonl", "application/ndjson"}
+
+
+# -------------------------
+# Request body -> records
+# -------------------------
+
+
+def body_format(request: Request) -> str:
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type in CSV_TYPES:
+        return "csv"
+    if content_type in NDJSON_TYPES:
+        return "ndjson"
+    raise HTTPException(
+        status_code=415,
+        detail="Send text/csv (with a header row) or application/x-ndjson",
+    )
+
+
+async def _lines(request: Request) -> AsyncIterator[Tuple[int, str]]:
+    """(line number, text) for every non-blank line of the body, as it streams in."""
+    buffer = b""
+    number = 0
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            number += 1
+            text = line.decode("utf-8", errors="replace").strip("\r\ufeff")
+            if text.strip():
+                yield number, text
+    if buffer.strip():
+        yield number + 1, buffer.decode("utf-8", errors="replace").strip("\r\ufeff")
+
+
+async def read_records(request: Request, required: Iterable[str]) -> AsyncIterator[Tuple[int, Any]]:
+    """
+    (line number, record) pairs; `record` is a dict, or a ValueError for a
+    line that could not be parsed.
+    """
+    fmt = body_format(request)
+    header = None
+    async for number, text in _lines(request):
+        if fmt == "ndjson":
+            try:
+                record = json.loads(text)
+            except ValueError:
+                yield number, ValueError("invalid JSON")
+                continue
+            yield number, record if isinstance(record, dict) else ValueError("expected a JSON object")
+        elif header is None:
+            header = [name.strip() for name in next(csv.reader([text]))]
+            missing = set(required) - set(header)
+            if missing:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"CSV header is missing column(s): {', '.join(sorted(missing))}",
+                )
+        else:
+            values = next(csv.reader([text]))
+            if len(values) != len(header):
+                yield number, ValueError(f"expected {len(header)} fields, got {len(values)}")
+                continue
+            yield number, dict(zip(header, values))
+
+
+# -------------------------
+# Batches -> table
+# -------------------------
+
+
+def _copy_insert(db: Session, table: Table, key: str, rows: List[Dict]) -> Set:
+    """PostgreSQL + psycopg2: COPY into a temp table, then one INSERT ... SELECT."""
+    quote = db.get_bind().dialect.identifier_preparer.quote
+    columns = list(rows[0])
+    cols = ", ".join(quote(c) for c in columns)
+    target, staging = quote(table.name), quote(f"bulk_{table.name}")
+
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows([row[c] for c in columns] for row in rows)
+    buffer.seek(0)
+
+    cursor = db.connection().connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(
+            f"CREATE TEMP TABLE IF NOT EXISTS {staging} ON COMMIT DELETE ROWS "
+            f"AS SELECT {cols} FROM {target} WITH NO DATA"
+        )
+        cursor.copy_expert(f"COPY {staging} ({cols}) FROM STDIN WITH (FORMAT csv)", buffer)
+        cursor.execute(
+            f"INSERT INTO {target} ({cols}) SELECT {cols} FROM {staging} "
+            f"ON CONFLICT ({quote(key)}) DO NOTHING RETURNING {quote(key)}"
+        )
+        return {r[0] for r in cursor.fetchall()}
+    finally:
+        cursor.close()
+
+
+def insert_batch(db: Session, table: Table, key: str, rows: List[Dict]) -> Set:
+    """Insert rows whose `key` is not taken yet; commits, returns the inserted keys."""
+    bind = db.get_bind()
+    if bind.dialect.name == "postgresql" and bind.dialect.driver == "psycopg2":
+        inserted = _copy_insert(db, table, key, rows)
+    elif bind.dialect.name in {"sqlite", "postgresql"}:
+        stmt = dialect_insert(bind.dialect.name)(table)
+        stmt = stmt.on_conflict_do_nothing(index_elements=[table.c[key]]).returning(table.c[key])
+        inserted = set(db.execute(stmt, rows).scalars())
+    else:
+        # portable fallback: look the keys up, insert the rest
+        keys = [row[key] for row in rows]
+        taken = set(db.execute(select(table.c[key]).where(table.c[key].in_(keys))).scalars())
+        fresh = [row for row in rows if row[key] not in taken]
+        if fresh:
+            db.execute(table.insert(), fresh)
+        inserted = {row[key] for row in fresh}
+    db.commit()
+    return inserted
+
+
+class ImportReport:
+    def __init__(self, max_errors: int = BULK_MAX_ERRORS):
+        self.max_errors = max_errors
+        self.rows = 0
+        self.inserted = 0
+        self.error_count = 0
+        self.errors: List[Dict] = []
+        self.started = time.perf_counter()
+
+    def error(self, line: int, message: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line, "error": message})
+
+    def as_dict(self) -> Dict:
+        seconds = time.perf_counter() - self.started
+        return {
+            "rows": self.rows,
+            "inserted": self.inserted,
+            "failed": self.error_count,
+            "errors": self.errors,
+            "errors_truncated": self.error_count > len(self.errors),
+            "seconds": round(seconds, 3),
+            "rows_per_sec": round(self.rows / seconds) if seconds else 0,
+        }
+
+
+async def _in_threadpool(db, fn, *args):
+    return await run_in_threadpool(fn, db, *args)
+
+
+async def bulk_import(
+    request: Request,
+    db,
+    table: Table,
+    key: str,
+    clean: Callable[[Dict], Dict],
+    run=_in_threadpool,
+    batch_size: int = BULK_BATCH_SIZE,
+) -> Dict:
+    """
+    Import the request body into `table`; returns the report. `run(db, fn,
+    *args)` runs a sync DB helper off the event loop (app.database.run_db
+    for AsyncSession support).
+    """
+    report = ImportReport()
+    batch: Dict[Any, Tuple[int, Dict]] = {}  # key -> (line, row)
+
+    async def flush() -> None:
+        inserted = await run(db, insert_batch, table, key, [row for _, row in batch.values()])
+        report.inserted += len(inserted)
+        for value, (line, _) in batch.items():
+            if value not in inserted:
+                report.error(line, f"{key} already exists")
+        batch.clear()
+
+    async for line, record in read_records(request, required=[key]):
+        report.rows += 1
+        if isinstance(record, ValueError):
+            report.error(line, str(record))
+            continue
+        try:
+            row = clean(record)
+        except ValueError as exc:
+            report.error(line, str(exc))
+            continue
+        first = batch.get(row[key])
+        if first is not None:
+            report.error(line, f"duplicate {key} (first on line {first[0]})")
+            continue
+        batch[row[key]] = (line, row)
+        if len(batch) >= batch_size:
+            await flush()
+    if batch:
+        await flush()
+    return report.as_dict()
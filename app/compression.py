@@ -0,0 +1,247 @@
+# app/compression.py
+"""
+Negotiated response compression: brotli (when the Brotli package is
+installed) or gzip, whichever the client's Accept-Encoding prefers.
+
+- CompressionMiddleware: plain ASGI, compresses JSON / NDJSON / text
+  bodies of at least COMPRESS_MIN_SIZE bytes as they are sent, streamed
+  bodies included, at the cheap per-request levels;
+- responses that already carry a Content-Encoding pass through untouched:
+  ResponseCache (app/services/response_cache.py) serves static catalogue
+  payloads precompressed once per catalogue version at the highest levels.
+
+Both count bytes before/after and the CPU time spent compressing in
+COMPRESSION_STATS, exported on /metrics.
+"""
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+from app.config import (
+    COMPRESS_BROTLI_LEVEL,
+    COMPRESS_GZIP_LEVEL,
+    COMPRESS_MIN_SIZE,
+    COMPRESS_STATIC_BROTLI_LEVEL,
+    COMPRESS_STATIC_GZIP_LEVEL,
+)
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# server preference when the client accepts several equally
+ENCODINGS: Tuple[str, ...] = ("br", "gzip") if brotli is not None else ("gzip",)
+LEVELS = {"br": COMPRESS_BROTLI_LEVEL, "gzip": COMPRESS_GZIP_LEVEL}
+STATIC_LEVELS = {"br": COMPRESS_STATIC_BROTLI_LEVEL, "gzip": COMPRESS_STATIC_GZIP_LEVEL}
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/", "application/javascript")
+
+
+# -------------------------
+# Negotiation
+# -------------------------
+
+
+def negotiate(accept_encoding: str, available: Tuple[str, ...] = ENCODINGS) -> Optional[str]:
+    """
+    The coding to send for an Accept-Encoding header (highest q, ties by
+    `available` order), or None for an uncompressed body.
+    """
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding] = q
+
+    best, best_q = None, 0.0
+    for coding in available:
+        q = weights.get(coding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compressible(content_type: str) -> bool:
+    content_type = content_type.lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES) or content_type.split(";")[0].endswith("+json")
+
+
+# -------------------------
+# Encoders
+# -------------------------
+
+
+def compress(body: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    """`body` as a complete gzip / brotli stream."""
+    if level is None:
+        level = LEVELS[encoding]
+    if encoding == "br":
+        return brotli.compress(body, quality=level)
+    if encoding == "gzip":
+        return zlib.compress(body, level, wbits=31)
+    raise ValueError(f"unsupported encoding {encoding!r}")
+
+
+class StreamEncoder:
+    """Incremental compressor for bodies sent in several messages."""
+
+    def __init__(self, encoding: str, level: Optional[int] = None):
+        if level is None:
+            level = LEVELS[encoding]
+        if encoding == "br":
+            compressor = brotli.Compressor(quality=level)
+            self.compress, self.finish = compressor.process, compressor.finish
+        elif encoding == "gzip":
+            compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+            self.compress, self.finish = compressor.compress, compressor.flush
+        else:
+            raise ValueError(f"unsupported encoding {encoding!r}")
+
+
+class CompressionStats:
+    """Per-encoding totals: responses, bytes before and after, CPU seconds."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals: Dict[str, List[float]] = {}
+
+    def record(self, encoding: str, raw: int, sent: int, seconds: float, responses: int = 0) -> None:
+        with self._lock:
+            totals = self._totals.setdefault(encoding, [0, 0, 0, 0.0])
+            totals[0] += responses
+            totals[1] += raw
+            totals[2] += sent
+            totals[3] += seconds
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                encoding: {"responses": t[0], "bytes_in": t[1], "bytes_out": t[2], "seconds": t[3]}
+                for encoding, t in self._totals.items()
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._totals.clear()
+
+
+COMPRESSION_STATS = CompressionStats()
+
+
+# -------------------------
+# ASGI middleware
+# -------------------------
+
+
+def _vary(headers: List[Tuple[bytes, bytes]]) -> List[Tuple[bytes, bytes]]:
+    """`headers` with Accept-Encoding added to Vary."""
+    for i, (name, value) in enumerate(headers):
+        if name.lower() == b"vary":
+            if b"accept-encoding" not in value.lower() and value.strip() != b"*":
+                headers[i] = (name, value + b", Accept-Encoding")
+            return headers
+    headers.append((b"vary", b"Accept-Encoding"))
+    return headers
+
+
+class _Responder:
+    """Wraps `send` for one response, compressing its body if it qualifies."""
+
+    def __init__(self, send, encoding: str, minimum_size: int, stats: CompressionStats):
+        self._send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.stats = stats
+        self.start = None
+        self.encoder = None
+        self.passthrough = False
+
+    async def send(self, message) -> None:
+        if self.passthrough:
+            await self._send(message)
+            return
+        if message["type"] == "http.response.start":
+            headers = message.get("headers", [])
+            content_type = b""
+            for name, value in headers:
+                name = name.lower()
+                if name == b"content-encoding":
+                    self.passthrough = True
+                    break
+                if name == b"content-type":
+                    content_type = value
+            if self.passthrough or not compressible(content_type.decode("latin-1")):
+                self.passthrough = True
+                await self._send(message)
+            else:
+                self.start = message  # held until the first body message
+            return
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        body, more_body = message.get("body", b""), message.get("more_body", False)
+        started = time.process_time()
+        if self.encoder is None:
+            if not more_body and len(body) < self.minimum_size:
+                self.passthrough = True
+                await self._send(self.start)
+                await self._send(message)
+                return
+            headers = _vary([(k, v) for k, v in self.start.get("headers", []) if k.lower() != b"content-length"])
+            headers.append((b"content-encoding", self.encoding.encode()))
+            if not more_body:
+                data = compress(body, self.encoding)
+                headers.append((b"content-length", str(len(data)).encode()))
+                self.stats.record(self.encoding, len(body), len(data), time.process_time() - started, 1)
+                await self._send({**self.start, "headers": headers})
+                await self._send({"type": "http.response.body", "body": data})
+                return
+            self.encoder = StreamEncoder(self.encoding)
+            await self._send({**self.start, "headers": headers})
+
+        data = self.encoder.compress(body)
+        if not more_body:
+            data += self.encoder.finish()
+        self.stats.record(self.encoding, len(body), len(data), time.process_time() - started, 0 if more_body else 1)
+        await self._send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+
+class CompressionMiddleware:
+    """
+    Compress response bodies the client accepts compressed (see module
+    docstring). Bodies are compressed as they pass; nothing is buffered
+    beyond the response start and a streamed response's current chunk.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESS_MIN_SIZE, stats: CompressionStats = COMPRESSION_STATS):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.stats = stats
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = None
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                encoding = negotiate(value.decode("latin-1"))
+                break
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _Responder(send, encoding, self.minimum_size, self.stats)
+        await self.app(scope, receive, responder.send)
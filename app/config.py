@@ -0,0 +1,196 @@
+# app/config.py
+import os
+
+# -------------------------
+# Runtime settings (environment driven)
+# -------------------------
+
+
+def _flag(name: str, default: bool = False) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return default if value in (None, "") else int(value)
+
+
+# e.g. PostgreSQL on Azure; unset -> local sqlite file
+DATABASE_URL = os.getenv("DATABASE_URL") or "sqlite:///./data.db"
+
+# Serve cart/order/user routes through an AsyncSession
+# (aiosqlite locally, asyncpg for PostgreSQL) instead of the threadpool.
+# Opt-in: benchmarks/bench_async_db.py measures the threadpool faster on
+# local sqlite (about 170 vs. 140 req/s); no workload where async wins has
+# been measured yet, so only enable it after benchmarking your database.
+ASYNC_DB = _flag("ASYNC_DB")
+
+# Optional explicit async URL; derived from DATABASE_URL when unset
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+
+# Apply pending schema migrations in each worker's startup hook. Gunicorn
+# (gunicorn.conf.py) turns this off and migrates once in the master;
+# otherwise run `python -m app.migrations` before starting the server.
+DB_MIGRATE_ON_STARTUP = _flag("DB_MIGRATE_ON_STARTUP", True)
+
+# -------------------------
+# Connection pool (per Gunicorn worker)
+# -------------------------
+
+# Persistent connections kept in the pool, and extra ones allowed under bursts.
+# Budget: workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) <= server max_connections
+DB_POOL_SIZE = _int("DB_POOL_SIZE", 5)
+DB_MAX_OVERFLOW = _int("DB_MAX_OVERFLOW", 10)
+# Seconds to wait for a free connection before failing the request
+DB_POOL_TIMEOUT = _int("DB_POOL_TIMEOUT", 30)
+# Recycle connections older than this many seconds (-1 = never). Setting it
+# below the server/proxy idle timeout lets DB_POOL_PRE_PING be turned off.
+DB_POOL_RECYCLE = _int("DB_POOL_RECYCLE", -1)
+# Test each connection with a round trip on checkout (non-sqlite only)
+DB_POOL_PRE_PING = _flag("DB_POOL_PRE_PING", True)
+
+# -------------------------
+# SQLite tuning (applied on connect)
+# -------------------------
+
+SQLITE_WAL = _flag("SQLITE_WAL", True)
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL").upper()
+if SQLITE_SYNCHRONOUS not in {"OFF", "NORMAL", "FULL", "EXTRA"}:
+    raise ValueError(f"Invalid SQLITE_SYNCHRONOUS: {SQLITE_SYNCHRONOUS}")
+SQLITE_BUSY_TIMEOUT_MS = _int("SQLITE_BUSY_TIMEOUT_MS", 5000)
+
+# -------------------------
+# Products
+# -------------------------
+
+# Bulk-upsert the in-memory catalogue into the products table on startup
+# and after reloads, once per catalogue version (see product_store.py)
+PRODUCT_WARMUP = _flag("PRODUCT_WARMUP", True)
+
+# Catalogue data file (.json or .ndjson, with a version stamp), and how
+# often each worker checks it for changes (seconds; 0 = load once)
+CATALOGUE_FILE = os.getenv("CATALOGUE_FILE") or os.path.join(os.path.dirname(__file__), "data", "catalogue.json")
+CATALOGUE_RELOAD_INTERVAL = float(os.getenv("CATALOGUE_RELOAD_INTERVAL", "5"))
+# How each worker holds the products: "records" (compact objects) or
+# "columns" (struct-of-arrays: least memory, slower lookups)
+CATALOGUE_STORAGE = os.getenv("CATALOGUE_STORAGE", "records").strip().lower()
+
+# Currency of catalogue prices, and what one unit of it is worth in the
+# currencies listings can convert to (?currency=), e.g. "USD=1.08,GBP=0.85"
+CATALOGUE_CURRENCY = os.getenv("CATALOGUE_CURRENCY", "EUR").strip().upper()
+FX_RATES = {
+    code.strip().upper(): float(rate)
+    for code, rate in (
+        item.split("=", 1)
+        for item in os.getenv("FX_RATES", "USD=1.08,GBP=0.85,CHF=0.94,JPY=162").split(",")
+        if item.strip()
+    )
+}
+FX_RATES[CATALOGUE_CURRENCY] = 1.0
+
+# -------------------------
+# Responses
+# -------------------------
+
+# Routers whose routes build responses without re-validation and encode
+# them with orjson (app/serializers.py); empty = FastAPI's default path
+FAST_JSON_ROUTERS = {
+    name.strip() for name in os.getenv("FAST_JSON_ROUTERS", "users,cart,orders").split(",") if name.strip()
+}
+
+# Compress responses for clients that accept it: brotli (with the Brotli
+# package installed) or gzip, chosen from Accept-Encoding
+COMPRESSION = _flag("COMPRESSION", True)
+# Bodies smaller than this many bytes are sent uncompressed
+COMPRESS_MIN_SIZE = _int("COMPRESS_MIN_SIZE", 1024)
+# Levels for bodies compressed per request; cached catalogue payloads are
+# compressed once per catalogue version at COMPRESS_STATIC_*_LEVEL (brotli
+# 11 is ~100x slower than 9 for ~15% less: seconds for a large listing)
+COMPRESS_GZIP_LEVEL = _int("COMPRESS_GZIP_LEVEL", 6)
+COMPRESS_BROTLI_LEVEL = _int("COMPRESS_BROTLI_LEVEL", 4)
+COMPRESS_STATIC_GZIP_LEVEL = _int("COMPRESS_STATIC_GZIP_LEVEL", 9)
+COMPRESS_STATIC_BROTLI_LEVEL = _int("COMPRESS_STATIC_BROTLI_LEVEL", 9)
+
+# -------------------------
+# Cache (users, carts)
+# -------------------------
+
+# Server worker processes (gunicorn.conf.py and uvicorn --workers read it too)
+WEB_CONCURRENCY = _int("WEB_CONCURRENCY", 1)
+
+# "local" (in-process LRU), "redis" (shared; needs the redis package, falls
+# back to local without it) or "none". A local copy per worker cannot be
+# invalidated by the other workers' writes, so with several workers "local"
+# caches nothing (see app/services/cache.py): use redis there.
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "local").lower()
+CACHE_URL = os.getenv("CACHE_URL") or os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# Seconds an entry lives
+CACHE_TTL = float(os.getenv("CACHE_TTL", "30"))
+# Seconds a key written to refuses refills, so a read that started before
+# the write cannot put its older copy back (redis: whole seconds, min. 1)
+CACHE_WRITE_HOLD = float(os.getenv("CACHE_WRITE_HOLD", "2"))
+# Entries per local user/cart cache (least recently used are evicted first)
+CACHE_MAX_ENTRIES = _int("CACHE_MAX_ENTRIES", 10000)
+
+# -------------------------
+# Bulk import (POST /users/import, /customers/import)
+# -------------------------
+
+# Rows per INSERT batch (and per commit)
+BULK_BATCH_SIZE = _int("BULK_BATCH_SIZE", 5000)
+# Per-row errors listed in the import report (all of them are counted)
+BULK_MAX_ERRORS = _int("BULK_MAX_ERRORS", 1000)
+
+# -------------------------
+# Checkout
+# -------------------------
+
+# Seconds a response stored under an Idempotency-Key is replayed for retries
+IDEMPOTENCY_KEY_TTL = _int("IDEMPOTENCY_KEY_TTL", 24 * 3600)
+
+# -------------------------
+# Logging
+# -------------------------
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Per-module overrides, e.g. "app.routers.cart=WARNING,sqlalchemy.engine=INFO"
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+# "json" (one object per line) or "text"
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+# Empty disables the rotating log file
+LOG_FILE = os.getenv("LOG_FILE", "logs/app.log")
+# Fraction of INFO/DEBUG records kept from the request-path loggers (app.routers)
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+
+# -------------------------
+# Telemetry
+# -------------------------
+
+# Per-request timing, per-route histograms and SQLAlchemy query hooks
+TELEMETRY = _flag("TELEMETRY", True)
+# Where per-request records go: "none", "memory", "file" or "otlp"
+# (otlp needs the opentelemetry SDK + OTLP exporter; endpoint from OTEL_EXPORTER_OTLP_ENDPOINT)
+TELEMETRY_EXPORTER = os.getenv("TELEMETRY_EXPORTER", "none").lower()
+TELEMETRY_FILE = os.getenv("TELEMETRY_FILE", "logs/telemetry.jsonl")
+
+# -------------------------
+# Metrics (/metrics)
+# -------------------------
+
+# Shared directory for per-worker snapshots when running several Gunicorn
+# workers; unset = each worker reports only itself
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR") or os.getenv("PROMETHEUS_MULTIPROC_DIR")
+# Seconds between snapshot writes (bounds how stale other workers' numbers are)
+METRICS_DUMP_INTERVAL = float(os.getenv("METRICS_DUMP_INTERVAL", "5"))
+
+# -------------------------
+# Health probes
+# -------------------------
+
+# Seconds between background DB checks behind /health/ready
+HEALTH_CHECK_INTERVAL = float(os.getenv("HEALTH_CHECK_INTERVAL", "5"))
+# Not ready once this fraction of pool + overflow connections is checked out
+READINESS_MAX_POOL_USAGE = float(os.getenv("READINESS_MAX_POOL_USAGE", "0.9"))
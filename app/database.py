@@ -1,5 +1,4 @@
 # app/database.py
-import os
 from sqlalchemy import (
     create_engine,
     Column,
@@ -7,30 +6,65 @@ from sqlalchemy import (
     String,
     Text,
     Float,
+    DateTime,
     ForeignKey,
+    Index,
 )
 from sqlalchemy.orm import sessionmaker, declarative_base, relationship
+from starlette.concurrency import run_in_threadpool
+
+from app.config import ASYNC_DB, ASYNC_DATABASE_URL, DATABASE_URL
+from app.db_pool import engine_options, install_sqlite_pragmas, is_sqlite, worker_pool_status
 
 # -------------------------
 # Database configuration
 # -------------------------
 
-DATABASE_URL = os.getenv("DATABASE_URL")
-
-if DATABASE_URL:
-    # e.g. PostgreSQL on Azure
-    engine = create_engine(DATABASE_URL, pool_pre_ping=True)
-else:
-    # Local sqlite fallback for local dev/tests
-    engine = create_engine(
-        "sqlite:///./data.db",
-        connect_args={"check_same_thread": False},
-    )
+# Pool size/overflow/recycle/timeout/pre-ping come from app.config;
+# sqlite (local dev/tests) additionally gets WAL + busy_timeout pragmas
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+if is_sqlite(DATABASE_URL):
+    install_sqlite_pragmas(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+def to_async_url(url: str) -> str:
+    """
+    Map a sync DATABASE_URL onto its native async driver:
+    sqlite -> aiosqlite, postgresql -> asyncpg.
+    """
+    scheme, sep, rest = url.partition("://")
+    dialect = scheme.split("+", 1)[0]
+    if dialect == "sqlite":
+        return f"sqlite+aiosqlite{sep}{rest}"
+    if dialect in {"postgres", "postgresql"}:
+        return f"postgresql+asyncpg{sep}{rest}"
+    return url
+
+
+# Only built when enabled so the async drivers stay optional
+async_engine = None
+AsyncSessionLocal = None
+
+if ASYNC_DB:
+    # imported here: sqlalchemy.ext.asyncio is slow to import and unused otherwise
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    _async_url = ASYNC_DATABASE_URL or to_async_url(DATABASE_URL)
+    # engine_options() also replaces aiosqlite's default NullPool (a new
+    # connection + thread per session) with a real queue pool
+    async_engine = create_async_engine(_async_url, **engine_options(_async_url, is_async=True))
+    if is_sqlite(_async_url):
+        install_sqlite_pragmas(async_engine.sync_engine)
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+
+
 def get_db():
     """
     FastAPI dependency to get a DB session.
@@ -42,6 +76,63 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """
+    FastAPI dependency to get an AsyncSession (requires ASYNC_DB).
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def dispose_engines_after_fork() -> None:
+    """
+    Forget pooled connections inherited from a parent process (e.g. a
+    preloading Gunicorn master) without closing them under the parent.
+    """
+    engine.dispose(close=False)
+    if async_engine is not None:
+        async_engine.sync_engine.dispose(close=False)
+
+
+def pool_metrics() -> dict:
+    """Checked-out/overflow/wait counters of this worker's pools."""
+    return worker_pool_status({"sync": engine, "async": async_engine})
+
+
+# Session dependency used by the cart/order/user routes
+get_request_db = get_async_db if ASYNC_DB else get_db
+
+
+async def run_db(db, fn, *args):
+    """
+    Run a sync ORM helper `fn(session, *args)` without blocking the event loop.
+
+    With an AsyncSession the helper runs on the native async driver via
+    run_sync; with a regular Session it runs in the threadpool, which is
+    what a plain `def` route did before.
+    """
+    run_sync = getattr(db, "run_sync", None)  # AsyncSession
+    if run_sync is not None:
+        return await run_sync(fn, *args)
+    return await run_in_threadpool(fn, db, *args)
+
+
+def begin_write(db) -> None:
+    """
+    Open the session's transaction holding the database write lock.
+
+    On sqlite this is BEGIN IMMEDIATE: concurrent writers wait here (up to
+    busy_timeout) instead of reading stale data and failing later with
+    "database is locked". Other databases lock rows with SELECT ... FOR
+    UPDATE in the transaction itself, so there is nothing to do.
+    """
+    conn = db.connection()
+    if conn.dialect.name != "sqlite":
+        return
+    if not getattr(conn.connection.dbapi_connection, "in_transaction", False):
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
 # -------------------------
 # SQLAlchemy models
 # -------------------------
@@ -76,7 +167,7 @@ class Cart(Base):
     __tablename__ = "carts"
 
     id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
 
     user = relationship("User", back_populates="carts")
     items = relationship(
@@ -88,10 +179,14 @@ class Cart(Base):
 
 class CartItem(Base):
     __tablename__ = "cart_items"
+    __table_args__ = (
+        # one line per product per cart; also serves lookups by cart_id
+        Index("uq_cart_items_cart_product", "cart_id", "product_id", unique=True),
+    )
 
     id = Column(Integer, primary_key=True)
     cart_id = Column(Integer, ForeignKey("carts.id"))
-    product_id = Column(Integer, ForeignKey("products.id"))
+    product_id = Column(Integer, ForeignKey("products.id"), index=True)
     quantity = Column(Integer, default=1)
 
     cart = relationship("Cart", back_populates="items")
@@ -102,7 +197,54 @@ class Order(Base):
     __tablename__ = "orders"
 
     id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
-    total = Column(Float, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    total = Column(Float, nullable=False)  # total_cents / 100, for existing clients
+    total_cents = Column(Integer)  # NULL only on rows older than migration 4
 
     user = relationship("User", back_populates="orders")
+    items = relationship(
+        "OrderItem",
+        back_populates="order",
+        cascade="all, delete-orphan",
+        order_by="OrderItem.id",
+    )
+
+
+class OrderItem(Base):
+    """
+    One ordered line, with the product title and unit price as they were at
+    checkout (integer cents: sums and comparisons are exact).
+    """
+    __tablename__ = "order_items"
+
+    id = Column(Integer, primary_key=True)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False, index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    title = Column(String(255), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    unit_price_cents = Column(Integer, nullable=False)
+
+    order = relationship("Order", back_populates="items")
+
+
+class IdempotencyKey(Base):
+    """Response stored for a request sent with an Idempotency-Key header."""
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String(255), primary_key=True)
+    request = Column(String(255), nullable=False)  # e.g. "POST /orders/42"
+    status_code = Column(Integer, nullable=False)
+    body = Column(Text, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+
+
+class CatalogueSync(Base):
+    """
+    Catalogue version last upserted into the products table (one row,
+    id 1), so only one process writes each version.
+    """
+    __tablename__ = "catalogue_sync"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(String(64), nullable=False)  # Catalogue.version (content hash)
+    synced_at = Column(DateTime, nullable=False)
@@ -0,0 +1,168 @@
+# app/db_pool.py
+import os
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.config import (
+    DB_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    SQLITE_BUSY_TIMEOUT_MS,
+    SQLITE_SYNCHRONOUS,
+    SQLITE_WAL,
+)
+
+# -------------------------
+# Pool tuning + per-worker pool statistics
+# -------------------------
+
+
+class PoolStats:
+    """Counters for one pool, local to the current worker process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.waits = 0  # checkouts that found the pool (incl. overflow) exhausted
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+
+    def record(self, waited: bool, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            if waited:
+                self.waits += 1
+                self.wait_seconds += seconds
+
+
+class _InstrumentedPoolMixin:
+    """Counts checkouts and the ones that had to wait for a free connection."""
+
+    stats: PoolStats
+
+    def _do_get(self):
+        # max_overflow=-1 means unbounded: nobody ever waits
+        exhausted = (
+            self._max_overflow >= 0
+            and self.checkedout() >= self.size() + self._max_overflow
+        )
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except Exception:
+            self.stats.record(exhausted, time.perf_counter() - start, timed_out=True)
+            raise
+        self.stats.record(exhausted, time.perf_counter() - start)
+        return conn
+
+    def recreate(self):
+        # keep counters across dispose()/recreate
+        new = super().recreate()
+        new.stats = self.stats
+        return new
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+
+def is_sqlite(url: str) -> bool:
+    return url.split(":", 1)[0].split("+", 1)[0] == "sqlite"
+
+
+def engine_options(url: str, is_async: bool = False) -> dict:
+    """
+    create_engine()/create_async_engine() keyword arguments for `url`,
+    driven by the DB_POOL_* / SQLITE_* settings.
+    """
+    sqlite = is_sqlite(url)
+    connect_args = {"check_same_thread": False} if sqlite and not is_async else {}
+
+    if sqlite and ":memory:" in url:
+        # in-memory databases live in a single connection; keep the default pool
+        return {"connect_args": connect_args}
+
+    options = {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+    }
+    if connect_args:
+        options["connect_args"] = connect_args
+    if not sqlite:
+        # a local sqlite file never drops connections, so only ping servers
+        options["pool_pre_ping"] = DB_POOL_PRE_PING
+    return options
+
+
+def dialect_insert(dialect: str):
+    """INSERT construct with ON CONFLICT support (dialect module imported on use)."""
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    return insert
+
+
+def install_sqlite_pragmas(engine) -> None:
+    """Apply WAL / synchronous / busy_timeout pragmas to every new sqlite connection."""
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, _record):
+        cursor = dbapi_connection.cursor()
+        if SQLITE_WAL:
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={int(SQLITE_BUSY_TIMEOUT_MS)}")
+        cursor.close()
+
+
+def pool_status(engine) -> dict:
+    """Snapshot of an engine's pool for this worker process."""
+    pool = engine.pool
+    status = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+            max_overflow=pool._max_overflow,
+        )
+    stats = getattr(pool, "stats", None)
+    if stats is not None:
+        status.update(
+            checkouts=stats.checkouts,
+            waits=stats.waits,
+            wait_seconds=round(stats.wait_seconds, 6),
+            timeouts=stats.timeouts,
+        )
+    return status
+
+
+def worker_pool_status(engines: dict) -> dict:
+    """pool_status() for several named engines, tagged with the worker pid."""
+    return {
+        "pid": os.getpid(),
+        "pools": {
+            name: pool_status(e) for name, e in engines.items() if e is not None
+        },
+    }
@@ -0,0 +1,98 @@
+# app/health.py
+"""
+Liveness / readiness state for load-balancer probes.
+
+Probes never touch the database: a background thread runs `SELECT 1`
+every HEALTH_CHECK_INTERVAL seconds and readiness() only reads the cached
+result, the warm-up flags and the pool counters of this worker (both
+pools when the async engine is enabled: async routes only use its pool).
+"""
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import text
+
+from app.db_pool import pool_status
+
+
+class HealthMonitor:
+    def __init__(
+        self,
+        engine,
+        interval: float = 5.0,
+        max_pool_usage: float = 0.9,
+        warmups: Iterable[str] = (),
+        async_engine=None,
+    ):
+        self.engine = engine
+        self.async_engine = async_engine
+        self.interval = interval
+        self.max_pool_usage = max_pool_usage
+        self._pending_warmups = set(warmups)
+        self._db: Dict = {"ok": False, "error": "not checked yet", "checked_at": None}
+        self._checked_mono: Optional[float] = None
+        self._stop: Optional[threading.Event] = None
+
+    # --- background DB check ---
+
+    def check_db(self) -> None:
+        start = time.perf_counter()
+        try:
+            with self.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            result = {"ok": True, "latency_ms": round((time.perf_counter() - start) * 1e3, 3)}
+        except Exception as exc:  # any failure means "not ready"
+            result = {"ok": False, "error": f"{type(exc).__name__}: {exc}"[:200]}
+        result["checked_at"] = time.time()
+        self._db = result
+        self._checked_mono = time.monotonic()
+
+    def start(self) -> None:
+        """Check once now, then every `interval` seconds (call after fork)."""
+        self.stop()
+        self.check_db()
+        self._stop = stop = threading.Event()
+
+        def run() -> None:
+            while not stop.wait(self.interval):
+                self.check_db()
+
+        threading.Thread(target=run, name="health-check", daemon=True).start()
+
+    def stop(self) -> None:
+        if self._stop is not None:
+            self._stop.set()
+            self._stop = None
+
+    # --- warm-up ---
+
+    def mark_warm(self, name: str) -> None:
+        self._pending_warmups.discard(name)
+
+    # --- probes ---
+
+    def pool_usage(self) -> float:
+        """Checked-out share of the fullest pool."""
+        usage = 0.0
+        for engine in (self.engine, self.async_engine):
+            if engine is None:
+                continue
+            status = pool_status(engine)
+            capacity = status.get("size", 0) + status.get("max_overflow", 0)
+            if capacity:
+                usage = max(usage, status.get("checked_out", 0) / capacity)
+        return usage
+
+    def readiness(self) -> Tuple[bool, dict]:
+        db = dict(self._db)
+        if self._checked_mono is not None and time.monotonic() - self._checked_mono > 3 * self.interval:
+            db.update(ok=False, error="stale check (health thread not running)")
+        usage = self.pool_usage()
+        checks = {
+            "database": db,
+            "warmup": {"ok": not self._pending_warmups, "pending": sorted(self._pending_warmups)},
+            "pool": {"ok": usage < self.max_pool_usage, "usage": round(usage, 3)},
+        }
+        ready = all(check["ok"] for check in checks.values())
+        return ready, {"status": "ready" if ready else "not ready", "checks": checks}
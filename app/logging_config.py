@@ -1,25 +1,160 @@
+import atexit
+import contextvars
+import json
 import logging
-from logging.handlers import RotatingFileHandler
 import os
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, Iterable, Optional
 
-# Create logs directory if it doesn't exist
-os.makedirs("logs", exist_ok=True)
-
-# Define log format
-LOG_FORMAT = "%(asctime)s - %(levelname)s - %(name)s - %(message)s"
-
-# Configure root logger
-logging.basicConfig(
-    level=logging.INFO,
-    format=LOG_FORMAT,
-    handlers=[
-        RotatingFileHandler(
-            "logs/app.log",
-            maxBytes=5 * 1024 * 1024,  # 5MB
-            backupCount=3
-        ),
-        logging.StreamHandler()  # prints logs to console
-    ]
+from app.config import LOG_FILE, LOG_FORMAT, LOG_LEVEL, LOG_LEVELS, LOG_SAMPLE_RATE
+
+# Request id of the request being served, set by app.middleware.RequestIdMiddleware
+request_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "request_id", default=None
 )
 
+# Define log format (text mode)
+TEXT_FORMAT = "%(asctime)s - %(levelname)s - %(name)s - [%(request_id)s] %(message)s"
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamp each record with the current request id (on the request thread)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get() or "-"
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a fraction of INFO/DEBUG records from hot-path loggers;
+    warnings and errors always pass.
+    """
+
+    def __init__(self, rate: float, prefixes: Iterable[str]):
+        super().__init__()
+        self.rate = rate
+        self.prefixes = tuple(prefixes)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO or self.rate >= 1.0:
+            return True
+        if not record.name.startswith(self.prefixes):
+            return True
+        return random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "msg": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def parse_levels(spec: str) -> Dict[str, str]:
+    """'app.routers.cart=WARNING,sqlalchemy.engine=INFO' -> {name: level}"""
+    levels = {}
+    for part in spec.split(","):
+        if "=" in part:
+            name, level = part.split("=", 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+_listener: Optional[QueueListener] = None
+_listener_pid: Optional[int] = None
+
+
+def configure_logging(
+    level: str = "INFO",
+    json_format: bool = True,
+    log_file: Optional[str] = "logs/app.log",
+    levels: Optional[Dict[str, str]] = None,
+    sample_rate: float = 1.0,
+    sampled: Iterable[str] = ("app.routers",),
+    stream=None,
+) -> QueueListener:
+    """
+    Route all logging through a QueueHandler: request threads only enqueue
+    records, and a QueueListener thread does the formatting and file/console
+    I/O. Replaces any previous configuration.
+    """
+    global _listener, _listener_pid
+    if _listener is not None and _listener_pid == os.getpid():
+        _listener.stop()
+
+    formatter = JsonFormatter() if json_format else logging.Formatter(TEXT_FORMAT)
+    handlers = [logging.StreamHandler(stream)]  # prints logs to console
+    if log_file:
+        os.makedirs(os.path.dirname(log_file) or ".", exist_ok=True)
+        handlers.append(
+            RotatingFileHandler(
+                log_file,
+                maxBytes=5 * 1024 * 1024,  # 5MB
+                backupCount=3
+            )
+        )
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(sample_rate, sampled))
+    queue_handler.addFilter(RequestContextFilter())
+
+    root = logging.getLogger()
+    for old in list(root.handlers):
+        root.removeHandler(old)
+    root.addHandler(queue_handler)
+    root.setLevel(level.upper())
+    for name, module_level in (levels or {}).items():
+        logging.getLogger(name).setLevel(module_level)
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    _listener_pid = os.getpid()
+    return _listener
+
+
+def setup_logging() -> None:
+    """
+    configure_logging() from the LOG_* settings, once per process. Called
+    from the app's startup hook rather than at import: a listener thread
+    started in a preloading Gunicorn master would not exist in the workers.
+    """
+    if _listener is not None and _listener_pid == os.getpid():
+        return
+    configure_logging(
+        level=LOG_LEVEL,
+        json_format=LOG_FORMAT == "json",
+        log_file=LOG_FILE or None,
+        levels=parse_levels(LOG_LEVELS),
+        sample_rate=LOG_SAMPLE_RATE,
+    )
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        if _listener_pid == os.getpid():
+            _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
+
 logger = logging.getLogger("app")
@@ -1,16 +1,36 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 
-from app.database import Base, engine
+from app import metrics
+from app.compression import COMPRESSION_STATS, CompressionMiddleware
+from app.config import (
+    COMPRESSION,
+    DB_MIGRATE_ON_STARTUP,
+    HEALTH_CHECK_INTERVAL,
+    METRICS_DUMP_INTERVAL,
+    METRICS_MULTIPROC_DIR,
+    PRODUCT_WARMUP,
+    READINESS_MAX_POOL_USAGE,
+    TELEMETRY,
+    TELEMETRY_EXPORTER,
+    TELEMETRY_FILE,
+)
+from app.database import (
+    SessionLocal,
+    async_engine,
+    dispose_engines_after_fork,
+    engine,
+    pool_metrics,
+)
+from app.health import HealthMonitor
+from app.logging_config import setup_logging
+from app.middleware import RequestIdMiddleware
+from app.migrations import upgrade
 from app.routers import products, users, cart, orders
-
-Base.metadata.create_all(bind=engine)
-
-app = FastAPI(title="DevOps Shop API")
-
-@app.get("/health")
-def health_check():
-    return {"status": "healthy"}
+from app.services.external_products import CATALOGUE_STORE
+from app.services.product_store import close_client, warm_product_table, warm_reloaded_catalogue
+from app.telemetry import configure_telemetry, make_exporter
 
 origins = [
     "http://localhost:5173",
@@ -19,15 +39,130 @@ origins = [
     "http://127.0.0.1:5174",
 ]
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
 
-app.include_router(products.router, prefix="/products", tags=["Products"])
-app.include_router(users.router,    prefix="/users",    tags=["Users"])
-app.include_router(cart.router,     prefix="/cart",     tags=["Cart"])
-app.include_router(orders.router,   prefix="/orders",   tags=["Orders"])
+def create_app() -> FastAPI:
+    """
+    Build the API. Nothing here opens a connection, creates a file or
+    starts a thread, so Gunicorn can --preload the app once in the master;
+    per-worker setup (logging, DB, warm-up, background checks) runs in the
+    startup hooks, i.e. after fork.
+    """
+    app = FastAPI(title="DevOps Shop API")
+
+    # readiness state, refreshed in the background (see app/health.py)
+    health = HealthMonitor(
+        engine,
+        interval=HEALTH_CHECK_INTERVAL,
+        max_pool_usage=READINESS_MAX_POOL_USAGE,
+        warmups=["products"] if PRODUCT_WARMUP else [],
+        async_engine=async_engine,
+    )
+    app.state.health = health
+
+    @app.on_event("startup")
+    def prepare_worker():
+        setup_logging()
+        dispose_engines_after_fork()
+        # create tables / apply pending schema migrations (see app/migrations.py);
+        # under Gunicorn the master does this once instead (gunicorn.conf.py)
+        if DB_MIGRATE_ON_STARTUP:
+            upgrade(engine)
+
+    @app.on_event("startup")
+    def warm_products():
+        """
+        Bulk-load the in-memory catalogue into the products table so
+        add-to-cart never has to fetch a product remotely. Under Gunicorn
+        the master has written it already (gunicorn.conf.py) and this only
+        fills the worker's PRODUCT_CACHE; reloads are written by one worker.
+        """
+        if PRODUCT_WARMUP:
+            with SessionLocal() as db:
+                warm_product_table(db)
+            CATALOGUE_STORE.on_swap(warm_reloaded_catalogue)
+            health.mark_warm("products")
+
+    @app.on_event("startup")
+    def start_background_tasks():
+        health.start()
+        # pick up catalogue file changes (see app/services/catalogue_store.py)
+        CATALOGUE_STORE.start()
+        # share this worker's metrics with the others
+        if METRICS_MULTIPROC_DIR:
+            metrics.start_worker_dump(METRICS_MULTIPROC_DIR, METRICS_DUMP_INTERVAL)
+
+    @app.on_event("shutdown")
+    async def close_http_client():
+        await close_client()
+
+    @app.on_event("shutdown")
+    def stop_background_tasks():
+        metrics.stop_worker_dump()
+        CATALOGUE_STORE.stop()
+        health.stop()
+
+    @app.get("/health")
+    @app.get("/health/live")
+    def health_check():
+        """Liveness: the process is up and serving requests."""
+        return {"status": "healthy"}
+
+    @app.get("/health/ready")
+    async def readiness_check():
+        """
+        Readiness: DB reachable (last background check), warm-up done and pool
+        not saturated. 503 while not ready; never queries the DB itself.
+        """
+        ready, body = health.readiness()
+        return JSONResponse(body, status_code=200 if ready else 503)
+
+    @app.get("/health/pool")
+    def pool_health():
+        """
+        Connection pool usage of the worker that served this request.
+        """
+        return pool_metrics()
+
+    metrics.register_collector("db_pool", metrics.pool_collector(pool_metrics))
+    metrics.register_collector("compression", metrics.compression_collector(COMPRESSION_STATS.stats))
+
+    @app.get("/metrics", include_in_schema=False)
+    def prometheus_metrics():
+        """
+        Prometheus text exposition: request latency per route, errors,
+        in-flight requests, DB pool and cache stats (all workers when
+        METRICS_MULTIPROC_DIR is set).
+        """
+        return Response(metrics.exposition(), headers={"Content-Type": metrics.CONTENT_TYPE})
+
+    # gzip / brotli for bodies >= COMPRESS_MIN_SIZE (see app/compression.py);
+    # added first so it wraps the routes directly and its time shows in telemetry
+    if COMPRESSION:
+        app.add_middleware(CompressionMiddleware)
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["X-Request-ID", "Server-Timing", "Idempotent-Replayed"],
+    )
+    # request timing, per-route histograms and query counts (see app/telemetry.py);
+    # added before RequestIdMiddleware so its records carry the request id
+    if TELEMETRY:
+        configure_telemetry(
+            app,
+            engines=[e for e in (engine, async_engine) if e is not None],
+            exporter=make_exporter(TELEMETRY_EXPORTER, TELEMETRY_FILE),
+        )
+    app.add_middleware(RequestIdMiddleware)
+
+    app.include_router(products.router, prefix="/products", tags=["Products"])
+    app.include_router(users.router,    prefix="/users",    tags=["Users"])
+    app.include_router(cart.router,     prefix="/cart",     tags=["Cart"])
+    app.include_router(orders.router,   prefix="/orders",   tags=["Orders"])
+
+    return app
+
+
+app = create_app()
@@ -0,0 +1,347 @@
+# app/metrics.py
+"""
+Prometheus text exposition for GET /metrics.
+
+A scrape renders the telemetry registry (request latency per route
+template, request/error counts, in-flight requests, DB time and queries),
+DB pool stats, cache hit/miss counters and compression totals (bytes
+before/after, CPU time).
+
+Under Gunicorn every worker has its own registry, so with
+METRICS_MULTIPROC_DIR set each worker also dumps a JSON snapshot of its
+metrics to `<dir>/<pid>.json` every METRICS_DUMP_INTERVAL seconds. The
+worker answering a scrape refreshes its own file and sums all of them:
+histograms and counters across every worker that ever ran (so totals stay
+monotonic when a worker is replaced), gauges only across live workers.
+Empty the directory when the server (not a worker) restarts.
+"""
+import glob
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.telemetry import METRICS, MetricsRegistry
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Sample = Tuple[str, Dict[str, str], float]
+
+# registry name -> (exposed name, help); unknown names get dots -> underscores
+NAMES = {
+    "http.server.duration": ("http_request_duration_seconds", "Request latency by route template"),
+    "http.server.db.duration": ("http_request_db_seconds", "DB time spent per request"),
+    "http.server.db.queries": ("http_request_db_queries", "SQL statements executed per request"),
+    "db.query.duration": ("db_query_duration_seconds", "Latency of single SQL statements"),
+    "http.server.active_requests": ("http_requests_in_flight", "Requests being served"),
+    "http.server.errors": ("http_request_errors_total", "Requests that raised an unhandled exception"),
+}
+
+HELP = {
+    "http_requests_total": "Requests served, by route template and status",
+    "db_pool_size": "Configured pool size",
+    "db_pool_checked_out": "Connections in use",
+    "db_pool_overflow": "Overflow connections open",
+    "db_pool_checkouts_total": "Connection checkouts",
+    "db_pool_waits_total": "Checkouts that had to wait for a free connection",
+    "db_pool_wait_seconds_total": "Time spent waiting for a connection",
+    "db_pool_timeouts_total": "Checkouts that timed out",
+    "cache_hits_total": "Cache lookups that hit",
+    "cache_misses_total": "Cache lookups that missed",
+    "cache_errors_total": "Cache operations that failed (served from the database instead)",
+    "cache_entries": "Entries held by the cache",
+    "cache_hit_ratio": "hits / (hits + misses) since start",
+    "http_responses_compressed_total": "Responses sent compressed, by encoding",
+    "http_response_bytes_uncompressed_total": "Body bytes before compression",
+    "http_response_bytes_compressed_total": "Body bytes sent after compression",
+    "http_response_compress_seconds_total": "CPU time spent compressing bodies",
+}
+
+
+def _exposed(name: str) -> str:
+    return NAMES.get(name, (name.replace(".", "_"), ""))[0]
+
+
+# -------------------------
+# Collectors (pools, caches)
+# -------------------------
+
+# each returns (counters, gauges) samples, evaluated at scrape / dump time
+_collectors: Dict[str, Callable[[], Tuple[List[Sample], List[Sample]]]] = {}
+_caches: Dict[str, object] = {}
+
+
+def register_collector(name: str, collector: Callable[[], Tuple[List[Sample], List[Sample]]]) -> None:
+    """Add (or replace) a named collector."""
+    _collectors[name] = collector
+
+
+def register_cache(name: str, cache) -> None:
+    """Expose a cache with a stats() -> {"hits", "misses"[, "entries", "errors"]} method."""
+    _caches[name] = cache
+
+
+def pool_collector(pool_metrics: Callable[[], dict]):
+    """Collector for app.database.pool_metrics()-style worker pool status."""
+
+    def collect() -> Tuple[List[Sample], List[Sample]]:
+        counters, gauges = [], []
+        for pool, status in pool_metrics()["pools"].items():
+            labels = {"pool": pool}
+            for key in ("size", "checked_out", "overflow"):
+                if key in status:
+                    gauges.append((f"db_pool_{key}", labels, status[key]))
+            for key in ("checkouts", "waits", "wait_seconds", "timeouts"):
+                if key in status:
+                    counters.append((f"db_pool_{key}_total", labels, status[key]))
+        return counters, gauges
+
+    return collect
+
+
+def compression_collector(compression_stats: Callable[[], dict]):
+    """Collector for app.compression.CompressionStats.stats()."""
+
+    def collect() -> Tuple[List[Sample], List[Sample]]:
+        counters = []
+        for encoding, totals in compression_stats().items():
+            labels = {"encoding": encoding}
+            counters.append(("http_responses_compressed_total", labels, totals["responses"]))
+            counters.append(("http_response_bytes_uncompressed_total", labels, totals["bytes_in"]))
+            counters.append(("http_response_bytes_compressed_total", labels, totals["bytes_out"]))
+            counters.append(("http_response_compress_seconds_total", labels, totals["seconds"]))
+        return counters, []
+
+    return collect
+
+
+def _cache_samples() -> Tuple[List[Sample], List[Sample]]:
+    counters, gauges = [], []
+    for name, cache in list(_caches.items()):
+        stats = cache.stats()
+        labels = {"cache": name}
+        counters.append(("cache_hits_total", labels, stats["hits"]))
+        counters.append(("cache_misses_total", labels, stats["misses"]))
+        if "errors" in stats:
+            counters.append(("cache_errors_total", labels, stats["errors"]))
+        if "entries" in stats:  # not for shared (Redis) caches
+            gauges.append(("cache_entries", labels, stats["entries"]))
+    return counters, gauges
+
+
+# -------------------------
+# Worker snapshots
+# -------------------------
+
+
+def snapshot(registry: MetricsRegistry = METRICS) -> dict:
+    """Everything this worker would expose, as JSON-serializable data."""
+    histograms = [
+        {
+            "name": _exposed(name),
+            "labels": labels,
+            "bounds": list(h.bounds),
+            "counts": list(h.counts),
+            "sum": h.sum,
+            "count": h.count,
+        }
+        for name, labels, h in registry.collect()
+    ]
+    counters, gauges = registry.collect_values()
+    counters = [(_exposed(n), labels, v) for n, labels, v in counters]
+    gauges = [(_exposed(n), labels, v) for n, labels, v in gauges]
+    for collect in [*_collectors.values(), _cache_samples]:
+        more_counters, more_gauges = collect()
+        counters += more_counters
+        gauges += more_gauges
+    return {
+        "pid": os.getpid(),
+        "ts": time.time(),
+        "histograms": histograms,
+        "counters": [list(s) for s in counters],
+        "gauges": [list(s) for s in gauges],
+    }
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class MultiProcessStore:
+    """One JSON snapshot per worker pid in a shared directory."""
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+
+    def write(self, data: dict) -> None:
+        path = os.path.join(self.directory, f"{data['pid']}.json")
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as out:
+            json.dump(data, out)
+        os.replace(tmp, path)  # readers never see a half-written file
+
+    def read_all(self) -> List[dict]:
+        snapshots = []
+        for path in glob.glob(os.path.join(self.directory, "*.json")):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue  # removed or replaced mid-read
+        return snapshots
+
+
+_store: Optional[MultiProcessStore] = None
+_dump_stop: Optional[threading.Event] = None
+
+
+def start_worker_dump(directory: str, interval: float) -> None:
+    """Periodically write this worker's snapshot (call after fork, e.g. on startup)."""
+    global _store, _dump_stop
+    stop_worker_dump()
+    _store = MultiProcessStore(directory)
+    _dump_stop = threading.Event()
+
+    def run(stop: threading.Event = _dump_stop) -> None:
+        while True:
+            _store.write(snapshot())
+            if stop.wait(interval):
+                break
+
+    threading.Thread(target=run, name="metrics-dump", daemon=True).start()
+
+
+def stop_worker_dump() -> None:
+    """Final write without gauges: this worker no longer serves anything."""
+    global _dump_stop
+    if _dump_stop is not None:
+        _dump_stop.set()
+        _dump_stop = None
+        final = snapshot()
+        final["gauges"] = []
+        _store.write(final)
+
+
+# -------------------------
+# Aggregation + exposition
+# -------------------------
+
+
+def _key(name: str, labels: Dict[str, str]) -> Tuple[str, Tuple[Tuple[str, str], ...]]:
+    return name, tuple(sorted(labels.items()))
+
+
+def aggregate(snapshots: Iterable[dict], live: Callable[[int], bool] = _pid_alive) -> dict:
+    histograms: Dict[tuple, dict] = {}
+    counters: Dict[tuple, float] = {}
+    gauges: Dict[tuple, float] = {}
+    for snap in snapshots:
+        for h in snap["histograms"]:
+            key = _key(h["name"], h["labels"])
+            acc = histograms.get(key)
+            if acc is None or acc["bounds"] != h["bounds"]:
+                histograms[key] = {**h, "counts": list(h["counts"])}
+            else:
+                acc["counts"] = [a + b for a, b in zip(acc["counts"], h["counts"])]
+                acc["sum"] += h["sum"]
+                acc["count"] += h["count"]
+        for name, labels, value in snap["counters"]:
+            key = _key(name, labels)
+            counters[key] = counters.get(key, 0) + value
+        if snap["pid"] == os.getpid() or live(snap["pid"]):
+            for name, labels, value in snap["gauges"]:
+                key = _key(name, labels)
+                gauges[key] = gauges.get(key, 0) + value
+    return {"histograms": histograms, "counters": counters, "gauges": gauges}
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pairs: Iterable[Tuple[str, str]]) -> str:
+    pairs = list(pairs)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+def _help(name: str) -> str:
+    for exposed, text in NAMES.values():
+        if exposed == name:
+            return text
+    return HELP.get(name, name)
+
+
+def render(metrics: dict) -> str:
+    lines: List[str] = []
+
+    def family(name: str, kind: str) -> None:
+        lines.append(f"# HELP {name} {_help(name)}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    by_name: Dict[str, list] = {}
+    for (name, labels), h in sorted(metrics["histograms"].items()):
+        by_name.setdefault(name, []).append((labels, h))
+
+    # request counts derived from the latency histogram
+    request_counts = by_name.get("http_request_duration_seconds", [])
+    if request_counts:
+        family("http_requests_total", "counter")
+        for labels, h in request_counts:
+            lines.append(f"http_requests_total{_labels(labels)} {h['count']}")
+
+    for name, series in by_name.items():
+        family(name, "histogram")
+        for labels, h in series:
+            cumulative = 0
+            for bound, count in zip(h["bounds"] + [float("inf")], h["counts"]):
+                cumulative += count
+                le = _labels(list(labels) + [("le", _number(bound))])
+                lines.append(f"{name}_bucket{le} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {_number(h['sum'])}")
+            lines.append(f"{name}_count{_labels(labels)} {h['count']}")
+
+    for kind, samples in (("counter", metrics["counters"]), ("gauge", metrics["gauges"])):
+        current = None
+        for (name, labels), value in sorted(samples.items()):
+            if name != current:
+                family(name, kind)
+                current = name
+            lines.append(f"{name}{_labels(labels)} {_number(value)}")
+
+    # hit ratio per cache, computed after summing hits/misses over workers
+    ratios = []
+    for (name, labels), hits in sorted(metrics["counters"].items()):
+        if name == "cache_hits_total":
+            total = hits + metrics["counters"].get(("cache_misses_total", labels), 0)
+            ratios.append((labels, hits / total if total else 0.0))
+    if ratios:
+        family("cache_hit_ratio", "gauge")
+        for labels, ratio in ratios:
+            lines.append(f"cache_hit_ratio{_labels(labels)} {_number(ratio)}")
+
+    return "\n".join(lines) + "\n"
+
+
+def exposition(registry: MetricsRegistry = METRICS) -> str:
+    """Text served by /metrics: this worker, or every worker when multiprocess."""
+    local = snapshot(registry)
+    if _store is None:
+        return render(aggregate([local]))
+    _store.write(local)
+    return render(aggregate(_store.read_all()))
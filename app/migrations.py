@@ -0,0 +1,154 @@
+# app/migrations.py
+"""
+Versioned schema migrations for the shop database.
+
+Each migration is an idempotent function of a Connection, applied in order
+inside its own transaction and recorded in the `schema_migrations` table,
+so it runs once per database (sqlite data.db or PostgreSQL).
+
+    python -m app.migrations            # apply pending migrations
+    python -m app.migrations current    # print the current version
+"""
+import logging
+import sys
+from datetime import datetime
+from typing import Callable, List, Tuple
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, exc, inspect, select
+from sqlalchemy.engine import Connection, Engine
+
+from app.database import Base, CatalogueSync, IdempotencyKey, OrderItem
+
+logger = logging.getLogger(__name__)
+
+_meta = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    _meta,
+    Column("version", Integer, primary_key=True),
+    Column("name", String(255), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+# -------------------------
+# Migrations
+# -------------------------
+
+
+def _create_tables(conn: Connection) -> None:
+    # creates missing tables (with their indexes); existing ones are untouched
+    Base.metadata.create_all(bind=conn)
+
+
+def _cart_and_order_indexes(conn: Connection) -> None:
+    # duplicate (cart_id, product_id) lines would break the unique index:
+    # fold their quantities into the oldest line first
+    conn.exec_driver_sql(
+        """
+        UPDATE cart_items SET quantity = (
+            SELECT SUM(c2.quantity) FROM cart_items c2
+            WHERE c2.cart_id = cart_items.cart_id
+              AND c2.product_id = cart_items.product_id
+        )
+        WHERE id IN (
+            SELECT MIN(id) FROM cart_items
+            GROUP BY cart_id, product_id HAVING COUNT(*) > 1
+        )
+        """
+    )
+    conn.exec_driver_sql(
+        """
+        DELETE FROM cart_items WHERE id NOT IN (
+            SELECT MIN(id) FROM cart_items GROUP BY cart_id, product_id
+        )
+        """
+    )
+    for ddl in (
+        "CREATE INDEX IF NOT EXISTS ix_carts_user_id ON carts (user_id)",
+        "CREATE INDEX IF NOT EXISTS ix_orders_user_id ON orders (user_id)",
+        "CREATE INDEX IF NOT EXISTS ix_cart_items_product_id ON cart_items (product_id)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_cart_items_cart_product "
+        "ON cart_items (cart_id, product_id)",
+    ):
+        conn.exec_driver_sql(ddl)
+
+
+def _idempotency_keys(conn: Connection) -> None:
+    IdempotencyKey.__table__.create(bind=conn, checkfirst=True)
+
+
+def _order_items_and_cents(conn: Connection) -> None:
+    OrderItem.__table__.create(bind=conn, checkfirst=True)
+    if "total_cents" not in {c["name"] for c in inspect(conn).get_columns("orders")}:
+        conn.exec_driver_sql("ALTER TABLE orders ADD COLUMN total_cents INTEGER")
+    conn.exec_driver_sql(
+        "UPDATE orders SET total_cents = CAST(ROUND(total * 100) AS INTEGER) "
+        "WHERE total_cents IS NULL"
+    )
+
+
+def _catalogue_sync(conn: Connection) -> None:
+    CatalogueSync.__table__.create(bind=conn, checkfirst=True)
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "create tables", _create_tables),
+    (2, "cart/order lookup indexes + unique cart line", _cart_and_order_indexes),
+    (3, "idempotency keys", _idempotency_keys),
+    (4, "order lines + totals in cents", _order_items_and_cents),
+    (5, "catalogue sync marker", _catalogue_sync),
+]
+
+
+# -------------------------
+# Runner
+# -------------------------
+
+
+def current_version(engine: Engine) -> int:
+    _meta.create_all(bind=engine)
+    with engine.connect() as conn:
+        versions = conn.execute(select(schema_migrations.c.version)).scalars().all()
+    return max(versions, default=0)
+
+
+def upgrade(engine: Engine) -> List[int]:
+    """Apply pending migrations; returns the versions applied by this call."""
+    _meta.create_all(bind=engine)
+    applied = []
+    for version, name, migrate in MIGRATIONS:
+        try:
+            with engine.begin() as conn:
+                if engine.dialect.name == "postgresql":
+                    # serialize concurrent workers migrating the same database
+                    conn.exec_driver_sql("SELECT pg_advisory_xact_lock(727274)")
+                done = conn.execute(
+                    select(schema_migrations.c.version).where(
+                        schema_migrations.c.version == version
+                    )
+                ).first()
+                if done:
+                    continue
+                migrate(conn)
+                conn.execute(
+                    schema_migrations.insert().values(
+                        version=version, name=name, applied_at=datetime.utcnow()
+                    )
+                )
+        except exc.IntegrityError:
+            # another worker recorded this version first; migrations are idempotent
+            continue
+        logger.info("Applied schema migration %s: %s", version, name)
+        applied.append(version)
+    return applied
+
+
+if __name__ == "__main__":
+    from app.database import engine
+
+    if sys.argv[1:] == ["current"]:
+        print(current_version(engine))
+    else:
+        print(f"applied: {upgrade(engine) or 'nothing'}")
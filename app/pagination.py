@@ -0,0 +1,174 @@
+# app/pagination.py
+import base64
+import binascii
+import csv
+import io
+import json
+from typing import Any, Callable, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 1000
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# Starlette appends "; charset=utf-8" to text/* types itself
+CSV_MEDIA_TYPE = "text/csv"
+
+
+# -------------------------
+# Opaque keyset cursors
+# -------------------------
+
+
+def encode_cursor(last_id: int) -> str:
+    """Opaque cursor pointing just past the row with id `last_id`."""
+    raw = json.dumps({"after": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[int]:
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        after = json.loads(base64.urlsafe_b64decode(padded))["after"]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(after, int):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return after
+
+
+def after_cursor(stmt, id_column, cursor: Optional[str], descending: bool = False):
+    """Restrict a select()/Query to rows after `cursor`, ordered by `id_column`."""
+    after = decode_cursor(cursor)
+    if after is not None:
+        stmt = stmt.where(id_column < after if descending else id_column > after)
+    return stmt.order_by(id_column.desc() if descending else id_column)
+
+
+def keyset_page(
+    query,
+    id_column,
+    cursor: Optional[str],
+    limit: int,
+    descending: bool = False,
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    One page of `query` ordered by `id_column`, starting after `cursor`.
+    Fetches limit + 1 rows to know whether a next page exists, so it costs
+    one indexed range scan no matter how deep the page is.
+    """
+    query = after_cursor(query, id_column, cursor, descending)
+    rows = query.limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].id)
+    return rows, next_cursor
+
+
+def set_next_cursor(request: Request, response: Response, next_cursor: Optional[str]) -> None:
+    """
+    Expose the next page as headers so list bodies stay plain JSON arrays:
+    `X-Next-Cursor: <cursor>` and `Link: <url>; rel="next"`.
+    """
+    if next_cursor is None:
+        return
+    url = request.url.include_query_params(cursor=next_cursor)
+    response.headers["X-Next-Cursor"] = next_cursor
+    response.headers["Link"] = f'<{url}>; rel="next"'
+
+
+# -------------------------
+# Sparse fieldsets (?fields=title,price)
+# -------------------------
+
+
+def parse_fields(value: Optional[str], allowed: Sequence[str]) -> Optional[Tuple[str, ...]]:
+    """
+    The fields requested by a comma-separated `fields` parameter, in
+    `allowed` order and without duplicates (so equal selections share a
+    cache key); None when absent = every field. 400 for an unknown field.
+    """
+    if value is None:
+        return None
+    requested = {name.strip() for name in value.split(",") if name.strip()}
+    unknown = requested.difference(allowed)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown field(s): {', '.join(sorted(unknown))}; choose from {', '.join(allowed)}",
+        )
+    if not requested:
+        raise HTTPException(status_code=400, detail="fields must name at least one field")
+    return tuple(name for name in allowed if name in requested)
+
+
+def project(items: Iterable[Mapping], fields: Optional[Sequence[str]]) -> List[Any]:
+    """`items` reduced to `fields` (missing keys stay missing); all of each when None."""
+    if fields is None:
+        return list(items)
+    return [{name: item[name] for name in fields if name in item} for item in items]
+
+
+# -------------------------
+# NDJSON streaming
+# -------------------------
+
+
+def ndjson_lines(rows: Iterable[Any], to_dict: Callable[[Any], dict]) -> Iterator[bytes]:
+    for row in rows:
+        yield json.dumps(to_dict(row), default=str).encode() + b"\n"
+
+
+def ndjson_response(
+    open_session: Callable,
+    statement,
+    to_dict: Callable[[Any], dict] = lambda row: dict(row._mapping),
+) -> StreamingResponse:
+    """
+    Stream every row of `statement` as NDJSON.
+
+    The stream opens its own session (the request's session may already be
+    closed while the body is sent) and reads rows with yield_per, so memory
+    stays flat however many rows are exported.
+    """
+
+    def generate() -> Iterator[bytes]:
+        with open_session() as db:
+            result = db.execute(
+                statement.execution_options(yield_per=STREAM_BATCH_SIZE)
+            )
+            yield from ndjson_lines(result, to_dict)
+
+    return StreamingResponse(generate(), media_type=NDJSON_MEDIA_TYPE)
+
+
+def csv_response(open_session: Callable, statement) -> StreamingResponse:
+    """
+    Stream every row of `statement` as CSV with a header row (the selected
+    column names), in STREAM_BATCH_SIZE batches like ndjson_response.
+    """
+
+    def generate() -> Iterator[bytes]:
+        with open_session() as db:
+            result = db.execute(
+                statement.execution_options(yield_per=STREAM_BATCH_SIZE)
+            )
+            buffer = io.StringIO()
+            writer = csv.writer(buffer, lineterminator="\n")
+            writer.writerow(result.keys())
+            for rows in result.partitions():
+                writer.writerows(rows)
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+            if buffer.tell():
+                yield buffer.getvalue().encode()
+
+    return StreamingResponse(generate(), media_type=CSV_MEDIA_TYPE)
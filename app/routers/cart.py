@@ -1,155 +1,271 @@
 # app/routers/cart.py
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-import requests
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session, selectinload
 
 from app.database import (
-    get_db,
+    get_request_db,
+    run_db,
     Cart as CartModel,
     CartItem as CartItemModel,
     Product as ProductModel,
     User as UserModel,
 )
+from app import serializers
 from app.schemas import Cart, CartItemBase
-from app.logging_config import logger
+from app.services.cache import CART_CACHE
+from app.services.external_products import current_catalogue
+from app.db_pool import dialect_insert
+from app.services.product_store import (
+    PRODUCT_CACHE,
+    fetch_remote_product,
+    upsert_products,
+)
 
-router = APIRouter(tags=["Cart"])
+FAST_JSON = serializers.FastJSON("cart")
+router = APIRouter(tags=["Cart"], default_response_class=FAST_JSON.response_class)
+logger = logging.getLogger(__name__)
 
-FAKESTORE_BASE_URL = "https://fakestoreapi.com"
+MAX_BATCH_ITEMS = 500
 
 
 def _get_or_create_cart_for_user(db: Session, user_id: int) -> CartModel:
     """Return an existing cart for a user or create a new one."""
-    logger.info(f"Getting or creating cart for user {user_id}")
+    logger.info("Getting or creating cart for user %s", user_id)
 
     cart = db.query(CartModel).filter(CartModel.user_id == user_id).first()
     if cart:
-        logger.info(f"Found existing cart {cart.id} for user {user_id}")
+        logger.info("Found existing cart %s for user %s", cart.id, user_id)
         return cart
 
     # Make sure the user exists
     user = db.query(UserModel).filter(UserModel.id == user_id).first()
     if not user:
-        logger.warning(f"Tried to create cart for non-existent user {user_id}")
+        logger.warning("Tried to create cart for non-existent user %s", user_id)
         raise HTTPException(status_code=404, detail="User not found")
 
     cart = CartModel(user_id=user_id)
     db.add(cart)
     db.commit()
     db.refresh(cart)
-    logger.info(f"Created new cart {cart.id} for user {user_id}")
+    logger.info("Created new cart %s for user %s", cart.id, user_id)
     return cart
 
 
-def _ensure_product_in_db(db: Session, product_id: int) -> ProductModel:
+def _get_local_products(db: Session, product_ids: List[int]) -> List[dict]:
+    """Product rows among `product_ids` already stored locally, in one query."""
+    rows = db.query(
+        ProductModel.id,
+        ProductModel.title,
+        ProductModel.description,
+        ProductModel.price,
+    ).filter(ProductModel.id.in_(product_ids))
+    return [dict(row._mapping) for row in rows]
+
+
+async def _ensure_products_in_db(db: Session, product_ids: List[int]) -> None:
     """
-    Ensure a Product row exists locally for the given FakeStore product id.
-    If not, fetch from FakeStore API and insert.
+    Ensure Product rows exist locally for all the given product ids.
+    Checks the in-process cache, then the DB (one query for all ids);
+    missing rows come from the in-memory catalogue, or FakeStore API as a
+    last resort, and are written with one bulk upsert.
     """
-    logger.info(f"Ensuring product {product_id} exists in local DB")
-
-    product = db.query(ProductModel).filter(ProductModel.id == product_id).first()
-    if product:
-        logger.info(f"Product {product_id} already exists locally")
-        return product
-
-    # Fetch from FakeStore
-    try:
-        resp = requests.get(f"{FAKESTORE_BASE_URL}/products/{product_id}", timeout=10)
-        resp.raise_for_status()
-    except requests.RequestException as e:
-        logger.error(f"Failed to fetch product {product_id} from FakeStore: {e}")
-        raise HTTPException(
-            status_code=502,
-            detail="Could not fetch product details from FakeStore API",
-        )
+    missing = set(product_ids) - set(PRODUCT_CACHE.get_many(product_ids))
+    if not missing:
+        return
+
+    logger.info("Ensuring products %s exist in local DB", sorted(missing))
+    local = await run_db(db, _get_local_products, list(missing))
+    PRODUCT_CACHE.put_many(local)
+    missing -= {row["id"] for row in local}
+    if not missing:
+        return
+
+    catalogue = current_catalogue()
+    products = [catalogue.get(pid) for pid in missing if catalogue.get(pid)]
+    remote = [pid for pid in missing if catalogue.get(pid) is None]
+    products += await asyncio.gather(*(fetch_remote_product(pid) for pid in remote))
+    await run_db(db, upsert_products, products)
+    logger.info("Stored products %s locally", sorted(missing))
+
+
+async def _ensure_product_in_db(db: Session, product_id: int) -> None:
+    """Ensure a Product row exists locally for the given product id."""
+    await _ensure_products_in_db(db, [product_id])
+
+
+def _load_cart(db: Session, cart_id: int) -> Optional[CartModel]:
+    """Load a cart with all its items in two statements, whatever its size."""
+    return (
+        db.query(CartModel)
+        .options(selectinload(CartModel.items))
+        .filter(CartModel.id == cart_id)
+        .populate_existing()
+        .first()
+    )
+
+
+def _cache_cart(cart: CartModel) -> Cart:
+    result = serializers.cart(cart)
+    CART_CACHE.set(result.id, result.dict())
+    return result
+
 
-    data = resp.json()
-    product = ProductModel(
-        id=data["id"],
-        title=data.get("title", f"Product {product_id}"),
-        description=data.get("description"),
-        price=float(data.get("price", 0.0)),
+def _create_or_get_cart(db: Session, user_id: int) -> Cart:
+    cart = _get_or_create_cart_for_user(db, user_id)
+    return _cache_cart(_load_cart(db, cart.id))
+
+
+def _get_cart(db: Session, cart_id: int) -> Cart:
+    cached = CART_CACHE.get(cart_id)
+    if cached is not None:
+        return serializers.cart_from_dict(cached)
+    cart = _load_cart(db, cart_id)
+    if not cart:
+        logger.warning("Cart %s not found", cart_id)
+        raise HTTPException(status_code=404, detail="Cart not found")
+    return _cache_cart(cart)
+
+
+def _check_cart_exists(db: Session, cart_id: int) -> None:
+    cart = db.query(CartModel).filter(CartModel.id == cart_id).first()
+    if not cart:
+        logger.warning("Attempt to add item to non-existent cart %s", cart_id)
+        raise HTTPException(status_code=404, detail="Cart not found")
+
+
+def _upsert_lines(db: Session, cart_id: int, quantities: Dict[int, int]) -> None:
+    """
+    INSERT ... ON CONFLICT (cart_id, product_id) DO UPDATE adding the
+    quantities, as one executemany (sqlite / PostgreSQL).
+    """
+    insert = dialect_insert(db.get_bind().dialect.name)
+    stmt = insert(CartItemModel)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CartItemModel.cart_id, CartItemModel.product_id],
+        set_={"quantity": CartItemModel.quantity + stmt.excluded.quantity},
+    )
+    db.execute(
+        stmt,
+        [
+            {"cart_id": cart_id, "product_id": product_id, "quantity": quantity}
+            for product_id, quantity in quantities.items()
+        ],
     )
-    db.add(product)
+
+
+def _merge_lines(db: Session, cart_id: int, quantities: Dict[int, int]) -> None:
+    """Portable fallback: one SELECT, then one bulk UPDATE and one bulk INSERT."""
+    existing = db.query(
+        CartItemModel.id,
+        CartItemModel.product_id,
+        CartItemModel.quantity,
+    ).filter(
+        CartItemModel.cart_id == cart_id,
+        CartItemModel.product_id.in_(list(quantities)),
+    )
+    remaining = dict(quantities)
+    updates = [
+        {"id": line_id, "quantity": quantity + remaining.pop(product_id)}
+        for line_id, product_id, quantity in existing.all()
+    ]
+    inserts = [
+        {"cart_id": cart_id, "product_id": product_id, "quantity": quantity}
+        for product_id, quantity in remaining.items()
+    ]
+    if updates:
+        db.execute(update(CartItemModel), updates)
+    if inserts:
+        db.execute(insert(CartItemModel), inserts)
+
+
+def _add_items(db: Session, cart_id: int, items: List[CartItemBase]) -> Cart:
+    """
+    Merge items into a cart in one transaction. Quantities for the same
+    product are summed, then every line is upserted on the unique
+    (cart_id, product_id) index.
+    """
+    quantities: Dict[int, int] = {}
+    for item in items:
+        quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+
+    if db.get_bind().dialect.name in {"sqlite", "postgresql"}:
+        _upsert_lines(db, cart_id, quantities)
+    else:
+        _merge_lines(db, cart_id, quantities)
     db.commit()
-    db.refresh(product)
-    logger.info(f"Stored product {product_id} locally")
-    return product
+    logger.info("Cart %s: merged %s line(s)", cart_id, len(quantities))
+    # invalidate, don't write back: a concurrent writer's newer cart could
+    # be cached already, and this copy may be older; the next read refills
+    CART_CACHE.delete(cart_id)
+    return serializers.cart(_load_cart(db, cart_id))
 
 
 @router.post("/{user_id}", response_model=Cart)
-def create_or_get_cart(user_id: int, db: Session = Depends(get_db)):
+async def create_or_get_cart(user_id: int, db: Session = Depends(get_request_db)):
     """
     Create a cart for a user if none exists, otherwise return the existing one.
     """
-    logger.info(f"Request to create/get cart for user {user_id}")
-    cart = _get_or_create_cart_for_user(db, user_id)
-    return cart
+    logger.info("Request to create/get cart for user %s", user_id)
+    return FAST_JSON.respond(await run_db(db, _create_or_get_cart, user_id))
 
 
 @router.get("/{cart_id}", response_model=Cart)
-def get_cart(cart_id: int, db: Session = Depends(get_db)):
+async def get_cart(cart_id: int, db: Session = Depends(get_request_db)):
     """
     Fetch a cart and its items by id.
     """
-    logger.info(f"Retrieving cart {cart_id}")
-    cart = db.query(CartModel).filter(CartModel.id == cart_id).first()
-    if not cart:
-        logger.warning(f"Cart {cart_id} not found")
-        raise HTTPException(status_code=404, detail="Cart not found")
-    return cart
+    logger.info("Retrieving cart %s", cart_id)
+    return FAST_JSON.respond(await run_db(db, _get_cart, cart_id))
 
 
 @router.post("/{cart_id}/items", response_model=Cart)
-def add_item_to_cart(
+async def add_item_to_cart(
     cart_id: int,
     item: CartItemBase,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_request_db),
 ):
     """
     Add or update a cart item.
     Body: { "product_id": int, "quantity": int }
     """
     logger.info(
-        f"Adding product {item.product_id} (qty {item.quantity}) to cart {cart_id}"
+        "Adding product %s (qty %s) to cart %s", item.product_id, item.quantity, cart_id
     )
 
-    cart = db.query(CartModel).filter(CartModel.id == cart_id).first()
-    if not cart:
-        logger.warning(f"Attempt to add item to non-existent cart {cart_id}")
-        raise HTTPException(status_code=404, detail="Cart not found")
+    await run_db(db, _check_cart_exists, cart_id)
 
-    # Ensure the product exists locally, backed by FakeStore API
-    _ensure_product_in_db(db, item.product_id)
+    # Ensure the product exists locally (cache -> DB -> catalogue -> FakeStore)
+    await _ensure_product_in_db(db, item.product_id)
 
-    cart_item = (
-        db.query(CartItemModel)
-        .filter(
-            CartItemModel.cart_id == cart_id,
-            CartItemModel.product_id == item.product_id,
-        )
-        .first()
-    )
+    return FAST_JSON.respond(await run_db(db, _add_items, cart_id, [item]))
 
-    if cart_item:
-        cart_item.quantity += item.quantity
-        logger.info(
-            f"Updated cart_item {cart_item.id}: product {item.product_id}, "
-            f"new quantity {cart_item.quantity}"
-        )
-    else:
-        cart_item = CartItemModel(
-            cart_id=cart_id,
-            product_id=item.product_id,
-            quantity=item.quantity,
-        )
-        db.add(cart_item)
-        logger.info(
-            f"Created new cart_item for cart {cart_id}, "
-            f"product {item.product_id}, quantity {item.quantity}"
+
+@router.post("/{cart_id}/items/batch", response_model=Cart)
+async def add_items_to_cart(
+    cart_id: int,
+    items: List[CartItemBase],
+    db: Session = Depends(get_request_db),
+):
+    """
+    Add or update several cart items at once, e.g. when restoring a saved cart.
+    Body: [ { "product_id": int, "quantity": int }, ... ]
+    """
+    logger.info("Adding %s item(s) to cart %s", len(items), cart_id)
+    if len(items) > MAX_BATCH_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_BATCH_ITEMS} items per batch",
         )
 
-    db.commit()
-    db.refresh(cart)
-    return cart
+    await run_db(db, _check_cart_exists, cart_id)
+    if not items:
+        return FAST_JSON.respond(await run_db(db, _get_cart, cart_id))
+
+    await _ensure_products_in_db(db, [item.product_id for item in items])
+
+    return FAST_JSON.respond(await run_db(db, _add_items, cart_id, items))
@@ -1,68 +1,277 @@
 # app/routers/orders.py
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+import logging
+from typing import Optional, Tuple, Union
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from sqlalchemy import Integer, cast, delete, func, insert, literal, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload, load_only
 
 from app.database import (
-    get_db,
+    SessionLocal,
+    begin_write,
+    get_request_db,
+    run_db,
     Order as OrderModel,
+    OrderItem as OrderItemModel,
     Cart as CartModel,
     CartItem as CartItemModel,
+    Product as ProductModel,
     User as UserModel,
 )
-from app.schemas import Order
-from app.logging_config import logger
+from app import serializers
+from app.schemas import Order, OrderWithItems
+from app.services import idempotency
+from app.services.cache import CART_CACHE
+from app.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    after_cursor,
+    keyset_page,
+    ndjson_response,
+    parse_fields,
+    set_next_cursor,
+)
 
-router = APIRouter(tags=["Orders"])
+FAST_JSON = serializers.FastJSON("orders")
+router = APIRouter(tags=["Orders"], default_response_class=FAST_JSON.response_class)
+logger = logging.getLogger(__name__)
 
+# unit price in integer cents; product prices are stored as floats
+UNIT_PRICE_CENTS = cast(func.round(ProductModel.price * 100), Integer)
 
-@router.post("/{user_id}", response_model=Order)
-def create_order(user_id: int, db: Session = Depends(get_db)):
+# what ?fields= can select on order listings ("items" needs items=true)
+ORDER_FIELDS = ("id", "total", "total_cents")
+
+
+def _place_order(db: Session, user_id: int) -> Tuple[OrderModel, int]:
     """
-    Create an order for a user. The order total is computed based on their cart.
+    Order the user's cart and empty it, inside the caller's locked
+    transaction (flushed, not committed). Returns the order and cart id.
     """
-    logger.info(f"Creating order for user {user_id}")
-
-    user = db.query(UserModel).filter(UserModel.id == user_id).first()
-    if not user:
-        logger.warning(f"Order creation failed: user {user_id} not found")
+    # the cart row stays locked until commit (FOR UPDATE; a no-op on sqlite,
+    # where begin_write() already holds the write lock)
+    cart_id = db.execute(
+        select(CartModel.id)
+        .where(CartModel.user_id == user_id)
+        .order_by(CartModel.id)
+        .limit(1)
+        .with_for_update()
+    ).scalar()
+    if cart_id is None and db.get(UserModel, user_id) is None:
+        logger.warning("Order creation failed: user %s not found", user_id)
         raise HTTPException(status_code=404, detail="User not found")
 
-    cart = db.query(CartModel).filter(CartModel.user_id == user_id).first()
-    if not cart or not cart.items:
-        logger.warning(f"Order creation failed: cart for user {user_id} is empty")
+    # Calculate total price in SQL (exact, in cents) instead of loading every item + product
+    total_cents, item_count = None, 0
+    if cart_id is not None:
+        total_cents, item_count = db.execute(
+            select(
+                func.sum(UNIT_PRICE_CENTS * CartItemModel.quantity),
+                func.count(CartItemModel.id),
+            )
+            .join(ProductModel, ProductModel.id == CartItemModel.product_id)
+            .where(CartItemModel.cart_id == cart_id)
+        ).one()
+    if not item_count:
+        logger.warning("Order creation failed: cart for user %s is empty", user_id)
         raise HTTPException(status_code=400, detail="Cart is empty")
-
-    # Calculate total price
-    total = sum(item.product.price * item.quantity for item in cart.items)
-    logger.info(f"Calculated order total {total} for user {user_id}")
+    logger.info("Calculated order total %s cents for user %s", total_cents, user_id)
 
     # Create the order
-    order = OrderModel(user_id=user_id, total=total)
+    order = OrderModel(user_id=user_id, total=total_cents / 100, total_cents=total_cents)
     db.add(order)
+    db.flush()  # assigns order.id
 
-    # Clear cart after ordering
-    for item in list(cart.items):
-        db.delete(item)
+    # Snapshot the lines with one INSERT ... SELECT, whatever the cart size
+    db.execute(
+        insert(OrderItemModel).from_select(
+            ["order_id", "product_id", "title", "quantity", "unit_price_cents"],
+            select(
+                literal(order.id, Integer),
+                CartItemModel.product_id,
+                ProductModel.title,
+                CartItemModel.quantity,
+                UNIT_PRICE_CENTS,
+            )
+            .join(ProductModel, ProductModel.id == CartItemModel.product_id)
+            .where(CartItemModel.cart_id == cart_id)
+            .order_by(CartItemModel.id),
+        )
+    )
 
-    db.commit()
-    db.refresh(order)
+    # Clear cart after ordering: one DELETE for all items
+    db.execute(
+        delete(CartItemModel)
+        .where(CartItemModel.cart_id == cart_id)
+        .execution_options(synchronize_session=False)
+    )
+    return order, cart_id
 
-    logger.info(f"Order {order.id} created for user {user_id}")
+
+def _create_order(db: Session, user_id: int) -> Order:
+    """
+    Checkout as one locked transaction, so concurrent checkouts of the same
+    cart cannot both order it: the second one waits, then finds it empty.
+    """
+    begin_write(db)
+    try:
+        order, cart_id = _place_order(db, user_id)
+        order = serializers.order(order)
+        db.commit()
+    except Exception:
+        db.rollback()  # release the lock before the error response
+        raise
+    CART_CACHE.delete(cart_id)
+    logger.info("Order %s created for user %s", order.id, user_id)
     return order
 
 
-@router.get("/{order_id}", response_model=Order)
-def get_order(order_id: int, db: Session = Depends(get_db)):
-    logger.info(f"Fetching order {order_id}")
+def _create_order_once(db: Session, user_id: int, key: str, request: str) -> Tuple[int, str, bool]:
+    """
+    Checkout under an Idempotency-Key: (status_code, body, replayed).
+
+    Retries of a completed request are answered from the stored response
+    without locking anything; a retry racing the original waits on the
+    key's lock (idempotency.claim), then finds the response it stored.
+    """
+    stored = idempotency.lookup(db, key, request)
+    if stored is not None:
+        return (*stored, True)
 
+    begin_write(db)
+    try:
+        # begin_write only locks on sqlite; the key lock holds on every database
+        idempotency.claim(db, key, request)
+        stored = idempotency.lookup(db, key, request)
+        if stored is not None:
+            db.rollback()
+            return (*stored, True)
+        order, cart_id = _place_order(db, user_id)
+        body = serializers.dumps(serializers.order(order)).decode()
+        idempotency.remember(db, key, request, 200, body)
+        db.commit()
+    except IntegrityError:
+        # same key claimed concurrently on a database without ON CONFLICT
+        db.rollback()
+        stored = idempotency.lookup(db, key, request)
+        if stored is None:
+            raise
+        return (*stored, True)
+    except Exception:
+        db.rollback()
+        raise
+    CART_CACHE.delete(cart_id)
+    logger.info("Order created for user %s (Idempotency-Key %s)", user_id, key)
+    return 200, body, False
+
+
+def _get_order(db: Session, order_id: int) -> Order:
     order = db.query(OrderModel).filter(OrderModel.id == order_id).first()
     if not order:
-        logger.warning(f"Order {order_id} not found")
+        logger.warning("Order %s not found", order_id)
         raise HTTPException(status_code=404, detail="Order not found")
-    return order
+    return serializers.order(order)
+
 
+def _get_orders_for_user(
+    db: Session,
+    user_id: int,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    with_items: bool = False,
+    fields: Optional[Tuple[str, ...]] = None,
+):
+    """
+    One page of a user's orders. With `fields` (from parse_fields) only
+    those columns are selected and each order is a dict of just them.
+    """
+    with_items = with_items and (fields is None or "items" in fields)
+    if fields is not None and not with_items:
+        # the id is selected anyway: the next cursor points past it
+        columns = [OrderModel.id] + [getattr(OrderModel, name) for name in fields if name != "id"]
+        query = db.query(*columns).filter(OrderModel.user_id == user_id)
+        rows, next_cursor = keyset_page(query, OrderModel.id, cursor, limit)
+        return [{name: getattr(row, name) for name in fields} for row in rows], next_cursor
+
+    query = db.query(OrderModel).filter(OrderModel.user_id == user_id)
+    if with_items:
+        # orders + lines in one query (LIMIT applies to orders, not joined rows)
+        query = query.options(joinedload(OrderModel.items))
+    if fields is not None:
+        columns = [getattr(OrderModel, name) for name in fields if name not in ("id", "items")]
+        query = query.options(load_only(OrderModel.id, *columns))
+    orders, next_cursor = keyset_page(query, OrderModel.id, cursor, limit)
+    serialize = serializers.order_with_items if with_items else serializers.order
+    if fields is None:
+        return [serialize(o) for o in orders], next_cursor
+    return [
+        {
+            name: [serializers.order_item(line) for line in o.items] if name == "items" else getattr(o, name)
+            for name in fields
+        }
+        for o in orders
+    ], next_cursor
+
+
+@router.post("/{user_id}", response_model=Order)
+async def create_order(
+    user_id: int,
+    request: Request,
+    idempotency_key: Optional[str] = Header(None, min_length=1, max_length=255),
+    db: Session = Depends(get_request_db),
+):
+    """
+    Create an order for a user. The order total is computed based on their cart.
+
+    Send an Idempotency-Key header to make retries safe: repeating the
+    request with the same key returns the first response (marked with
+    Idempotent-Replayed: true) instead of ordering again.
+    """
+    logger.info("Creating order for user %s", user_id)
+    if idempotency_key is None:
+        return FAST_JSON.respond(await run_db(db, _create_order, user_id))
+
+    status_code, body, replayed = await run_db(
+        db, _create_order_once, user_id, idempotency_key, f"POST {request.url.path}"
+    )
+    headers = {"Idempotent-Replayed": "true"} if replayed else None
+    return Response(body, status_code=status_code, media_type="application/json", headers=headers)
+
+
+@router.get("/{order_id}", response_model=Order)
+async def get_order(order_id: int, db: Session = Depends(get_request_db)):
+    logger.info("Fetching order %s", order_id)
+    return FAST_JSON.respond(await run_db(db, _get_order, order_id))
+
+
+@router.get("/user/{user_id}", response_model=Union[list[OrderWithItems], list[Order]])
+async def get_orders_for_user(
+    user_id: int,
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    items: bool = False,
+    output: str = Query("json", alias="format", regex="^(json|ndjson)$"),
+    fields: Optional[str] = Query(None, description="Comma-separated order fields, e.g. id,total"),
+    db: Session = Depends(get_request_db),
+):
+    """
+    A user's orders by id, one page at a time (next cursor in the
+    X-Next-Cursor / Link headers), or all of them as NDJSON.
+    `items=true` adds each order's lines to the JSON pages; `fields`
+    selects only those columns (id, total, total_cents, items).
+    """
+    logger.info("Listing orders for user %s", user_id)
+    if output == "ndjson":
+        selected = parse_fields(fields, ORDER_FIELDS) or ORDER_FIELDS
+        stmt = select(*[getattr(OrderModel, name) for name in selected]).where(
+            OrderModel.user_id == user_id
+        )
+        return ndjson_response(SessionLocal, after_cursor(stmt, OrderModel.id, cursor))
 
-@router.get("/user/{user_id}", response_model=list[Order])
-def get_orders_for_user(user_id: int, db: Session = Depends(get_db)):
-    logger.info(f"Listing orders for user {user_id}")
-    return db.query(OrderModel).filter(OrderModel.user_id == user_id).all()
+    selected = parse_fields(fields, ORDER_FIELDS + ("items",) if items else ORDER_FIELDS)
+    orders, next_cursor = await run_db(db, _get_orders_for_user, user_id, cursor, limit, items, selected)
+    set_next_cursor(request, response, next_cursor)
+    return FAST_JSON.respond(orders, response, partial=selected is not None)
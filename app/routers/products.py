@@ -1,199 +1,84 @@
 # app/routers/products.py
-from fastapi import APIRouter
-from typing import List
+from fastapi import APIRouter, HTTPException, Query, Request
+from typing import List, Optional
 
-router = APIRouter()
-
-# ------------------------------------------------------------------
-# Static product catalogue – under YOUR control, no external API.
-# You can tweak titles / prices / images until the UI looks perfect.
-# ------------------------------------------------------------------
-PRODUCTS = [
-    # ----------------- ELECTRONICS -----------------
-    {
-        "id": 1,
-        "title": "WD 2TB Elements Portable External Hard Drive - USB 3.0",
-        "price": 64.00,
-        "description": "USB 3.0 and USB 2.0 compatibility. Fast data transfers and high capacity.",
-        "category": "electronics",
-        "image": "/images/electronics-1.png",
-    },
-    {
-        "id": 2,
-        "title": "SanDisk SSD PLUS 1TB Internal SSD - SATA III 6 Gb/s",
-        "price": 109.00,
-        "description": "Easy upgrade for faster boot-up, shutdown, and application response.",
-        "category": "electronics",
-        "image": "/images/electronics-2.png",
-    },
-    {
-        "id": 3,
-        "title": "Silicon Power 256GB SSD 3D NAND A55",
-        "price": 109.00,
-        "description": "High transfer speeds and reliable performance.",
-        "category": "electronics",
-        "image": "/images/electronics-3.png",
-    },
-    {
-        "id": 4,
-        "title": "WD 4TB Gaming Drive Works with Playstation 4",
-        "price": 114.00,
-        "description": "Expand your PS4 gaming experience with high-capacity storage.",
-        "category": "electronics",
-        "image": "/images/electronics-4.png",
-    },
-    {
-        "id": 5,
-        "title": "Acer SB220Q 21.5-inch Full HD Monitor",
-        "price": 599.00,
-        "description": "IPS display, ultra-thin design, great for work and play.",
-        "category": "electronics",
-        "image": "/images/electronics-5.png",
-    },
-    {
-        "id": 6,
-        "title": "Samsung 49-Inch CHG90 144Hz Ultrawide Gaming Monitor",
-        "price": 999.99,
-        "description": "Super ultrawide QLED gaming monitor with immersive performance.",
-        "category": "electronics",
-        "image": "/images/electronics-6.png",
-    },
-
-    # ----------------- JEWELERY -----------------
-    {
-        "id": 7,
-        "title": "John Hardy Women's Legends Naga Gold & Silver Dragon Bracelet",
-        "price": 695.00,
-        "description": "Inspired by the mythical water dragon—symbol of protection.",
-        "category": "jewelery",
-        "image": "/images/jewelery-1.png",
-    },
-    {
-        "id": 8,
-        "title": "Solid Gold Petite Micropave Ring",
-        "price": 168.00,
-        "description": "Classic, elegant design with brilliant finish.",
-        "category": "jewelery",
-        "image": "/images/jewelery-2.png",
-    },
-    {
-        "id": 9,
-        "title": "White Gold Plated Princess Ring",
-        "price": 9.99,
-        "description": "Engagement-style solitaire ring at an affordable price.",
-        "category": "jewelery",
-        "image": "/images/jewelery-3.png",
-    },
-    {
-        "id": 10,
-        "title": "Pierced Owl Rose Gold Stainless Steel Earrings",
-        "price": 10.99,
-        "description": "Rose gold-plated stainless steel double flare plugs.",
-        "category": "jewelery",
-        "image": "/images/jewelery-4.png",
-    },
+from app.metrics import register_cache
+from app.pagination import parse_fields, project
+from app.serializers import FastJSONResponse
+from app.services.external_products import PRODUCT_FIELDS, current_catalogue, search_products
+from app.services.response_cache import ResponseCache
 
-    # ----------------- MEN'S CLOTHING -----------------
-    {
-        "id": 11,
-        "title": "Fjallraven - Foldpack No.1 Backpack",
-        "price": 109.95,
-        "description": "Perfect for everyday carry with a stylish and durable build.",
-        "category": "men's clothing",
-        "image": "/images/mens-1.png",
-    },
-    {
-        "id": 12,
-        "title": "Men's Casual Premium Slim Fit T-Shirt",
-        "price": 22.30,
-        "description": "Slim-fit style with soft, comfortable fabric.",
-        "category": "men's clothing",
-        "image": "/images/mens-2.png",
-    },
-    {
-        "id": 13,
-        "title": "Men's Cotton Jacket",
-        "price": 55.99,
-        "description": "Great outerwear jacket for versatile outdoor use.",
-        "category": "men's clothing",
-        "image": "/images/mens-3.png",
-    },
-    {
-        "id": 14,
-        "title": "Men's Casual Slim Fit Long Sleeve",
-        "price": 15.99,
-        "description": "Soft and warm, ideal for cooler weather.",
-        "category": "men's clothing",
-        "image": "/images/mens-4.png",
-    },
+router = APIRouter()
 
-    # ----------------- WOMEN'S CLOTHING -----------------
-    {
-        "id": 15,
-        "title": "BIYLACLESEN Women's 3-in-1 Snowboard Jacket",
-        "price": 56.99,
-        "description": "Warm, waterproof jacket suitable for winter sports.",
-        "category": "women's clothing",
-        "image": "/images/womens-1.png",
-    },
-    {
-        "id": 16,
-        "title": "Lock and Love Women's Faux Leather Moto Jacket",
-        "price": 29.95,
-        "description": "Faux leather moto jacket with removable hood.",
-        "category": "women's clothing",
-        "image": "/images/womens-2.png",
-    },
-    {
-        "id": 17,
-        "title": "Women's Windbreaker Raincoat",
-        "price": 39.99,
-        "description": "Lightweight rain jacket perfect for outdoor activities.",
-        "category": "women's clothing",
-        "image": "/images/womens-3.png",
-    },
-    {
-        "id": 18,
-        "title": "MBJ Women's Solid Short Sleeve Boat Neck Tee",
-        "price": 9.85,
-        "description": "Soft and breathable everyday top.",
-        "category": "women's clothing",
-        "image": "/images/womens-4.png",
-    },
-    {
-        "id": 19,
-        "title": "Opna Women's Short Sleeve Moisture-Wicking Shirt",
-        "price": 7.95,
-        "description": "Moisture-wicking interlock fabric great for workouts.",
-        "category": "women's clothing",
-        "image": "/images/womens-5.png",
-    },
-    {
-        "id": 20,
-        "title": "DANVOUY Women's T-Shirt Casual Cotton Top",
-        "price": 12.99,
-        "description": "Soft cotton t-shirt with a flattering fit.",
-        "category": "women's clothing",
-        "image": "/images/womens-6.png",
-    },
-]
+# The product catalogue lives in CATALOGUE_FILE (app/data/catalogue.json)
+# and is reloaded when that file changes; each request reads
+# current_catalogue() once and uses that snapshot throughout.
 
-# The four categories your frontend expects
-CATEGORIES = ["electronics", "jewelery", "men's clothing", "women's clothing"]
+# Rendered JSON bodies + ETags, keyed per catalogue version
+RESPONSES = ResponseCache()
+register_cache("product_responses", RESPONSES)
 
 
 @router.get("/categories", response_model=List[str])
-def list_categories():
+def list_categories(request: Request):
     """
-    Return the fixed list of categories.
+    Return the catalogue's categories.
     """
-    return CATEGORIES
+    catalogue = current_catalogue()
+    return RESPONSES.response(
+        request, "categories", catalogue.version, lambda: list(catalogue.categories)
+    )
 
 
 @router.get("/category/{category}")
-def get_products_by_category(category: str):
+def get_products_by_category(
+    category: str,
+    request: Request,
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    sort: Optional[str] = Query(None, regex="^-?(price|id)$"),
+    currency: Optional[str] = Query(None, min_length=3, max_length=3),
+    fields: Optional[str] = Query(None, description="Comma-separated product fields, e.g. title,price,image"),
+):
     """
     Return all products for a given category.
     Always 200 OK. If category is unknown, returns [].
+
+    `min_price` / `max_price` (inclusive), `sort` (price, -price, id, -id)
+    and `currency` (prices converted from the catalogue's) are applied on
+    the catalogue's price columns; 400 for an unsupported currency.
+    `fields` returns only those fields of each product.
+    """
+    selected = parse_fields(fields, PRODUCT_FIELDS)
+    catalogue = current_catalogue()
+    # unknown categories share one cache entry so the cache stays bounded
+    key = category if category in catalogue.categories else ""
+    if (min_price, max_price, sort, currency) != (None, None, None, None):
+        try:
+            products = catalogue.listing(key, min_price, max_price, sort, currency)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return FastJSONResponse(project(products, selected))
+    return RESPONSES.response(
+        request,
+        ("category", key, selected),
+        catalogue.version,
+        lambda: project(catalogue.by_category(key), selected),
+    )
+
+
+@router.get("/search")
+def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    prefix: bool = True,
+    fields: Optional[str] = Query(None, description="Comma-separated product fields, e.g. title,price,image"),
+):
+    """
+    Search product titles and descriptions, best match first (BM25).
+    Every word must match; the last one also matches as a prefix, so
+    `q=wom jack` finds "Women's ... Jacket" while the user is typing.
+    `fields` returns only those fields of each item.
     """
-    return [p for p in PRODUCTS if p["category"] == category]
+    return search_products(q, limit, offset, prefix, parse_fields(fields, PRODUCT_FIELDS))
@@ -1,18 +1,30 @@
 # app/routers/users.py
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Dict, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from app import serializers
+from app.bulk import bulk_import
 from app.schemas import User, UserCreate
-from app.database import get_db, User as UserModel
-
-router = APIRouter()  # <- no prefix here
+from app.database import SessionLocal, get_request_db, run_db, User as UserModel
+from app.services.cache import USER_CACHE
+from app.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    after_cursor,
+    csv_response,
+    keyset_page,
+    ndjson_response,
+    set_next_cursor,
+)
 
+FAST_JSON = serializers.FastJSON("users")
+router = APIRouter(default_response_class=FAST_JSON.response_class)  # <- no prefix here
 
-@router.post("/", response_model=User)
-def create_user(user: UserCreate, db: Session = Depends(get_db)):
-    if not user.email:
-        raise HTTPException(status_code=400, detail="Email is required")
 
+def _create_user(db: Session, user: UserCreate) -> User:
     existing = db.query(UserModel).filter(UserModel.email == user.email).first()
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
@@ -21,17 +33,82 @@ def create_user(user: UserCreate, db: Session = Depends(get_db)):
     db.add(new_user)
     db.commit()
     db.refresh(new_user)
-    return new_user
+    return serializers.user(new_user)
 
 
-@router.get("/", response_model=list[User])
-def list_users(db: Session = Depends(get_db)):
-    return db.query(UserModel).all()
+def _list_users(db: Session, cursor: Optional[str], limit: int):
+    # plain rows: no ORM identity map for a page of up to MAX_PAGE_SIZE users
+    rows = db.query(UserModel.id, UserModel.email)
+    users, next_cursor = keyset_page(rows, UserModel.id, cursor, limit)
+    return [serializers.user(u) for u in users], next_cursor
 
 
-@router.get("/{user_id}", response_model=User)
-def get_user(user_id: int, db: Session = Depends(get_db)):
+def _clean_user(record: Dict) -> Dict:
+    """One bulk-import record -> users row (ValueError for bad input)."""
+    email = str(record.get("email") or "").strip()
+    if not email:
+        raise ValueError("email is required")
+    if len(email) > 255:
+        raise ValueError("email is longer than 255 characters")
+    return {"email": email}
+
+
+def _get_user(db: Session, user_id: int) -> User:
+    cached = USER_CACHE.get(user_id)
+    if cached is not None:
+        return User.construct(**cached)
     user = db.query(UserModel).filter(UserModel.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
+    result = serializers.user(user)
+    USER_CACHE.set(user_id, result.dict())
+    return result
+
+
+@router.post("/", response_model=User)
+async def create_user(user: UserCreate, db: Session = Depends(get_request_db)):
+    if not user.email:
+        raise HTTPException(status_code=400, detail="Email is required")
+    return FAST_JSON.respond(await run_db(db, _create_user, user))
+
+
+@router.get("/", response_model=list[User])
+async def list_users(
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    output: str = Query("json", alias="format", regex="^(json|ndjson|csv)$"),
+    db: Session = Depends(get_request_db),
+):
+    """
+    List users by id, one page at a time. The next page's cursor is in the
+    X-Next-Cursor / Link headers. `format=ndjson` or `format=csv` streams
+    every user after `cursor` instead (full export, re-importable through
+    POST /users/import).
+    """
+    if output != "json":
+        stmt = after_cursor(select(UserModel.id, UserModel.email), UserModel.id, cursor)
+        respond = ndjson_response if output == "ndjson" else csv_response
+        return respond(SessionLocal, stmt)
+
+    users, next_cursor = await run_db(db, _list_users, cursor, limit)
+    set_next_cursor(request, response, next_cursor)
+    return FAST_JSON.respond(users, response)
+
+
+@router.post("/import")
+async def import_users(request: Request, db: Session = Depends(get_request_db)):
+    """
+    Bulk-create users from a streamed CSV (header row with an `email`
+    column; other columns are ignored) or NDJSON body, one user per line.
+    Emails that already exist are skipped and reported with the other
+    per-line errors; the response has the counts and rows/sec.
+    """
+    report = await bulk_import(request, db, UserModel.__table__, "email", _clean_user, run=run_db)
+    return FAST_JSON.respond(report)
+
+
+@router.get("/{user_id}", response_model=User)
+async def get_user(user_id: int, db: Session = Depends(get_request_db)):
+    return FAST_JSON.respond(await run_db(db, _get_user, user_id))
@@ -64,9 +64,24 @@ class User(UserBase):
 
 # ---------- ORDER SCHEMAS ----------
 
+class OrderItem(BaseModel):
+    product_id: int
+    title: str
+    quantity: int
+    unit_price_cents: int
+
+    class Config:
+        orm_mode = True
+
+
 class Order(BaseModel):
     id: int
     total: float
+    total_cents: int
 
     class Config:
         orm_mode = True
+
+
+class OrderWithItems(Order):
+    items: list[OrderItem]
@@ -0,0 +1,295 @@
+# app/services/cache.py
+"""
+Read-through cache for user and cart lookups (and product rows).
+
+Two backends with the same interface:
+
+    LocalCache   in-process LRU with an optional TTL (default): one copy
+                 per worker, which other workers' writes cannot reach, so
+                 users and carts use it only with a single worker
+                 (shared_backend).
+    RedisCache   any Redis-protocol server (redis-py, imported on use):
+                 one copy shared by every worker, so invalidation is seen
+                 everywhere. If the server is unreachable, reads miss and
+                 writes are dropped; requests fall through to the DB.
+
+Values are JSON-serializable dicts (schema.dict()), never ORM objects.
+Writers delete entries after they commit and the next read refills them
+(writing back their own copy could overwrite a concurrent writer's newer one).
+A deleted key is held for `hold` seconds, during which set() skips it: a
+read that loaded the row before the write committed cannot cache it after
+the delete.
+"""
+import math
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+
+from app.config import (
+    CACHE_BACKEND,
+    CACHE_MAX_ENTRIES,
+    CACHE_TTL,
+    CACHE_URL,
+    CACHE_WRITE_HOLD,
+    WEB_CONCURRENCY,
+)
+from app.metrics import register_cache
+
+logger = logging.getLogger(__name__)
+
+# stored by delete() while a key is held
+_HELD = object()
+
+
+class LocalCache:
+    """
+    Thread-safe LRU; entries older than `ttl` seconds count as misses, and
+    keys deleted less than `hold` seconds ago are not set again.
+    """
+
+    def __init__(self, maxsize: int = 10_000, ttl: Optional[float] = None, hold: float = 0.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hold = hold
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # unlocked: a lost increment under contention is fine for metrics
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, key: Hashable, now: float) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires and expires < now:
+            del self._data[key]
+            return None
+        if value is _HELD:
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            value = self._lookup(key, time.monotonic())
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        found = {}
+        with self._lock:
+            now = time.monotonic()
+            for key in keys:
+                value = self._lookup(key, now)
+                if value is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+                    found[key] = value
+        return found
+
+    def _store(self, key: Hashable, expires: float, value: Any) -> None:
+        self._data[key] = (expires, value)
+        self._data.move_to_end(key)
+
+    def _evict(self) -> None:
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def set_many(self, items: Dict[Hashable, Any]) -> None:
+        now = time.monotonic()
+        expires = now + self.ttl if self.ttl else 0.0
+        with self._lock:
+            for key, value in items.items():
+                held = self._data.get(key)
+                if held is not None and held[1] is _HELD and held[0] >= now:
+                    continue
+                self._store(key, expires, value)
+            self._evict()
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self.set_many({key: value})
+
+    def delete(self, *keys: Hashable) -> None:
+        with self._lock:
+            if not self.hold:
+                for key in keys:
+                    self._data.pop(key, None)
+                return
+            expires = time.monotonic() + self.hold
+            for key in keys:
+                self._store(key, expires, _HELD)
+            self._evict()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._data)}
+
+
+class RedisCache:
+    """
+    Same interface on a Redis-protocol server. `client` is a redis-py
+    compatible object (redis.Redis, fakeredis, ...); keys are namespaced
+    with `prefix` and expire after `ttl` seconds. delete() overwrites a key
+    with a marker for `hold` seconds and set() only creates missing keys
+    (SET NX), so the marker blocks refills in every worker.
+    """
+
+    HELD = b"-"
+
+    def __init__(self, client, ttl: Optional[float] = None, prefix: str = "shop:", hold: float = 0.0):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hold = hold
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _key(self, key: Hashable) -> str:
+        return f"{self.prefix}{key}"
+
+    def _failed(self, op: str, exc: Exception) -> None:
+        self.errors += 1
+        logger.warning("Cache %s failed, falling back to the database: %s", op, exc)
+
+    def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        keys = list(keys)
+        if not keys:
+            return {}
+        try:
+            raw = self.client.mget([self._key(k) for k in keys])
+        except Exception as exc:  # connection errors, timeouts, ...
+            self._failed("read", exc)
+            raw = [None] * len(keys)
+        found = {
+            key: json.loads(value) for key, value in zip(keys, raw) if value is not None and value != self.HELD
+        }
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        return self.get_many([key]).get(key)
+
+    def set_many(self, items: Dict[Hashable, Any]) -> None:
+        ttl = int(self.ttl) if self.ttl else None
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for key, value in items.items():
+                pipe.set(self._key(key), json.dumps(value, separators=(",", ":")), ex=ttl, nx=True)
+            pipe.execute()
+        except Exception as exc:
+            self._failed("write", exc)
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self.set_many({key: value})
+
+    def delete(self, *keys: Hashable) -> None:
+        if not keys:
+            return
+        try:
+            if self.hold:
+                hold = max(1, math.ceil(self.hold))
+                pipe = self.client.pipeline(transaction=False)
+                for key in keys:
+                    pipe.set(self._key(key), self.HELD, ex=hold)
+                pipe.execute()
+            else:
+                self.client.delete(*(self._key(k) for k in keys))
+        except Exception as exc:
+            self._failed("invalidation", exc)
+
+    def clear(self) -> None:
+        try:
+            keys = list(self.client.scan_iter(match=f"{self.prefix}*"))
+            if keys:
+                self.client.delete(*keys)
+        except Exception as exc:
+            self._failed("clear", exc)
+
+    def stats(self) -> Dict[str, int]:
+        # entry count lives on the server (shared by all workers)
+        return {"hits": self.hits, "misses": self.misses, "errors": self.errors}
+
+
+class NullCache(LocalCache):
+    """Caching disabled: every lookup misses."""
+
+    def __init__(self):
+        super().__init__(maxsize=0)
+
+
+_redis_clients: Dict[str, Any] = {}
+
+
+def _redis_client(url: str):
+    """One client (connection pool) per URL; redis-py reconnects after fork."""
+    client = _redis_clients.get(url)
+    if client is None:
+        try:
+            import redis
+        except ImportError as exc:
+            raise RuntimeError("CACHE_BACKEND=redis needs the redis package") from exc
+        client = redis.Redis.from_url(url, socket_timeout=0.25, socket_connect_timeout=0.25)
+        _redis_clients[url] = client
+    return client
+
+
+def make_cache(
+    name: str,
+    backend: str,
+    url: str = "",
+    ttl: Optional[float] = None,
+    maxsize: int = 10_000,
+    hold: float = 0.0,
+):
+    """
+    Cache named `name` for CACHE_BACKEND: "local", "redis" (keys under
+    "shop:<name>:"; falls back to local without redis-py) or "none".
+    Nothing connects until the first lookup.
+    """
+    if backend == "none":
+        return NullCache()
+    if backend == "redis":
+        try:
+            return RedisCache(_redis_client(url), ttl=ttl, prefix=f"shop:{name}:", hold=hold)
+        except RuntimeError as exc:
+            logger.warning("%s; using the in-process cache", exc)
+    elif backend != "local":
+        raise ValueError(f"Unknown cache backend: {backend}")
+    return LocalCache(maxsize=maxsize, ttl=ttl, hold=hold)
+
+
+def shared_backend(backend: str, workers: int) -> str:
+    """
+    Backend for rows that change (users, carts): a local cache per worker
+    would keep serving what another worker's write changed, so "local"
+    with several workers caches nothing.
+    """
+    if backend == "local" and workers > 1:
+        logger.info("CACHE_BACKEND=local with %s workers: users and carts are not cached", workers)
+        return "none"
+    return backend
+
+
+# users by id and carts (with items) by id; writers drop entries after
+# committing (see app/routers/cart.py, orders.py)
+_backend = shared_backend(CACHE_BACKEND, WEB_CONCURRENCY)
+USER_CACHE = make_cache("users", _backend, CACHE_URL, CACHE_TTL, CACHE_MAX_ENTRIES, CACHE_WRITE_HOLD)
+CART_CACHE = make_cache("carts", _backend, CACHE_URL, CACHE_TTL, CACHE_MAX_ENTRIES, CACHE_WRITE_HOLD)
+register_cache("users", USER_CACHE)
+register_cache("carts", CART_CACHE)
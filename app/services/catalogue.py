@@ -0,0 +1,141 @@
+# app/services/catalogue.py
+
+import hashlib
+import json
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.config import CATALOGUE_STORAGE
+from app.services.columnar import PriceColumns
+from app.services.records import ProductRecord, json_default, make_store
+from app.services.search import SearchIndex
+
+
+def category_id(category: str) -> str:
+    """
+    Id used by the frontend buttons for a category name,
+    e.g. "men's clothing" -> 'mens_clothing'.
+    """
+    return category.lower().replace("'", "").replace(" ", "_")
+
+
+class Catalogue:
+    """
+    Read-only, indexed view over a list of products.
+
+    Products are kept as compact, immutable ProductRecords (or, with
+    storage="columns", as arrays; see app/services/records.py) that read
+    like the product dicts they were built from. All indexes are built
+    once in __init__ so every lookup used by the routers is a single dict
+    access instead of a scan over the products.
+    """
+
+    def __init__(
+        self,
+        products: Iterable[Dict],
+        data_version: Optional[str] = None,
+        storage: str = CATALOGUE_STORAGE,
+    ):
+        products = list(products)
+        # version stamp of the data file it was loaded from, if any
+        self.data_version = data_version
+
+        # content hash; changes whenever any product changes, so it can key
+        # caches of rendered responses
+        self.version: str = hashlib.sha1(
+            json.dumps(products, sort_keys=True, default=json_default).encode("utf-8")
+        ).hexdigest()[:16]
+
+        self._products = make_store(products, storage)
+        rows_by_category: Dict[str, List[int]] = {}
+        for row, p in enumerate(products):
+            rows_by_category.setdefault(p["category"], []).append(row)
+
+        # category -> row numbers of its products, in catalogue order
+        self._rows_by_category: Dict[str, array] = {
+            cat: array("I", rows) for cat, rows in rows_by_category.items()
+        }
+        # both the frontend id ('mens_clothing') and the lower-cased name
+        # ("men's clothing") resolve to the stored category string
+        self._normalized: Dict[str, str] = {}
+        for cat in self._rows_by_category:
+            self._normalized[cat.lower()] = cat
+            self._normalized[category_id(cat)] = cat
+
+        # title/description full-text index for search()
+        self._search = SearchIndex(self._products)
+        # id / price / category arrays for filtered and sorted listings
+        self._columns = PriceColumns(products)
+        self.currency: str = self._columns.currency
+        self.currencies: Tuple[str, ...] = tuple(sorted(self._columns.rates))
+
+        self.categories: Tuple[str, ...] = tuple(self._rows_by_category)
+        self.category_listing: Tuple[Dict, ...] = tuple(
+            {"id": category_id(cat), "name": cat.title()} for cat in self.categories
+        )
+
+    def __len__(self) -> int:
+        return len(self._products)
+
+    @property
+    def products(self) -> Sequence[ProductRecord]:
+        """All products, in catalogue order."""
+        return self._products
+
+    def get(self, product_id: int) -> Optional[ProductRecord]:
+        """Return a product by id, or None."""
+        return self._products.get(product_id)
+
+    def normalize_category(self, category: str) -> Optional[str]:
+        """Map a frontend category id or name to the stored category, or None."""
+        return self._normalized.get(category.lower())
+
+    def product_ids(self, category: str) -> Tuple[int, ...]:
+        """Return the product ids of an exact category name."""
+        return tuple(self._products[row]["id"] for row in self._rows_by_category.get(category, ()))
+
+    def by_category(self, category: str) -> Tuple[ProductRecord, ...]:
+        """Return all products of an exact category name (unknown -> ())."""
+        return tuple(map(self._products.__getitem__, self._rows_by_category.get(category, ())))
+
+    def by_category_id(self, category: str) -> Tuple[ProductRecord, ...]:
+        """Return all products for a frontend category id or name."""
+        normalized = self.normalize_category(category)
+        if normalized is None:
+            return ()
+        return self.by_category(normalized)
+
+    def search(self, query: str, limit: int = 20, offset: int = 0, prefix: bool = True) -> Tuple[int, List[Dict]]:
+        """
+        Full-text search over titles and descriptions, best match first:
+        (number of matches, products from `offset` to `offset + limit`).
+        """
+        return self._search.search(query, limit, offset, prefix)
+
+    def listing(
+        self,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        sort: Optional[str] = None,
+        currency: Optional[str] = None,
+    ) -> List[Dict]:
+        """
+        Products of an exact category name (None = all) with a price in
+        [min_price, max_price], sorted by `sort` ("price", "-price", "id",
+        "-id"). With a `currency` other than the catalogue's, products are
+        copies with the converted `price` and a `currency` key.
+        ValueError for an unknown sort key or currency.
+        """
+        if currency is not None:
+            currency = currency.upper()
+            if currency not in self.currencies:
+                raise ValueError(f"currency must be one of {', '.join(self.currencies)}")
+        rows, prices = self._columns.select(category, min_price, max_price, sort, currency)
+        products = [self._products[i] for i in rows.tolist()]
+        if currency is None or currency == self.currency:
+            return products
+        return [
+            {**p.as_dict(), "price": price, "currency": currency}
+            for p, price in zip(products, prices.tolist())
+        ]
@@ -0,0 +1,155 @@
+# app/services/catalogue_store.py
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.services.catalogue import Catalogue
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_FIELDS = ("id", "title", "price", "category")
+
+
+def read_catalogue_file(path: str) -> Tuple[str, List[Dict]]:
+    """
+    (version stamp, products) from a catalogue data file:
+
+    - .json: {"version": "...", "products": [{...}, ...]}
+    - .ndjson: a {"version": "..."} line, then one product per line
+
+    ValueError for a malformed file or product.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if path.endswith(".ndjson"):
+        lines = [line for line in data.splitlines() if line.strip()]
+        if not lines:
+            raise ValueError("empty catalogue file")
+        header = json.loads(lines[0])
+        products = [json.loads(line) for line in lines[1:]]
+    else:
+        header = json.loads(data)
+        products = header.get("products") if isinstance(header, dict) else None
+    if not isinstance(header, dict) or "version" not in header:
+        raise ValueError("catalogue file has no version stamp")
+    if not isinstance(products, list):
+        raise ValueError("catalogue file has no product list")
+
+    ids = set()
+    for n, p in enumerate(products, 1):
+        missing = [f for f in REQUIRED_FIELDS if not isinstance(p, dict) or f not in p]
+        if missing:
+            raise ValueError(f"product {n} is missing {', '.join(missing)}")
+        if p["id"] in ids:
+            raise ValueError(f"duplicate product id {p['id']}")
+        ids.add(p["id"])
+    return str(header["version"]), products
+
+
+def load_catalogue(path: str) -> Catalogue:
+    """Read a catalogue data file and build its Catalogue (all indexes)."""
+    version, products = read_catalogue_file(path)
+    return Catalogue(products, data_version=version)
+
+
+class CatalogueStore:
+    """
+    The live catalogue, loaded from a data file and reloaded when the file
+    changes (checked every `interval` seconds by a background thread).
+
+    A reload builds the new Catalogue with all its indexes first and then
+    replaces `current` in one assignment, so a request that reads `current`
+    once keeps a consistent snapshot even while a reload runs; the old
+    catalogue is freed when its last request is done. A file that does not
+    load is logged and counted, and the previous catalogue stays in use.
+    Replace the file by renaming a new one over it to avoid loading a
+    half-written file.
+    """
+
+    def __init__(self, path: str, interval: float = 5.0):
+        self.path = path
+        self.interval = interval
+        self._file = self._file_stat()
+        self.current: Catalogue = load_catalogue(path)
+        self.reloads = 0
+        self.errors = 0
+        self.last_reload_ms: Optional[float] = None
+        self._listeners: List[Callable[[Catalogue], None]] = []
+        self._lock = threading.Lock()
+        self._stop: Optional[threading.Event] = None
+
+    def _file_stat(self) -> Tuple[int, int, int]:
+        st = os.stat(self.path)
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    def on_swap(self, listener: Callable[[Catalogue], None]) -> None:
+        """Call `listener(new_catalogue)` after every swap (registered once)."""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def reload(self, force: bool = False) -> bool:
+        """Load the file again if it changed; True when a new catalogue was swapped in."""
+        with self._lock:
+            try:
+                file = self._file_stat()
+            except OSError as e:
+                logger.error("Catalogue file %s unavailable: %s", self.path, e)
+                return False
+            if file == self._file and not force:
+                return False
+            self._file = file
+
+            start = time.perf_counter()
+            try:
+                catalogue = load_catalogue(self.path)
+            except (OSError, ValueError) as e:
+                self.errors += 1
+                logger.error("Keeping catalogue %s; could not load %s: %s",
+                             self.current.data_version, self.path, e)
+                return False
+            if (catalogue.data_version, catalogue.version) == (self.current.data_version, self.current.version):
+                return False
+            self.current = catalogue
+            self.reloads += 1
+            self.last_reload_ms = round((time.perf_counter() - start) * 1e3, 1)
+
+        logger.info("Loaded catalogue %s (%s products) in %s ms",
+                    catalogue.data_version, len(catalogue), self.last_reload_ms)
+        for listener in self._listeners:
+            try:
+                listener(catalogue)
+            except Exception:
+                logger.exception("Catalogue swap listener %r failed", listener)
+        return True
+
+    def start(self) -> None:
+        """Reload now if the file changed, then poll it (call after fork; interval <= 0 disables)."""
+        self.stop()
+        self.reload()
+        if self.interval <= 0:
+            return
+        self._stop = stop = threading.Event()
+
+        def run() -> None:
+            while not stop.wait(self.interval):
+                self.reload()
+
+        threading.Thread(target=run, name="catalogue-reload", daemon=True).start()
+
+    def stop(self) -> None:
+        if self._stop is not None:
+            self._stop.set()
+            self._stop = None
+
+    def stats(self) -> Dict:
+        return {
+            "version": self.current.data_version,
+            "products": len(self.current),
+            "reloads": self.reloads,
+            "errors": self.errors,
+            "last_reload_ms": self.last_reload_ms,
+        }
@@ -0,0 +1,98 @@
+# app/services/columnar.py
+
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from app.config import CATALOGUE_CURRENCY, FX_RATES
+
+SORT_KEYS = ("price", "-price", "id", "-id")
+
+
+class PriceColumns:
+    """
+    Columnar copy of a catalogue's id, price and category, one NumPy
+    array each in catalogue order, for listings filtered by price range,
+    sorted and converted to another currency.
+
+    Rows of a category are precomputed, so a listing touches only that
+    category; filters and sorts are array operations over it. Prices
+    converted to a currency (rounded to cents) are computed for the whole
+    catalogue the first time that currency is asked for and kept.
+    """
+
+    def __init__(
+        self,
+        products: Iterable[Dict],
+        currency: str = CATALOGUE_CURRENCY,
+        rates: Optional[Dict[str, float]] = None,
+    ):
+        products = list(products)
+        self.currency = currency
+        self.rates: Dict[str, float] = dict(FX_RATES if rates is None else rates)
+        self.rates[currency] = 1.0
+
+        codes: Dict[str, int] = {}
+        self.ids = np.fromiter((p["id"] for p in products), dtype=np.int64, count=len(products))
+        self.prices = np.fromiter((p["price"] for p in products), dtype=np.float64, count=len(products))
+        self.category_codes = np.fromiter(
+            (codes.setdefault(p["category"], len(codes)) for p in products),
+            dtype=np.int32,
+            count=len(products),
+        )
+        self.categories: Tuple[str, ...] = tuple(codes)
+        # category -> row numbers, in catalogue order
+        self._rows: Dict[str, np.ndarray] = {
+            category: np.flatnonzero(self.category_codes == code) for category, code in codes.items()
+        }
+        self._converted: Dict[str, np.ndarray] = {currency: self.prices}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def prices_in(self, currency: str) -> np.ndarray:
+        """Every price converted to `currency` (KeyError if it has no rate)."""
+        converted = self._converted.get(currency)
+        if converted is None:
+            converted = np.round(self.prices * self.rates[currency], 2)
+            with self._lock:
+                self._converted[currency] = converted
+        return converted
+
+    def select(
+        self,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        sort: Optional[str] = None,
+        currency: Optional[str] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (row numbers, prices in `currency`) of the matching products.
+        Price bounds are inclusive and in `currency`; `sort` is one of
+        SORT_KEYS, ties (and no sort) keep catalogue order.
+        """
+        prices = self.prices_in(currency or self.currency)
+        if category is None:
+            rows = np.arange(len(self.ids))
+        else:
+            rows = self._rows.get(category, np.empty(0, dtype=np.int64))
+        selected = prices[rows]
+
+        if min_price is not None or max_price is not None:
+            keep = np.ones(len(rows), dtype=bool)
+            if min_price is not None:
+                keep &= selected >= min_price
+            if max_price is not None:
+                keep &= selected <= max_price
+            rows, selected = rows[keep], selected[keep]
+
+        if sort:
+            if sort not in SORT_KEYS:
+                raise ValueError(f"sort must be one of {', '.join(SORT_KEYS)}")
+            key = selected if sort.endswith("price") else self.ids[rows]
+            order = np.argsort(-key if sort.startswith("-") else key, kind="stable")
+            rows, selected = rows[order], selected[order]
+        return rows, selected
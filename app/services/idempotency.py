@@ -0,0 +1,78 @@
+# app/services/idempotency.py
+"""
+Stored responses for requests sent with an Idempotency-Key header.
+
+A key is bound to the request it was first used with ("POST /orders/42");
+the response is saved in the same transaction as the side effects, so a
+retry either finds the complete result or nothing at all. claim() locks
+the key for that transaction, so requests sharing a key run one at a time.
+"""
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.config import IDEMPOTENCY_KEY_TTL
+from app.database import IdempotencyKey
+from app.db_pool import dialect_insert
+
+# created_at of a claimed key whose response is not stored yet: reads as expired
+PENDING = datetime(1970, 1, 1)
+
+
+def lookup(db: Session, key: str, request: str) -> Optional[Tuple[int, str]]:
+    """
+    (status_code, body) stored for `key`, or None if there is none (or it
+    expired). Reusing a key for a different request is a client error.
+    """
+    row = db.get(IdempotencyKey, key, populate_existing=True)
+    if row is None or row.created_at < datetime.utcnow() - timedelta(seconds=IDEMPOTENCY_KEY_TTL):
+        return None
+    if row.request != request:
+        raise HTTPException(
+            status_code=422,
+            detail="Idempotency-Key was already used for a different request",
+        )
+    return row.status_code, row.body
+
+
+def claim(db: Session, key: str, request: str) -> None:
+    """
+    Lock `key` until the caller's transaction ends, on every database.
+
+    A placeholder row is inserted unless the key exists (INSERT ... ON
+    CONFLICT DO NOTHING, which waits for another transaction inserting the
+    same key to finish), then the row is locked with SELECT ... FOR UPDATE.
+    A retry racing the original therefore waits here and its lookup() that
+    follows finds the stored response. The placeholder is ignored by
+    lookup() and disappears if the transaction rolls back.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect in {"sqlite", "postgresql"}:
+        db.execute(
+            dialect_insert(dialect)(IdempotencyKey)
+            .values(key=key, request=request, status_code=0, body="", created_at=PENDING)
+            .on_conflict_do_nothing(index_elements=[IdempotencyKey.key])
+        )
+    locked = db.execute(
+        select(IdempotencyKey.key).where(IdempotencyKey.key == key).with_for_update()
+    ).scalar()
+    if locked is None:
+        # no ON CONFLICT here: a concurrent insert of the key fails with IntegrityError
+        db.add(IdempotencyKey(key=key, request=request, status_code=0, body="", created_at=PENDING))
+        db.flush()
+
+
+def remember(db: Session, key: str, request: str, status_code: int, body: str) -> None:
+    """Store the response for `key` (replacing an expired one); caller commits."""
+    db.merge(
+        IdempotencyKey(
+            key=key,
+            request=request,
+            status_code=status_code,
+            body=body,
+            created_at=datetime.utcnow(),
+        )
+    )
@@ -0,0 +1,203 @@
+# app/services/product_store.py
+
+import asyncio
+import logging
+import sys
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.database import CatalogueSync
+from app.database import Product as ProductModel
+from app.database import SessionLocal, begin_write
+from app.db_pool import dialect_insert
+from app.metrics import register_cache
+from app.services.cache import LocalCache
+from app.services.catalogue import Catalogue
+from app.services.external_products import current_catalogue
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+FAKESTORE_BASE_URL = "https://fakestoreapi.com"
+UPSERT_BATCH_SIZE = 1000
+# pg_advisory_xact_lock key serializing catalogue syncs (migrations use 727274)
+CATALOGUE_SYNC_LOCK = 727275
+
+_COLUMNS = ("id", "title", "description", "price")
+
+
+def product_row(data: Dict) -> Dict:
+    """Keep only the columns of the local products table."""
+    return {
+        "id": data["id"],
+        "title": data.get("title") or f"Product {data['id']}",
+        "description": data.get("description"),
+        "price": float(data.get("price", 0.0)),
+    }
+
+
+# ------------------------------------------------------------------
+# In-process cache: product id -> row known to exist in the DB
+# ------------------------------------------------------------------
+
+
+class ProductCache(LocalCache):
+    """
+    Products known to be stored locally, so add-to-cart can skip the
+    SELECT. Rows are plain dicts (not ORM objects) so they can be shared
+    across sessions and threads. Always in-process, without TTL and
+    unbounded: product rows are never deleted, so a worker's copy cannot go
+    stale, and it holds the whole catalogue (evicting part of it would send
+    add-to-cart back to the SELECT).
+    """
+
+    def put_many(self, rows: Iterable[Dict]) -> None:
+        self.set_many({row["id"]: row for row in rows})
+
+    def put(self, row: Dict) -> None:
+        self.put_many([row])
+
+
+PRODUCT_CACHE = ProductCache(maxsize=sys.maxsize)
+register_cache("product_rows", PRODUCT_CACHE)
+
+
+# ------------------------------------------------------------------
+# Bulk warm-up from the in-memory catalogue
+# ------------------------------------------------------------------
+
+
+def _upsert_rows(db: Session, rows: List[Dict]) -> None:
+    """
+    Insert or update product rows in batches with INSERT ... ON CONFLICT
+    (sqlite / PostgreSQL), falling back to merge() on other databases.
+    """
+    dialect = db.get_bind().dialect.name
+
+    if dialect in {"sqlite", "postgresql"}:
+        insert = dialect_insert(dialect)
+        stmt = insert(ProductModel)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ProductModel.id],
+            set_={c: stmt.excluded[c] for c in _COLUMNS if c != "id"},
+        )
+        for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+            db.execute(stmt, rows[start:start + UPSERT_BATCH_SIZE])
+    else:
+        for row in rows:
+            db.merge(ProductModel(**row))
+
+
+def upsert_products(db: Session, products: Iterable[Dict]) -> int:
+    """Upsert product rows (see _upsert_rows); commits and returns the number written."""
+    rows = [product_row(p) for p in products]
+    _upsert_rows(db, rows)
+    db.commit()
+    PRODUCT_CACHE.put_many(rows)
+    return len(rows)
+
+
+def warm_product_table(db: Session, catalogue: Optional[Catalogue] = None) -> int:
+    """
+    Bulk-load the (current) catalogue into the products table, once per
+    catalogue version and database: the first process to take the write
+    lock upserts it and records the version in catalogue_sync, the others
+    wait for it and skip the write. Every caller fills its PRODUCT_CACHE.
+    Returns the number of rows written (0 when already synced).
+    """
+    if catalogue is None:
+        catalogue = current_catalogue()
+    rows = [product_row(p) for p in catalogue.products]
+    try:
+        begin_write(db)
+        if db.get_bind().dialect.name == "postgresql":
+            db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": CATALOGUE_SYNC_LOCK})
+        synced = db.get(CatalogueSync, 1)
+        if synced is not None and synced.version == catalogue.version:
+            db.rollback()
+            count = 0
+        else:
+            _upsert_rows(db, rows)
+            db.merge(CatalogueSync(id=1, version=catalogue.version, synced_at=datetime.utcnow()))
+            db.commit()
+            count = len(rows)
+    except Exception:
+        db.rollback()
+        raise
+    PRODUCT_CACHE.put_many(rows)
+    if count:
+        logger.info("Warmed products table with %s catalogue products", count)
+    return count
+
+
+def warm_reloaded_catalogue(catalogue: Catalogue) -> None:
+    """Catalogue swap listener: store new and changed products too (once, see above)."""
+    with SessionLocal() as db:
+        warm_product_table(db, catalogue)
+
+
+# ------------------------------------------------------------------
+# Remote fallback (products missing from the catalogue)
+# ------------------------------------------------------------------
+
+_client: Optional["httpx.AsyncClient"] = None
+_inflight: Dict[int, asyncio.Future] = {}
+
+
+def _get_client() -> "httpx.AsyncClient":
+    """One pooled, keep-alive client per worker (httpx is imported on first use)."""
+    global _client
+    if _client is None or _client.is_closed:
+        import httpx
+
+        _client = httpx.AsyncClient(
+            base_url=FAKESTORE_BASE_URL,
+            timeout=httpx.Timeout(5.0, connect=2.0),
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        )
+    return _client
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def _fetch(product_id: int) -> Dict:
+    import httpx
+
+    try:
+        resp = await _get_client().get(f"/products/{product_id}")
+        resp.raise_for_status()
+        return product_row(resp.json())
+    except (httpx.HTTPError, ValueError, KeyError) as e:
+        logger.error("Failed to fetch product %s from FakeStore: %s", product_id, e)
+        raise HTTPException(
+            status_code=502,
+            detail="Could not fetch product details from FakeStore API",
+        )
+
+
+async def fetch_remote_product(product_id: int) -> Dict:
+    """
+    Fetch a product row from FakeStore without blocking the event loop.
+    Concurrent requests for the same id share one HTTP call.
+    """
+    pending = _inflight.get(product_id)
+    if pending is not None:
+        return await asyncio.shield(pending)
+
+    future = asyncio.ensure_future(_fetch(product_id))
+    _inflight[product_id] = future
+    try:
+        return await asyncio.shield(future)
+    finally:
+        _inflight.pop(product_id, None)
@@ -0,0 +1,223 @@
+# app/services/records.py
+"""
+Compact product storage for the catalogue.
+
+A product used to be a plain dict per product: ~350 bytes of dict before
+its strings, plus a private copy of its category string. Here:
+
+- ProductRecord: immutable, __slots__ only (no per-object dict), with the
+  category interned so all products of a category share one string. It
+  reads like the dict it replaces (record["price"], record.get("image"),
+  {**record}), so callers and the JSON output do not change;
+- RecordStore: the records in catalogue order plus an id index;
+- ColumnStore: struct-of-arrays, no object per product at all: ids and
+  prices in typed arrays, category codes, and each text field packed into
+  one UTF-8 blob with end offsets. Records are built on access, so it
+  trades lookup speed for memory (CATALOGUE_STORAGE=columns).
+"""
+import sys
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping, Sequence
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+FIELDS = ("id", "title", "price", "description", "category", "image")
+_FIELD_SET = frozenset(FIELDS)
+
+
+class _Missing:
+    """Marks a field the source product did not have (so it stays absent)."""
+
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return "<missing>"
+
+
+MISSING: Any = _Missing()
+
+
+class ProductRecord(Mapping):
+    """One catalogue product; fields in FIELDS order, anything else in `extra`."""
+
+    __slots__ = FIELDS + ("extra",)
+
+    def __init__(self, id, title, price, description=MISSING, category=MISSING, image=MISSING, extra=None):
+        for name, value in zip(FIELDS, (id, title, price, description, category, image)):
+            object.__setattr__(self, name, value)
+        object.__setattr__(self, "extra", extra)
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "ProductRecord":
+        if isinstance(data, ProductRecord):
+            return data
+        category = data.get("category", MISSING)
+        extra = {k: v for k, v in data.items() if k not in _FIELD_SET} or None
+        return cls(
+            data["id"],
+            data.get("title", MISSING),
+            data.get("price", MISSING),
+            data.get("description", MISSING),
+            sys.intern(category) if isinstance(category, str) else category,
+            data.get("image", MISSING),
+            extra,
+        )
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ProductRecord is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("ProductRecord is immutable")
+
+    def __getitem__(self, key: str) -> Any:
+        if key in _FIELD_SET:
+            value = getattr(self, key)
+            if value is not MISSING:
+                return value
+        elif self.extra is not None and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        for name in FIELDS:
+            if getattr(self, name) is not MISSING:
+                yield name
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """The product as a plain dict (what the JSON encoders use)."""
+        data = {
+            name: value
+            for name, value in zip(FIELDS, (self.id, self.title, self.price, self.description, self.category, self.image))
+            if value is not MISSING
+        }
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def __repr__(self) -> str:
+        return f"ProductRecord({self.as_dict()!r})"
+
+    def __reduce__(self):
+        return ProductRecord, tuple(getattr(self, name) for name in self.__slots__)
+
+
+def json_default(obj: Any) -> Any:
+    """`default=` hook for json.dumps / orjson: records encode as their dict."""
+    if isinstance(obj, ProductRecord):
+        return obj.as_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class RecordStore(Sequence):
+    """ProductRecords in catalogue order, with an id -> record index."""
+
+    def __init__(self, products: Iterable[Mapping]):
+        self._records = tuple(ProductRecord.from_dict(p) for p in products)
+        self._by_id = {r.id: r for r in self._records}
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __getitem__(self, row):
+        return self._records[row]
+
+    def __iter__(self) -> Iterator[ProductRecord]:
+        return iter(self._records)
+
+    def get(self, product_id: int) -> Optional[ProductRecord]:
+        return self._by_id.get(product_id)
+
+
+class _Strings:
+    """One text field of every product, UTF-8 encoded into a single blob."""
+
+    __slots__ = ("_blob", "_ends", "_other")
+
+    def __init__(self, values: Iterable[Any]):
+        parts: List[bytes] = []
+        ends = array("Q")
+        # rows whose value is not a string (None or missing), usually none
+        self._other: Dict[int, Any] = {}
+        end = 0
+        for row, value in enumerate(values):
+            if isinstance(value, str):
+                encoded = value.encode("utf-8")
+                parts.append(encoded)
+                end += len(encoded)
+            else:
+                self._other[row] = value
+            ends.append(end)
+        self._blob = b"".join(parts)
+        self._ends = array("I", ends) if end < 2**32 else ends
+
+    def __getitem__(self, row: int) -> Any:
+        if self._other and row in self._other:
+            return self._other[row]
+        start = self._ends[row - 1] if row else 0
+        return self._blob[start:self._ends[row]].decode("utf-8")
+
+
+class ColumnStore(Sequence):
+    """
+    Struct-of-arrays catalogue: one array per field instead of an object
+    per product. Prices come back as floats; products with extra fields
+    keep them in a (sparse) side table.
+    """
+
+    def __init__(self, products: Iterable[Mapping]):
+        products = list(products)
+        self._ids = array("q", (p["id"] for p in products))
+        self._prices = array("d", (p["price"] for p in products))
+        codes: Dict[str, int] = {}
+        self._category_codes = array("I", (codes.setdefault(p["category"], len(codes)) for p in products))
+        self._categories = tuple(sys.intern(c) for c in codes)
+        self._titles = _Strings(p.get("title", MISSING) for p in products)
+        self._descriptions = _Strings(p.get("description", MISSING) for p in products)
+        self._images = _Strings(p.get("image", MISSING) for p in products)
+        self._extra: Dict[int, Dict] = {}
+        for row, p in enumerate(products):
+            extra = {k: v for k, v in p.items() if k not in _FIELD_SET}
+            if extra:
+                self._extra[row] = extra
+        # id lookups: ids sorted, with the row each one is on
+        self._id_rows = array("I", sorted(range(len(products)), key=self._ids.__getitem__))
+        self._sorted_ids = array("q", (self._ids[row] for row in self._id_rows))
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(len(self)))]
+        if row < 0:
+            row += len(self)
+        return ProductRecord(
+            self._ids[row],
+            self._titles[row],
+            self._prices[row],
+            self._descriptions[row],
+            self._categories[self._category_codes[row]],
+            self._images[row],
+            self._extra.get(row),
+        )
+
+    def get(self, product_id: int) -> Optional[ProductRecord]:
+        i = bisect_left(self._sorted_ids, product_id)
+        if i < len(self._sorted_ids) and self._sorted_ids[i] == product_id:
+            return self[self._id_rows[i]]
+        return None
+
+
+STORES = {"records": RecordStore, "columns": ColumnStore}
+
+
+def make_store(products: Iterable[Mapping], storage: str = "records"):
+    """RecordStore or ColumnStore for `storage` ("records" / "columns")."""
+    if storage not in STORES:
+        raise ValueError(f"Unknown catalogue storage {storage!r}; use one of {', '.join(STORES)}")
+    return STORES[storage](products)
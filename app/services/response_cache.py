@@ -0,0 +1,152 @@
+# app/services/response_cache.py
+
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from fastapi import Request, Response
+
+from app.compression import COMPRESSION_STATS, STATIC_LEVELS, compress, negotiate
+from app.config import COMPRESS_MIN_SIZE, COMPRESSION
+from app.services.records import json_default
+
+DEFAULT_CACHE_CONTROL = "public, max-age=60"
+
+
+def render_json(content: Any) -> bytes:
+    """Encode exactly like FastAPI's JSONResponse does (catalogue records as dicts)."""
+    return json.dumps(
+        content,
+        default=json_default,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag (RFC 7232)."""
+    if if_none_match.strip() == "*":
+        return True
+    bare = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == bare:
+            return True
+    return False
+
+
+class CachedPayload:
+    """
+    A response body rendered once, with its strong ETag, and its compressed
+    variants (each compressed on first use, with an ETag of its own).
+    """
+
+    __slots__ = ("body", "etag", "_encoded")
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        self._encoded: Dict[str, Tuple[bytes, str]] = {}
+
+    def encoded(self, encoding: str) -> Tuple[bytes, str]:
+        """(body compressed with `encoding` at the static level, its ETag)."""
+        variant = self._encoded.get(encoding)
+        if variant is None:
+            started = time.process_time()
+            body = compress(self.body, encoding, STATIC_LEVELS[encoding])
+            COMPRESSION_STATS.record(encoding, 0, 0, time.process_time() - started)
+            variant = self._encoded[encoding] = (body, self.variant_etag(encoding))
+        return variant
+
+    def variant_etag(self, encoding: str) -> str:
+        return f'{self.etag[:-1]}-{encoding}"'
+
+
+class ResponseCache:
+    """
+    Pre-serialized JSON responses for static data.
+
+    Entries are keyed by (key, version): a payload is rendered the first time
+    it is requested for a given data version and served as raw bytes after
+    that. Callers must keep the set of keys bounded (e.g. map unknown path
+    parameters onto a single key).
+
+    Payloads of at least `min_compress_size` bytes are sent in the coding
+    the client prefers (see app/compression.py), compressed once per
+    payload; None sends them as is.
+    """
+
+    def __init__(
+        self,
+        cache_control: str = DEFAULT_CACHE_CONTROL,
+        min_compress_size: Optional[int] = COMPRESS_MIN_SIZE if COMPRESSION else None,
+    ):
+        self.cache_control = cache_control
+        self.min_compress_size = min_compress_size
+        self._entries: Dict[Hashable, Tuple[str, CachedPayload]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def payload(self, key: Hashable, version: str, render: Callable[[], Any]) -> CachedPayload:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        payload = CachedPayload(render_json(render()))
+        with self._lock:
+            self._entries[key] = (version, payload)
+        return payload
+
+    def response(
+        self,
+        request: Request,
+        key: Hashable,
+        version: str,
+        render: Callable[[], Any],
+    ) -> Response:
+        """
+        Return the cached payload for `key` (precompressed when the client
+        accepts it), or an empty 304 when the client's If-None-Match already
+        has the representation this request negotiates (its coding's ETag).
+        """
+        payload = self.payload(key, version, render)
+        body, etag = payload.body, payload.etag
+        headers = {"Cache-Control": self.cache_control}
+        encoding = None
+        if self.min_compress_size is not None and len(body) >= self.min_compress_size:
+            headers["Vary"] = "Accept-Encoding"
+            encoding = negotiate(request.headers.get("accept-encoding", ""))
+            if encoding is not None:
+                etag = payload.variant_etag(encoding)
+        headers["ETag"] = etag
+
+        # a copy in another coding is a different representation under Vary
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+
+        if encoding is not None:
+            body = payload.encoded(encoding)[0]
+            headers["Content-Encoding"] = encoding
+            COMPRESSION_STATS.record(encoding, len(payload.body), len(body), 0.0, 1)
+        return Response(
+            content=body,
+            media_type="application/json",
+            headers=headers,
+        )
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,133 @@
+# app/services/search.py
+
+import bisect
+import heapq
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+from operator import add
+from typing import Dict, Iterable, List, Mapping, Sequence, Tuple
+
+# BM25 parameters (the usual defaults)
+K1 = 1.2
+B = 0.75
+# a title word counts as this many description words
+TITLE_WEIGHT = 2
+# shorter last words only match whole terms (one letter would expand to
+# most of the vocabulary)
+MIN_PREFIX_LENGTH = 2
+# vocabulary terms a prefix may expand to (the most common ones win)
+MAX_PREFIX_TERMS = 50
+# merged postings kept for recently typed prefixes
+PREFIX_CACHE_SIZE = 256
+
+_TOKEN = re.compile(r"[^\W_]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased words and numbers, e.g. "T-Shirt 2TB" -> ['t', 'shirt', '2tb']."""
+    return _TOKEN.findall(text.casefold())
+
+
+class SearchIndex:
+    """
+    Inverted index over product titles and descriptions, built once.
+
+    Each term maps to {product position: BM25 weight}, with the weight
+    (idf x saturated term frequency, title words counted TITLE_WEIGHT
+    times) computed at build time, so a query only intersects the posting
+    dicts of its terms and adds up their weights. All terms must match;
+    the last one also matches as a prefix (autocomplete) unless the query
+    ends with a space or it is shorter than MIN_PREFIX_LENGTH.
+    """
+
+    def __init__(self, products: Iterable[Mapping]):
+        # a Sequence (e.g. the catalogue's record store) is kept, not copied
+        self._products: Sequence[Mapping] = products if isinstance(products, Sequence) else tuple(products)
+        frequencies: List[Counter] = []
+        for p in self._products:
+            tf = Counter(tokenize(p.get("description") or ""))
+            for token in tokenize(p.get("title") or ""):
+                tf[token] += TITLE_WEIGHT
+            frequencies.append(tf)
+
+        lengths = [sum(tf.values()) for tf in frequencies]
+        avg_length = (sum(lengths) / len(lengths)) if lengths else 1.0
+        postings: Dict[str, Dict[int, float]] = {}
+        for doc, tf in enumerate(frequencies):
+            norm = K1 * (1 - B + B * lengths[doc] / avg_length)
+            for term, count in tf.items():
+                postings.setdefault(term, {})[doc] = count * (K1 + 1) / (count + norm)
+
+        n = len(self._products)
+        for term, weights in postings.items():
+            idf = math.log(1 + (n - len(weights) + 0.5) / (len(weights) + 0.5))
+            for doc in weights:
+                weights[doc] *= idf
+
+        self._postings = postings
+        self._vocabulary: List[str] = sorted(postings)
+        self._prefixes: "OrderedDict[str, Dict[int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._products)
+
+    def _prefix_postings(self, prefix: str) -> Dict[int, float]:
+        """Postings of every term starting with `prefix` (best weight per product)."""
+        with self._lock:
+            cached = self._prefixes.get(prefix)
+            if cached is not None:
+                self._prefixes.move_to_end(prefix)
+                return cached
+
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        end = bisect.bisect_left(self._vocabulary, prefix + "\U0010ffff", start)
+        terms = self._vocabulary[start:end]
+        if len(terms) > MAX_PREFIX_TERMS:
+            terms = heapq.nlargest(MAX_PREFIX_TERMS, terms, key=lambda t: len(self._postings[t]))
+
+        merged: Dict[int, float] = {}
+        for term in terms:
+            weights = self._postings[term]
+            best = {d: max(merged[d], weights[d]) for d in merged.keys() & weights.keys()}
+            merged.update(weights)
+            merged.update(best)
+
+        with self._lock:
+            self._prefixes[prefix] = merged
+            if len(self._prefixes) > PREFIX_CACHE_SIZE:
+                self._prefixes.popitem(last=False)
+        return merged
+
+    def search(self, query: str, limit: int = 20, offset: int = 0, prefix: bool = True) -> Tuple[int, List[Dict]]:
+        """(number of matches, products ranked by score) for one page."""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return 0, []
+
+        as_prefix = prefix and not query[-1:].isspace()
+        postings: List[Dict[int, float]] = []
+        for i, term in enumerate(terms):
+            if as_prefix and i == len(terms) - 1 and len(term) >= MIN_PREFIX_LENGTH:
+                weights = self._prefix_postings(term)
+            else:
+                weights = self._postings.get(term, {})
+            if not weights:
+                return 0, []
+            postings.append(weights)
+
+        # intersect from the rarest term; scores are summed in C (map/add)
+        postings.sort(key=len)
+        matches = postings[0].keys()
+        for weights in postings[1:]:
+            matches = matches & weights.keys()
+        docs: Sequence[int] = sorted(matches)
+        scores = list(map(postings[0].__getitem__, docs))
+        for weights in postings[1:]:
+            scores = list(map(add, scores, map(weights.__getitem__, docs)))
+
+        # sort is stable, so ties keep catalogue order
+        top = heapq.nlargest(offset + limit, range(len(docs)), key=scores.__getitem__)
+        return len(docs), [self._products[docs[i]] for i in top[offset:]]
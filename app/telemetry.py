@@ -0,0 +1,441 @@
+# app/telemetry.py
+"""
+Request and database instrumentation.
+
+configure_telemetry(app, engines) installs:
+  - TelemetryMiddleware: per-request wall time, status and route template,
+    plus a Server-Timing header with the DB time spent before the response
+  - SQLAlchemy cursor-execute hooks counting queries and their duration,
+    attributed to the request being served
+  - per-route histograms (request duration, DB time, queries per request),
+    an in-flight gauge and an unhandled-error counter
+  - an exporter for per-request records: in-memory, JSON-lines file or
+    OTLP through the OpenTelemetry SDK (optional dependency)
+"""
+import contextvars
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+
+from app.logging_config import request_id_var
+
+# seconds; upper bounds of the histogram buckets (+Inf is implicit)
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+# -------------------------
+# Histograms
+# -------------------------
+
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus/OTel explicit-bucket layout)."""
+
+    __slots__ = ("bounds", "counts", "sum", "count", "_lock")
+
+    def __init__(self, bounds: Iterable[float]):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # last bucket is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        return {"buckets": dict(zip(self.bounds + (float("inf"),), counts)), "sum": total, "count": count}
+
+
+class Counter:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Gauge(Counter):
+    __slots__ = ()
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+
+class MetricsRegistry:
+    """Histograms, counters and gauges keyed by (name, sorted label pairs)."""
+
+    def __init__(self):
+        self._histograms: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Histogram] = {}
+        self._counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Counter] = {}
+        self._gauges: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Gauge] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, bounds: Iterable[float], **labels: str) -> Histogram:
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram(bounds))
+        return histogram
+
+    def counter(self, name: str, **labels: str) -> Counter:
+        key = (name, tuple(sorted(labels.items())))
+        counter = self._counters.get(key)
+        if counter is None:
+            with self._lock:
+                counter = self._counters.setdefault(key, Counter())
+        return counter
+
+    def gauge(self, name: str, **labels: str) -> Gauge:
+        key = (name, tuple(sorted(labels.items())))
+        gauge = self._gauges.get(key)
+        if gauge is None:
+            with self._lock:
+                gauge = self._gauges.setdefault(key, Gauge())
+        return gauge
+
+    def collect(self) -> List[Tuple[str, Dict[str, str], Histogram]]:
+        with self._lock:
+            items = list(self._histograms.items())
+        return [(name, dict(labels), histogram) for (name, labels), histogram in items]
+
+    def collect_values(self) -> Tuple[List[Tuple[str, Dict[str, str], float]], ...]:
+        """(counters, gauges) as (name, labels, value) triples."""
+        with self._lock:
+            counters, gauges = list(self._counters.items()), list(self._gauges.items())
+        return (
+            [(name, dict(labels), c.value) for (name, labels), c in counters],
+            [(name, dict(labels), g.value) for (name, labels), g in gauges],
+        )
+
+    def snapshot(self) -> dict:
+        out: Dict[str, list] = {}
+        for name, labels, histogram in self.collect():
+            out.setdefault(name, []).append({"labels": labels, **histogram.snapshot()})
+        for samples in self.collect_values():
+            for name, labels, value in samples:
+                out.setdefault(name, []).append({"labels": labels, "value": value})
+        return out
+
+    def clear(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._gauges.clear()
+
+
+METRICS = MetricsRegistry()
+
+
+# -------------------------
+# Per-request DB accounting
+# -------------------------
+
+
+class RequestStats:
+    """Mutable, so DB work in threadpool threads (copied contexts) adds up here."""
+
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+_request_stats: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar(
+    "request_stats", default=None
+)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._telemetry_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._telemetry_start
+    METRICS.histogram("db.query.duration", DURATION_BUCKETS).observe(elapsed)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+
+
+def instrument_engine(engine) -> None:
+    """Attach the query hooks to a (sync or async) engine, once."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# -------------------------
+# Exporters
+# -------------------------
+
+
+class InMemoryExporter:
+    """Keeps the last `maxlen` request records (tests, /debug views)."""
+
+    def __init__(self, maxlen: int = 10_000):
+        self.records: deque = deque(maxlen=maxlen)
+
+    def export(self, record: dict) -> None:
+        self.records.append(record)
+
+    def shutdown(self) -> None:
+        pass
+
+
+class FileExporter:
+    """
+    Appends records as JSON lines. The request path only appends to a deque;
+    a background thread wakes every `interval` seconds and writes the batch
+    (waking it per record would hand it the GIL on every request).
+
+    The thread starts on the first record of each process, so building the
+    exporter has no side effects and a forked worker gets its own writer.
+    """
+
+    def __init__(self, path: str, interval: float = 1.0):
+        self.path = path
+        self.interval = interval
+        self._pending: deque = deque()
+        self._stop = threading.Event()
+        self._pid: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def export(self, record: dict) -> None:
+        if self._pid != os.getpid():
+            self._start()
+        self._pending.append(record)
+
+    def _start(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._pid = os.getpid()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="telemetry-file", daemon=True)
+        self._thread.start()
+
+    def flush(self) -> None:
+        lines = []
+        while self._pending:
+            lines.append(json.dumps(self._pending.popleft()))
+        if lines:
+            with open(self.path, "a", encoding="utf-8") as out:
+                out.write("\n".join(lines) + "\n")
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def shutdown(self) -> None:
+        if self._pid != os.getpid():
+            return
+        self._stop.set()
+        self._thread.join(timeout=5)
+        self.flush()
+
+
+class OtlpExporter:
+    """
+    Re-emits each request as an OpenTelemetry span plus histogram points,
+    shipped by the SDK's batch processors to OTEL_EXPORTER_OTLP_ENDPOINT.
+    """
+
+    def __init__(self, service_name: str = "devops-shop-api"):
+        try:
+            from opentelemetry.exporter.otlp.proto.http.metric_exporter import OTLPMetricExporter
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+            from opentelemetry.sdk.metrics import MeterProvider
+            from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
+            from opentelemetry.sdk.resources import Resource
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        except ImportError as exc:
+            raise RuntimeError(
+                "TELEMETRY_EXPORTER=otlp needs opentelemetry-sdk and "
+                "opentelemetry-exporter-otlp-proto-http"
+            ) from exc
+
+        resource = Resource.create({"service.name": service_name})
+        self._tracer_provider = TracerProvider(resource=resource)
+        self._tracer_provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+        self._meter_provider = MeterProvider(
+            resource=resource,
+            metric_readers=[PeriodicExportingMetricReader(OTLPMetricExporter())],
+        )
+        self._tracer = self._tracer_provider.get_tracer(__name__)
+        meter = self._meter_provider.get_meter(__name__)
+        self._duration = meter.create_histogram("http.server.duration", unit="ms")
+        self._db_time = meter.create_histogram("http.server.db.duration", unit="ms")
+        self._queries = meter.create_histogram("http.server.db.queries")
+
+    def export(self, record: dict) -> None:
+        attributes = {
+            "http.method": record["method"],
+            "http.route": record["route"],
+            "http.status_code": record["status"],
+        }
+        end_ns = int(record["ts"] * 1e9)
+        span = self._tracer.start_span(
+            f"{record['method']} {record['route']}",
+            start_time=end_ns - int(record["duration_ms"] * 1e6),
+            attributes={
+                **attributes,
+                "request.id": record["request_id"] or "",
+                "db.queries": record["db_queries"],
+                "db.duration_ms": record["db_ms"],
+            },
+        )
+        span.end(end_time=end_ns)
+        self._duration.record(record["duration_ms"], attributes)
+        self._db_time.record(record["db_ms"], attributes)
+        self._queries.record(record["db_queries"], attributes)
+
+    def shutdown(self) -> None:
+        self._tracer_provider.shutdown()
+        self._meter_provider.shutdown()
+
+
+def make_exporter(kind: str, path: Optional[str] = None):
+    if kind in ("", "none"):
+        return None
+    if kind == "memory":
+        return InMemoryExporter()
+    if kind == "file":
+        return FileExporter(path or "logs/telemetry.jsonl")
+    if kind == "otlp":
+        return OtlpExporter()
+    raise ValueError(f"unknown TELEMETRY_EXPORTER {kind!r}")
+
+
+# -------------------------
+# ASGI middleware
+# -------------------------
+
+
+class TelemetryMiddleware:
+    """
+    Times each HTTP request and records it under its route template
+    (/cart/{cart_id}, not /cart/42) so label cardinality stays bounded.
+    """
+
+    def __init__(self, app, registry: MetricsRegistry = METRICS, exporter=None):
+        self.app = app
+        self.registry = registry
+        self.exporter = exporter
+        self._routes: Dict[object, str] = {}
+
+    def _route_template(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return UNMATCHED_ROUTE
+        template = self._routes.get(endpoint)
+        if template is None:
+            router = scope["app"].router
+            self._routes = {
+                getattr(route, "endpoint", None): route.path for route in router.routes
+            }
+            template = self._routes.get(endpoint, UNMATCHED_ROUTE)
+        return template
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        status = 500
+        in_flight = self.registry.gauge("http.server.active_requests")
+        in_flight.inc()
+        start = time.perf_counter()
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                server_timing = f"db;dur={stats.db_seconds * 1e3:.2f};desc=\"{stats.queries} queries\""
+                message = {
+                    **message,
+                    "headers": list(message.get("headers", []))
+                    + [(b"server-timing", server_timing.encode())],
+                }
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        except Exception as exc:
+            self.registry.counter(
+                "http.server.errors", route=self._route_template(scope), exception=type(exc).__name__
+            ).inc()
+            raise
+        finally:
+            in_flight.dec()
+            _request_stats.reset(token)
+            self._record(scope, status, time.perf_counter() - start, stats)
+
+    def _record(self, scope, status: int, elapsed: float, stats: RequestStats) -> None:
+        route = self._route_template(scope)
+        labels = {"method": scope["method"], "route": route, "status": str(status)}
+        registry = self.registry
+        registry.histogram("http.server.duration", DURATION_BUCKETS, **labels).observe(elapsed)
+        registry.histogram("http.server.db.duration", DURATION_BUCKETS, route=route).observe(
+            stats.db_seconds
+        )
+        registry.histogram("http.server.db.queries", QUERY_COUNT_BUCKETS, route=route).observe(
+            stats.queries
+        )
+        if self.exporter is not None:
+            self.exporter.export(
+                {
+                    "ts": time.time(),
+                    "request_id": request_id_var.get(),
+                    "method": scope["method"],
+                    "route": route,
+                    "status": status,
+                    "duration_ms": round(elapsed * 1e3, 3),
+                    "db_queries": stats.queries,
+                    "db_ms": round(stats.db_seconds * 1e3, 3),
+                }
+            )
+
+
+# -------------------------
+# Setup
+# -------------------------
+
+
+def configure_telemetry(app, engines: Iterable = (), exporter=None, registry: MetricsRegistry = METRICS):
+    """
+    Instrument `app` and `engines`. Add this before middleware whose context
+    it should see in records (RequestIdMiddleware must wrap it). Returns the
+    exporter so callers can shut it down.
+    """
+    for engine in engines:
+        instrument_engine(engine)
+    app.add_middleware(TelemetryMiddleware, registry=registry, exporter=exporter)
+    if exporter is not None:
+        app.add_event_handler("shutdown", exporter.shutdown)
+    return exporter
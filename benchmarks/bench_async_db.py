@@ -0,0 +1,112 @@
+"""
+Load test: sustained requests/sec of the DB-backed routes, sync vs. async.
+
+Starts `uvicorn app.main:app` twice in a scratch directory (fresh sqlite
+file each time), once with ASYNC_DB=0 (threadpool) and once with
+ASYNC_DB=1 (AsyncSession + aiosqlite), and drives GET /users/{id} and
+GET /cart/{id} at high concurrency. The user/cart caches are off
+(CACHE_BACKEND=none), so every request reaches the database.
+
+The async path could pay off when each DB round-trip has real latency
+(e.g. PostgreSQL over the network), because waiting requests no longer
+hold one of the threadpool's 40 slots. Against a local sqlite file on a
+single core the queries are CPU-bound and the threadpool path is faster
+(about 160-180 vs. 130-145 req/s), which is why ASYNC_DB stays off by
+default.
+
+    python -m benchmarks.bench_async_db [--concurrency 200] [--seconds 10]
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(workdir: str, port: int, env_overrides: dict) -> subprocess.Popen:
+    env = {**os.environ, "PYTHONPATH": ROOT, **env_overrides}
+    env.pop("DATABASE_URL", None)
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app",
+         "--port", str(port), "--log-level", "warning"],
+        cwd=workdir,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+async def wait_ready(client: httpx.AsyncClient, timeout: float = 20.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError("server did not start")
+
+
+async def drive(base_url: str, concurrency: int, seconds: float) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        await wait_ready(client)
+        user = (await client.post("/users/", json={"email": "bench@example.com"})).json()
+        cart = (await client.post(f"/cart/{user['id']}")).json()
+        paths = [f"/users/{user['id']}", f"/cart/{cart['id']}"]
+
+        done = 0
+        errors = 0
+        stop = time.monotonic() + seconds
+
+        async def worker(n: int):
+            nonlocal done, errors
+            while time.monotonic() < stop:
+                r = await client.get(paths[n % len(paths)])
+                n += 1
+                if r.status_code == 200:
+                    done += 1
+                else:
+                    errors += 1
+
+        started = time.monotonic()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        elapsed = time.monotonic() - started
+    return {"rps": done / elapsed, "errors": errors}
+
+
+def run(concurrency: int, seconds: float) -> None:
+    for label, flag in (("sync (threadpool)", "0"), ("async (AsyncSession)", "1")):
+        with tempfile.TemporaryDirectory() as workdir:
+            port = free_port()
+            server = start_server(workdir, port, {"ASYNC_DB": flag, "CACHE_BACKEND": "none"})
+            try:
+                result = asyncio.run(
+                    drive(f"http://127.0.0.1:{port}", concurrency, seconds)
+                )
+            finally:
+                server.terminate()
+                server.wait()
+        print(f"{label:<22} {result['rps']:>9.1f} req/s  errors={result['errors']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+    run(args.concurrency, args.seconds)
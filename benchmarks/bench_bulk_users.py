@@ -0,0 +1,87 @@
+"""
+Benchmark: creating users one request at a time vs POST /users/import.
+
+Runs in-process against a scratch sqlite database and reports rows/sec:
+
+    one-by-one       --single POST /users/ requests (one INSERT + commit each)
+    import csv       --rows users streamed as text/csv
+    import ndjson    --rows users streamed as application/x-ndjson
+    export csv       GET /users/?format=csv of the whole table
+
+    python -m benchmarks.bench_bulk_users [--rows 50000] [--single 1000]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+
+import httpx
+
+
+def chunks(lines, size: int = 1000):
+    async def body():
+        for i in range(0, len(lines), size):
+            yield ("\n".join(lines[i:i + size]) + "\n").encode()
+
+    return body()
+
+
+async def bench(app, rows: int, single: int) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        print(f"{'mode':<14} {'rows':>8} {'seconds':>8} {'rows/sec':>10}")
+
+        start = time.perf_counter()
+        for i in range(single):
+            response = await client.post("/users/", json={"email": f"single{i}@example.com"})
+            assert response.status_code == 200, response.text
+        seconds = time.perf_counter() - start
+        print(f"{'one-by-one':<14} {single:>8,} {seconds:>8.2f} {single / seconds:>10,.0f}")
+
+        bodies = {
+            "csv": ("text/csv", ["email"] + [f"csv{i}@example.com" for i in range(rows)]),
+            "ndjson": (
+                "application/x-ndjson",
+                [json.dumps({"email": f"ndjson{i}@example.com"}) for i in range(rows)],
+            ),
+        }
+        for name, (content_type, lines) in bodies.items():
+            start = time.perf_counter()
+            response = await client.post(
+                "/users/import", content=chunks(lines), headers={"Content-Type": content_type}
+            )
+            seconds = time.perf_counter() - start
+            report = response.json()
+            assert report["inserted"] == rows, report
+            print(f"{'import ' + name:<14} {rows:>8,} {seconds:>8.2f} {rows / seconds:>10,.0f}")
+
+        start = time.perf_counter()
+        response = await client.get("/users/?format=csv")
+        seconds = time.perf_counter() - start
+        exported = response.text.count("\n") - 1
+        print(f"{'export csv':<14} {exported:>8,} {seconds:>8.2f} {exported / seconds:>10,.0f}")
+
+
+def run(args) -> None:
+    logging.disable(logging.CRITICAL)
+    os.environ.setdefault("LOG_FILE", "")
+    workdir = tempfile.mkdtemp(prefix="bench-bulk-")
+    # before anything imports app.database
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/data.db"
+
+    from app.database import engine
+    from app.main import app
+    from app.migrations import upgrade
+
+    upgrade(engine)
+    asyncio.run(bench(app, args.rows, args.single))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--single", type=int, default=1000)
+    run(parser.parse_args())
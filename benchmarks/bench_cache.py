@@ -0,0 +1,83 @@
+"""
+Benchmark: GET /users/{user_id} and GET /cart/{cart_id} with and without
+the user/cart cache.
+
+Seeds a scratch sqlite database (bench_load.seed), then replays --requests
+reads per endpoint in-process, ids drawn from --hot popular users (the
+usual skew of a shop: a few active sessions poll their cart), once per
+cache backend:
+
+    none    every read queries the database
+    local   in-process LRU (CACHE_BACKEND=local, the default)
+    redis   shared server at --redis-url (only with --redis-url; needs redis-py)
+
+    python -m benchmarks.bench_cache [--users 2000] [--hot 200] [--requests 5000]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.bench_load import seed
+
+
+async def replay(app, paths) -> list:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        latencies = []
+        for path in paths:
+            start = time.perf_counter()
+            response = await client.get(path)
+            latencies.append(time.perf_counter() - start)
+            assert response.status_code == 200, (path, response.status_code)
+    return latencies
+
+
+def run(args) -> None:
+    logging.disable(logging.CRITICAL)
+    os.environ.setdefault("LOG_FILE", "")
+    workdir = tempfile.mkdtemp(prefix="bench-cache-")
+    # before anything imports app.database
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/data.db"
+    seed(f"{workdir}/data.db", args.users, 4, 2, random.Random(42))
+
+    from app.main import app
+    from app.routers import cart, orders, users
+    from app.services.cache import make_cache
+
+    rng = random.Random(42)
+    hot = rng.sample(range(1, args.users + 1), args.hot)
+    backends = ["none", "local"] + (["redis"] if args.redis_url else [])
+
+    print(f"{'endpoint':<22} {'backend':<7} {'mean µs':>9} {'p95 µs':>9} {'hit ratio':>10}")
+    for endpoint in ("/users/{}", "/cart/{}"):
+        paths = [endpoint.format(rng.choice(hot)) for _ in range(args.requests)]
+        for backend in backends:
+            user_cache = make_cache("users", backend, args.redis_url, ttl=30)
+            cart_cache = make_cache("carts", backend, args.redis_url, ttl=30)
+            user_cache.clear()
+            cart_cache.clear()
+            users.USER_CACHE = user_cache
+            cart.CART_CACHE = orders.CART_CACHE = cart_cache
+            latencies = asyncio.run(replay(app, paths))
+            stats = (user_cache if endpoint.startswith("/users") else cart_cache).stats()
+            lookups = stats["hits"] + stats["misses"]
+            ratio = stats["hits"] / lookups if lookups else 0.0
+            p95 = statistics.quantiles(latencies, n=20)[-1]
+            print(f"GET {endpoint:<18} {backend:<7} {statistics.fmean(latencies) * 1e6:>9.0f} "
+                  f"{p95 * 1e6:>9.0f} {ratio:>10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--hot", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--redis-url", default="")
+    run(parser.parse_args())
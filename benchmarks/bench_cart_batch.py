@@ -0,0 +1,53 @@
+"""
+Benchmark: restoring a saved cart with N single add-to-cart calls vs. one
+batch call, in-process against a scratch sqlite database.
+
+    python -m benchmarks.bench_cart_batch
+"""
+import logging
+import os
+import tempfile
+import time
+
+WORKDIR = tempfile.mkdtemp(prefix="bench-cart-")
+os.environ["DATABASE_URL"] = f"sqlite:///{WORKDIR}/bench.db"
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.main import app  # noqa: E402
+from app.services.external_products import PRODUCTS  # noqa: E402
+
+
+def new_cart(client: TestClient, n: int) -> int:
+    user = client.post("/users/", json={"email": f"bench-{n}-{time.time_ns()}@example.com"}).json()
+    return client.post(f"/cart/{user['id']}").json()["id"]
+
+
+def run(sizes=(5, 20, 100), repeat: int = 5):
+    logging.disable(logging.INFO)
+    with TestClient(app) as client:
+        print(f"{'lines':>6} {'single calls (ms)':>18} {'one batch (ms)':>15} {'speedup':>8}")
+        for size in sizes:
+            lines = [
+                {"product_id": PRODUCTS[i % len(PRODUCTS)]["id"], "quantity": 1}
+                for i in range(size)
+            ]
+            single = batch = 0.0
+            for r in range(repeat):
+                cart_id = new_cart(client, r)
+                start = time.perf_counter()
+                for line in lines:
+                    client.post(f"/cart/{cart_id}/items", json=line)
+                single += time.perf_counter() - start
+
+                cart_id = new_cart(client, r)
+                start = time.perf_counter()
+                client.post(f"/cart/{cart_id}/items/batch", json=lines)
+                batch += time.perf_counter() - start
+
+            single, batch = single / repeat * 1e3, batch / repeat * 1e3
+            print(f"{size:>6} {single:>18.1f} {batch:>15.1f} {single / batch:>7.1f}x")
+
+
+if __name__ == "__main__":
+    run()
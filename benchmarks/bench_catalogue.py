@@ -0,0 +1,55 @@
+"""
+Microbenchmark: per-request cost of catalogue lookups vs. catalogue size.
+
+Compares the old linear scans over PRODUCTS with the indexed Catalogue
+for a base catalogue of 20 products scaled 10x..1000x.
+
+    python -m benchmarks.bench_catalogue
+"""
+import timeit
+
+from app.services.catalogue import Catalogue
+from app.services.external_products import PRODUCTS
+
+
+def scaled_products(factor: int):
+    """Repeat the demo catalogue `factor` times with unique ids."""
+    out = []
+    for n in range(factor):
+        for p in PRODUCTS:
+            out.append({**p, "id": n * len(PRODUCTS) + p["id"]})
+    return out
+
+
+def linear_category(products, category):
+    return [p for p in products if p["category"] == category]
+
+
+def linear_product(products, product_id):
+    for p in products:
+        if p["id"] == product_id:
+            return p
+    return None
+
+
+def run(number: int = 200):
+    print(f"{'products':>10} {'scan cat (us)':>14} {'index cat (us)':>15} "
+          f"{'scan id (us)':>13} {'index id (us)':>14}")
+    for factor in (1, 10, 100, 1000):
+        products = scaled_products(factor)
+        catalogue = Catalogue(products)
+        last_id = products[-1]["id"]
+
+        def per_call(fn):
+            return timeit.timeit(fn, number=number) / number * 1e6
+
+        scan_cat = per_call(lambda: linear_category(products, "jewelery"))
+        index_cat = per_call(lambda: catalogue.by_category_id("jewelery"))
+        scan_id = per_call(lambda: linear_product(products, last_id))
+        index_id = per_call(lambda: catalogue.get(last_id))
+        print(f"{len(products):>10} {scan_cat:>14.2f} {index_cat:>15.3f} "
+              f"{scan_id:>13.2f} {index_id:>14.3f}")
+
+
+if __name__ == "__main__":
+    run()
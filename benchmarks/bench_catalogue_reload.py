@@ -0,0 +1,141 @@
+"""
+Benchmark: catalogue reload time and per-worker memory with a preloaded,
+shared catalogue.
+
+Writes a --products catalogue file, then:
+
+1. reload time: CatalogueStore.reload() after the file is replaced
+   (parse + validate + build every index, then the swap);
+2. per-worker memory: like `gunicorn --preload`, the parent loads the
+   catalogue and forks --workers children; each child serves a mix of
+   lookups, listings and searches, then reports its RSS, PSS (shared pages
+   split between processes) and private memory from /proc/self/smaps_rollup.
+   Compared: children loading their own copy, sharing the parent's, sharing
+   it after gc.freeze() (what gunicorn.conf.py does), and sharing children
+   that have since reloaded (each holds a private copy again).
+
+Linux only (fork, /proc).
+
+    python -m benchmarks.bench_catalogue_reload [--products 100000] [--workers 4]
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import tempfile
+import time
+
+from app.services.catalogue_store import CatalogueStore, load_catalogue
+from app.services.external_products import PRODUCTS
+
+
+def write_catalogue(path: str, count: int, version: str, rng: random.Random) -> None:
+    products = []
+    for i in range(1, count + 1):
+        base = rng.choice(PRODUCTS)
+        products.append({**base, "id": i, "title": f"{base['title']} #{i}",
+                         "price": round(rng.uniform(1, 1000), 2)})
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"version": version, "products": products}, f)
+    os.replace(tmp, path)
+
+
+def memory_mb() -> dict:
+    fields = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {
+        "rss": fields["Rss"],
+        "pss": fields["Pss"],
+        "private": fields["Private_Clean"] + fields["Private_Dirty"],
+    }
+
+
+def serve(catalogue, rng: random.Random) -> None:
+    """A worker's request mix, touching the catalogue like the routes do."""
+    for category in catalogue.categories:
+        catalogue.by_category(category)
+        catalogue.listing(category, max_price=500, sort="price")
+    for _ in range(2000):
+        catalogue.get(rng.randint(1, len(catalogue)))
+    for query in ("jacket", "gold ring", "ssd", "women cot"):
+        catalogue.search(query)
+    gc.collect()
+
+
+def fork_workers(workers: int, child) -> list:
+    """Run child() in `workers` forked processes at once; their memory_mb()."""
+    pipes = []
+    for _ in range(workers):
+        read, write = os.pipe()
+        if os.fork() == 0:
+            os.close(read)
+            child()
+            with os.fdopen(write, "w") as out:
+                out.write(json.dumps(memory_mb()))
+                out.flush()
+                # stay alive until every sibling has measured (PSS is shared with them)
+                time.sleep(2)
+            os._exit(0)
+        os.close(write)
+        pipes.append(read)
+    results = []
+    for read in pipes:
+        with os.fdopen(read) as f:
+            results.append(json.loads(f.read()))
+    for _ in pipes:
+        os.wait()
+    return results
+
+
+def run(count: int, workers: int) -> None:
+    workdir = tempfile.mkdtemp(prefix="bench-catalogue-")
+    path = os.path.join(workdir, "catalogue.json")
+    write_catalogue(path, count, "v1", random.Random(1))
+    size = os.path.getsize(path) / 1e6
+
+    store = CatalogueStore(path, interval=0)
+    write_catalogue(path, count, "v2", random.Random(2))
+    start = time.perf_counter()
+    assert store.reload()
+    print(f"{count:,} products, {size:.1f} MB file: reload + swap in {(time.perf_counter() - start) * 1e3:.0f} ms")
+    start = time.perf_counter()
+    assert not store.reload()
+    print(f"unchanged-file check: {(time.perf_counter() - start) * 1e6:.0f} µs\n")
+    del store
+    gc.collect()
+
+    def own_copy():
+        serve(load_catalogue(path), random.Random(os.getpid()))
+
+    def cases():
+        catalogue = load_catalogue(path)
+        yield "own copy per worker", own_copy
+        yield "shared (preload)", lambda: serve(catalogue, random.Random(os.getpid()))
+        gc.freeze()
+        yield "shared + gc.freeze", lambda: serve(catalogue, random.Random(os.getpid()))
+
+        def reloaded():
+            serve(catalogue, random.Random(os.getpid()))
+            serve(load_catalogue(path), random.Random(os.getpid()))
+
+        yield "shared, then reloaded", reloaded
+
+    print(f"{'per worker (MB)':<24} {'RSS':>8} {'PSS':>8} {'private':>8}   ({workers} workers)")
+    for label, child in cases():
+        results = fork_workers(workers, child)
+        avg = {k: sum(r[k] for r in results) / len(results) for k in ("rss", "pss", "private")}
+        print(f"{label:<24} {avg['rss']:>8.1f} {avg['pss']:>8.1f} {avg['private']:>8.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+    run(args.products, args.workers)
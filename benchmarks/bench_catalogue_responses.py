@@ -0,0 +1,55 @@
+"""
+Microbenchmark: per-request cost of rendering a category listing.
+
+Compares FastAPI's default path (jsonable_encoder + JSONResponse) with the
+pre-serialized ResponseCache, at the demo catalogue size and scaled up.
+
+    python -m benchmarks.bench_catalogue_responses
+"""
+import timeit
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from starlette.requests import Request
+
+from app.services.catalogue import Catalogue
+from app.services.response_cache import ResponseCache
+from benchmarks.bench_catalogue import scaled_products
+
+
+def make_request(headers=()):
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/products/category/jewelery",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers],
+    }
+    return Request(scope)
+
+
+def run(number: int = 2000):
+    print(f"{'products':>10} {'default (us)':>13} {'cached (us)':>12} {'304 (us)':>9}")
+    for factor in (1, 10, 100):
+        catalogue = Catalogue(scaled_products(factor))
+        cache = ResponseCache()
+        render = lambda: list(catalogue.by_category("jewelery"))  # noqa: E731
+
+        plain = make_request()
+        etag = cache.payload("jewelery", catalogue.version, render).etag
+        conditional = make_request([("If-None-Match", etag)])
+
+        def per_call(fn):
+            return timeit.timeit(fn, number=number) / number * 1e6
+
+        default = per_call(lambda: JSONResponse(jsonable_encoder(render())))
+        cached = per_call(
+            lambda: cache.response(plain, "jewelery", catalogue.version, render)
+        )
+        not_modified = per_call(
+            lambda: cache.response(conditional, "jewelery", catalogue.version, render)
+        )
+        print(f"{len(catalogue):>10} {default:>13.1f} {cached:>12.1f} {not_modified:>9.1f}")
+
+
+if __name__ == "__main__":
+    run()
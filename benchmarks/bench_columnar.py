@@ -0,0 +1,98 @@
+"""
+Benchmark: price-range filter + sort + currency conversion on 1M products,
+pure Python over the list of dicts vs. the NumPy price columns.
+
+Both sides return the matching products' positions in the requested order
+with their converted prices; building the product dicts of the response is
+left out (the same for both, and bounded by what a page shows).
+
+    python -m benchmarks.bench_columnar [--products 1000000] [--repeat 5]
+"""
+import argparse
+import random
+import time
+from typing import Dict, List, Optional
+
+from app.services.columnar import PriceColumns
+from app.services.external_products import PRODUCTS
+
+RATES = {"USD": 1.08}
+
+QUERIES = [
+    # (label, category, min_price, max_price, sort, currency)
+    ("category, range, price asc", "electronics", 50, 500, "price", None),
+    ("category, range, USD", "jewelery", 10, 100, "-price", "USD"),
+    ("all, range, price desc", None, 0, 100, "-price", None),
+    ("category, sort by id", "men's clothing", None, None, "-id", None),
+]
+
+
+def synthetic_products(count: int, rng: random.Random) -> List[Dict]:
+    out = []
+    for i in range(1, count + 1):
+        base = rng.choice(PRODUCTS)
+        out.append({**base, "id": i, "price": round(rng.uniform(1, 1000), 2)})
+    return out
+
+
+def python_select(
+    products: List[Dict],
+    category: Optional[str],
+    min_price: Optional[float],
+    max_price: Optional[float],
+    sort: Optional[str],
+    currency: Optional[str],
+):
+    rate = RATES[currency] if currency else 1.0
+    hits = []
+    for i, p in enumerate(products):
+        if category is not None and p["category"] != category:
+            continue
+        price = round(p["price"] * rate, 2)
+        if min_price is not None and price < min_price:
+            continue
+        if max_price is not None and price > max_price:
+            continue
+        hits.append((i, price))
+    if sort:
+        field = (lambda h: h[1]) if sort.endswith("price") else (lambda h: products[h[0]]["id"])
+        hits.sort(key=field, reverse=sort.startswith("-"))
+    return hits
+
+
+def best_of(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1e3
+
+
+def run(count: int, repeat: int) -> None:
+    products = synthetic_products(count, random.Random(42))
+    start = time.perf_counter()
+    columns = PriceColumns(products, currency="EUR", rates=RATES)
+    print(f"built columns for {count:,} products in {(time.perf_counter() - start) * 1e3:.0f} ms")
+    start = time.perf_counter()
+    columns.prices_in("USD")
+    print(f"converted all prices to USD in {(time.perf_counter() - start) * 1e3:.1f} ms (then cached)\n")
+
+    print(f"{'query':<28} {'matches':>9} {'python ms':>10} {'numpy ms':>9} {'speed-up':>9}")
+    for label, *query in QUERIES:
+        rows, prices = columns.select(*query)
+        expected = python_select(products, *query)
+        assert len(rows) == len(expected)
+        # half-cent ties may sort a product by one position differently; compare prices
+        assert all(abs(a - b[1]) < 0.011 for a, b in zip(prices.tolist(), expected))
+        t_python = best_of(lambda: python_select(products, *query), max(1, repeat // 2))
+        t_numpy = best_of(lambda: columns.select(*query), repeat)
+        print(f"{label:<28} {len(rows):>9,} {t_python:>10.1f} {t_numpy:>9.2f} {t_python / t_numpy:>8.0f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.products, args.repeat)
@@ -0,0 +1,93 @@
+"""
+Benchmark: bytes on the wire and server CPU per request for catalogue
+listings and order history, by Accept-Encoding and ?fields=.
+
+Scales the catalogue to --products products (4 categories), seeds a
+scratch sqlite database with one user with --orders orders, then replays
+--requests requests per case in-process and reads the raw (still
+compressed) bodies:
+
+    cached        category listing from the ResponseCache (precompressed
+                  once per catalogue version)
+    per request   sorted listing / order history, compressed as it is sent
+                  by CompressionMiddleware
+    fields        ?fields=title,price,image (what the product grid shows),
+                  ?fields=id,total_cents for orders
+
+    python -m benchmarks.bench_compression [--products 2000] [--orders 100] [--requests 200]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import tempfile
+import time
+
+import httpx
+
+ENCODINGS = ("identity", "gzip", "br")
+
+
+async def measure(app, path: str, encoding: str, requests: int):
+    """(bytes sent per response, server + client CPU ms per request)."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        headers = {"Accept-Encoding": encoding}
+        sent = 0
+        start = time.process_time()
+        for _ in range(requests):
+            async with client.stream("GET", path, headers=headers) as response:
+                assert response.status_code == 200, (path, response.status_code)
+                sent = 0
+                async for chunk in response.aiter_raw():
+                    sent += len(chunk)
+        return sent, (time.process_time() - start) / requests * 1e3
+
+
+def run(args) -> None:
+    logging.disable(logging.CRITICAL)
+    os.environ.setdefault("LOG_FILE", "")
+    os.environ.setdefault("TELEMETRY", "0")
+    workdir = tempfile.mkdtemp(prefix="bench-compression-")
+    # before anything imports app.database
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/data.db"
+
+    from app.compression import ENCODINGS as AVAILABLE
+    from app.main import app
+    from app.services.catalogue_store import load_catalogue
+    from app.services.external_products import CATALOGUE_STORE
+    from benchmarks.bench_catalogue_reload import write_catalogue
+    from benchmarks.bench_order_history import seed
+
+    rng = random.Random(42)
+    seed(f"{workdir}/data.db", 1, args.orders, 3, rng)
+    write_catalogue(f"{workdir}/catalogue.json", args.products, "bench", rng)
+    CATALOGUE_STORE.current = load_catalogue(f"{workdir}/catalogue.json")
+
+    grid = "fields=title,price,image"
+    cases = [
+        ("category (cached)", "/products/category/electronics"),
+        ("  + fields", f"/products/category/electronics?{grid}"),
+        ("sorted (per request)", "/products/category/electronics?sort=price"),
+        ("  + fields", f"/products/category/electronics?sort=price&{grid}"),
+        (f"orders+items, {min(args.orders, 100)}", "/orders/user/1?items=true&limit=100"),
+        ("  fields=id,total_cents", "/orders/user/1?fields=id,total_cents&limit=100"),
+    ]
+    encodings = [e for e in ENCODINGS if e == "identity" or e in AVAILABLE]
+    print(f"{args.products:,} products, {args.requests} requests per case; bytes per response / CPU ms per request\n")
+    print(f"{'response':<24}" + "".join(f"{e:>20}" for e in encodings))
+    for name, path in cases:
+        cells = []
+        for encoding in encodings:
+            sent, cpu_ms = asyncio.run(measure(app, path, encoding, args.requests))
+            cells.append(f"{sent:>10,} {cpu_ms:>6.2f} ms")
+        print(f"{name:<24}" + "".join(f"{c:>20}" for c in cells))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--orders", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=200)
+    run(parser.parse_args())
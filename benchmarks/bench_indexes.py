@@ -0,0 +1,115 @@
+"""
+Benchmark: cart/order lookups with and without the migration-2 indexes.
+
+Seeds a legacy-schema sqlite database (no lookup indexes) with
+--items cart items (10 per cart, one cart per user) and as many orders,
+copies it, runs `app.migrations.upgrade` on the copy, then times
+_get_or_create_cart_for_user and get_orders_for_user on both.
+
+    python -m benchmarks.bench_indexes [--items 1000000] [--lookups 200]
+"""
+import argparse
+import logging
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from sqlalchemy import MetaData, create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.migrations import upgrade
+from app.routers.cart import _get_or_create_cart_for_user
+from app.routers.orders import _get_orders_for_user
+
+ITEMS_PER_CART = 10
+
+
+def seed(path: str, items: int) -> int:
+    engine = create_engine(f"sqlite:///{path}")
+    legacy = MetaData()
+    for table in Base.metadata.sorted_tables:
+        table.to_metadata(legacy).indexes.clear()
+    legacy.create_all(bind=engine)
+
+    users = max(items // ITEMS_PER_CART, 1)
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "INSERT INTO users (id, email) VALUES (?, ?)",
+            [(i, f"user{i}@example.com") for i in range(1, users + 1)],
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO products (id, title, price) VALUES (?, ?, ?)",
+            [(i, f"Product {i}", 1.0) for i in range(1, ITEMS_PER_CART + 1)],
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO carts (id, user_id) VALUES (?, ?)",
+            [(i, i) for i in range(1, users + 1)],
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO cart_items (cart_id, product_id, quantity) VALUES (?, ?, 1)",
+            [(c, p) for c in range(1, users + 1) for p in range(1, ITEMS_PER_CART + 1)],
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO orders (user_id, total, total_cents) VALUES (?, 10.0, 1000)",
+            [(random.randint(1, users),) for _ in range(items)],
+        )
+    engine.dispose()
+    return users
+
+
+def time_lookups(path: str, user_ids) -> dict:
+    engine = create_engine(f"sqlite:///{path}")
+    Session = sessionmaker(bind=engine)
+    result = {}
+    for name, fn in (
+        ("_get_or_create_cart_for_user", _get_or_create_cart_for_user),
+        ("get_orders_for_user", _get_orders_for_user),
+    ):
+        with Session() as db:
+            start = time.perf_counter()
+            for uid in user_ids:
+                fn(db, uid)
+                db.expunge_all()
+            result[name] = (time.perf_counter() - start) / len(user_ids) * 1e3
+    engine.dispose()
+    return result
+
+
+def run(items: int, lookups: int) -> None:
+    logging.disable(logging.INFO)
+    workdir = tempfile.mkdtemp(prefix="bench-indexes-")
+    try:
+        before = os.path.join(workdir, "before.db")
+        after = os.path.join(workdir, "after.db")
+
+        start = time.perf_counter()
+        users = seed(before, items)
+        print(f"seeded {items:,} cart items / orders for {users:,} users "
+              f"in {time.perf_counter() - start:.1f}s")
+
+        shutil.copy(before, after)
+        engine = create_engine(f"sqlite:///{after}")
+        start = time.perf_counter()
+        upgrade(engine)
+        engine.dispose()
+        print(f"migration on the copy took {time.perf_counter() - start:.1f}s")
+
+        user_ids = [random.randint(1, users) for _ in range(lookups)]
+        slow = time_lookups(before, user_ids)
+        fast = time_lookups(after, user_ids)
+        print(f"{'lookup':<30} {'no index (ms)':>14} {'indexed (ms)':>13}")
+        for name in slow:
+            print(f"{name:<30} {slow[name]:>14.3f} {fast[name]:>13.3f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=200)
+    args = parser.parse_args()
+    run(args.items, args.lookups)
@@ -0,0 +1,350 @@
+"""
+Load test: the frontend's call pattern against the shop API, with
+per-endpoint p50/p95/p99 latency and requests/sec, and a JSON baseline to
+compare runs against.
+
+Seeds a scratch sqlite database (--users users, each with a cart of
+--items-per-cart lines and --orders-per-user orders), then runs
+--concurrency virtual users for --seconds. Each virtual user loops over a
+weighted mix of scenarios (seeded RNG, so runs are repeatable):
+
+  browse     GET /products/categories -> GET /products/category/{category}
+  shop       browse -> POST /users/ -> POST /cart/{user_id}
+             -> POST /cart/{cart_id}/items (x1-4) -> POST /orders/{user_id}
+             -> GET /orders/user/{user_id}
+  returning  GET /users/{user_id} -> POST /cart/{user_id} -> GET /cart/{cart_id}
+             -> GET /orders/user/{user_id}  (a seeded user)
+
+Targets: the app in-process through httpx's ASGI transport (default), a
+local `uvicorn app.main:app` started on the seeded database, or an
+already running server (--url; nothing is seeded).
+
+    python -m benchmarks.bench_load                              # in-process
+    python -m benchmarks.bench_load --target uvicorn --seconds 30
+    python -m benchmarks.bench_load --save benchmarks/baseline.json
+    python -m benchmarks.bench_load --baseline benchmarks/baseline.json  # exit 1 on regression
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+from sqlalchemy import create_engine
+
+from app.services.external_products import PRODUCTS, current_catalogue
+
+SCENARIOS = {"browse": 6, "shop": 3, "returning": 1}
+PERCENTILES = (50, 95, 99)
+
+
+# -------------------------
+# Seeding
+# -------------------------
+
+
+def seed(path: str, users: int, items_per_cart: int, orders_per_user: int, rng: random.Random) -> None:
+    """Bulk-load users/carts/cart items/orders into a fresh sqlite file."""
+    from app.migrations import upgrade
+
+    engine = create_engine(f"sqlite:///{path}")
+    upgrade(engine)
+    product_ids = [p["id"] for p in PRODUCTS]
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "INSERT INTO products (id, title, description, price) VALUES (?, ?, ?, ?)",
+            [(p["id"], p["title"], p.get("description"), p["price"]) for p in PRODUCTS],
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO users (id, email) VALUES (?, ?)",
+            [(i, f"seed-{i}@example.com") for i in range(1, users + 1)],
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO carts (id, user_id) VALUES (?, ?)",
+            [(i, i) for i in range(1, users + 1)],
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO cart_items (cart_id, product_id, quantity) VALUES (?, ?, ?)",
+            [
+                (cart_id, product_id, rng.randint(1, 3))
+                for cart_id in range(1, users + 1)
+                for product_id in rng.sample(product_ids, min(items_per_cart, len(product_ids)))
+            ],
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO orders (user_id, total, total_cents) VALUES (?, ?, ?)",
+            [
+                (user_id, cents / 100, cents)
+                for user_id in range(1, users + 1)
+                for cents in (rng.randint(1000, 50000) for _ in range(orders_per_user))
+            ],
+        )
+    engine.dispose()
+
+
+# -------------------------
+# Virtual users
+# -------------------------
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.recording = False
+
+    async def call(self, client: httpx.AsyncClient, name: str, method: str, url: str, **kwargs):
+        start = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        elapsed = time.perf_counter() - start
+        if self.recording:
+            self.latencies[name].append(elapsed)
+            if response.status_code >= 400:
+                self.errors[name] += 1
+        return response
+
+
+async def browse(client, rec: Recorder, rng: random.Random, state: dict) -> None:
+    await rec.call(client, "GET /products/categories", "GET", "/products/categories")
+    category = rng.choice(current_catalogue().categories)
+    await rec.call(client, "GET /products/category/{category}", "GET", f"/products/category/{category}")
+
+
+async def shop(client, rec: Recorder, rng: random.Random, state: dict) -> None:
+    await browse(client, rec, rng, state)
+    state["n"] += 1
+    email = f"load-{state['vu']}-{state['n']}-{state['run']}@example.com"
+    user = (await rec.call(client, "POST /users/", "POST", "/users/", json={"email": email})).json()
+    cart = (await rec.call(client, "POST /cart/{user_id}", "POST", f"/cart/{user['id']}")).json()
+    for product in rng.sample(PRODUCTS, rng.randint(1, 4)):
+        await rec.call(
+            client,
+            "POST /cart/{cart_id}/items",
+            "POST",
+            f"/cart/{cart['id']}/items",
+            json={"product_id": product["id"], "quantity": rng.randint(1, 3)},
+        )
+    await rec.call(client, "POST /orders/{user_id}", "POST", f"/orders/{user['id']}")
+    await rec.call(client, "GET /orders/user/{user_id}", "GET", f"/orders/user/{user['id']}")
+
+
+async def returning(client, rec: Recorder, rng: random.Random, state: dict) -> None:
+    user_id = rng.randint(1, state["users"])
+    await rec.call(client, "GET /users/{user_id}", "GET", f"/users/{user_id}")
+    cart = (await rec.call(client, "POST /cart/{user_id}", "POST", f"/cart/{user_id}")).json()
+    await rec.call(client, "GET /cart/{cart_id}", "GET", f"/cart/{cart['id']}")
+    await rec.call(client, "GET /orders/user/{user_id}", "GET", f"/orders/user/{user_id}")
+
+
+FLOWS = {"browse": browse, "shop": shop, "returning": returning}
+
+
+async def drive(
+    client: httpx.AsyncClient,
+    concurrency: int,
+    seconds: float,
+    warmup: float,
+    users: int,
+    seed_value: int,
+) -> dict:
+    rec = Recorder()
+    names, weights = list(SCENARIOS), list(SCENARIOS.values())
+    run_tag = f"{seed_value}-{time.time_ns()}"
+    deadline = time.monotonic() + warmup + seconds
+
+    async def virtual_user(vu: int) -> None:
+        rng = random.Random(seed_value * 1000 + vu)
+        state = {"vu": vu, "n": 0, "users": max(users, 1), "run": run_tag}
+        while time.monotonic() < deadline:
+            flow = FLOWS[rng.choices(names, weights)[0]]
+            if flow is returning and not users:
+                flow = browse
+            await flow(client, rec, rng, state)
+
+    tasks = [asyncio.create_task(virtual_user(vu)) for vu in range(concurrency)]
+    await asyncio.sleep(warmup)
+    rec.recording = True
+    started = time.monotonic()
+    await asyncio.gather(*tasks)
+    return summarize(rec, time.monotonic() - started)
+
+
+# -------------------------
+# Report / baseline
+# -------------------------
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(pct / 100 * len(sorted_values))
+    return sorted_values[max(rank, 1) - 1]
+
+
+def summarize(rec: Recorder, elapsed: float) -> dict:
+    endpoints = {}
+    for name, values in sorted(rec.latencies.items()):
+        values.sort()
+        endpoints[name] = {
+            "count": len(values),
+            "errors": rec.errors.get(name, 0),
+            "rps": round(len(values) / elapsed, 2),
+            **{f"p{p}_ms": round(percentile(values, p) * 1e3, 3) for p in PERCENTILES},
+        }
+    everything = sorted(v for values in rec.latencies.values() for v in values)
+    total = {
+        "count": len(everything),
+        "errors": sum(rec.errors.values()),
+        "rps": round(len(everything) / elapsed, 2),
+        **{f"p{p}_ms": round(percentile(everything, p) * 1e3, 3) for p in PERCENTILES},
+    }
+    return {"elapsed_s": round(elapsed, 3), "endpoints": endpoints, "total": total}
+
+
+def print_report(result: dict, baseline: Optional[dict] = None) -> None:
+    header = f"{'endpoint':<36} {'count':>7} {'err':>5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+    if baseline:
+        header += f" {'p95 vs base':>12} {'rps vs base':>12}"
+    print(header)
+    rows = list(result["endpoints"].items()) + [("TOTAL", result["total"])]
+    for name, row in rows:
+        line = (
+            f"{name:<36} {row['count']:>7} {row['errors']:>5} {row['rps']:>8.1f} "
+            f"{row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f}"
+        )
+        if baseline:
+            base = baseline["total"] if name == "TOTAL" else baseline["endpoints"].get(name)
+            if base:
+                line += f" {_change(row['p95_ms'], base['p95_ms']):>12} {_change(row['rps'], base['rps']):>12}"
+        print(line)
+
+
+def _change(now: float, before: float) -> str:
+    return f"{(now / before - 1):+.1%}" if before else "n/a"
+
+
+def regressions(result: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Endpoints whose p95 grew, or whose req/s fell, by more than `tolerance`."""
+    found = []
+    for name, base in [*baseline["endpoints"].items(), ("TOTAL", baseline["total"])]:
+        row = result["total"] if name == "TOTAL" else result["endpoints"].get(name)
+        if row is None:
+            continue
+        if base["p95_ms"] and row["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            found.append(f"{name}: p95 {base['p95_ms']:.2f} -> {row['p95_ms']:.2f} ms")
+        if base["rps"] and row["rps"] < base["rps"] * (1 - tolerance):
+            found.append(f"{name}: {base['rps']:.1f} -> {row['rps']:.1f} req/s")
+    return found
+
+
+# -------------------------
+# Targets
+# -------------------------
+
+
+async def run_in_process(args) -> dict:
+    from app.main import app
+
+    await app.router.startup()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            return await drive(client, args.concurrency, args.seconds, args.warmup, args.users, args.seed)
+    finally:
+        await app.router.shutdown()
+
+
+async def run_against(url: str, args, users: int) -> dict:
+    from benchmarks.bench_async_db import wait_ready
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        await wait_ready(client)
+        return await drive(client, args.concurrency, args.seconds, args.warmup, users, args.seed)
+
+
+def run(args) -> int:
+    logging.disable(logging.CRITICAL)
+    os.environ.setdefault("LOG_FILE", "")
+    rng = random.Random(args.seed)
+
+    if args.url:
+        result = asyncio.run(run_against(args.url, args, args.users))
+    else:
+        workdir = tempfile.mkdtemp(prefix="bench-load-")
+        # before anything imports app.database
+        os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/data.db"
+        seed(f"{workdir}/data.db", args.users, args.items_per_cart, args.orders_per_user, rng)
+        if args.target == "uvicorn":
+            from benchmarks.bench_async_db import free_port, start_server
+
+            port = free_port()
+            server = start_server(workdir, port, {"LOG_FILE": ""})
+            try:
+                result = asyncio.run(run_against(f"http://127.0.0.1:{port}", args, args.users))
+            finally:
+                server.terminate()
+                server.wait()
+        else:
+            result = asyncio.run(run_in_process(args))
+
+    result["config"] = {
+        "target": args.url or args.target,
+        "concurrency": args.concurrency,
+        "seconds": args.seconds,
+        "users": args.users,
+        "items_per_cart": args.items_per_cart,
+        "orders_per_user": args.orders_per_user,
+        "seed": args.seed,
+        "mix": SCENARIOS,
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+    }
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as out:
+            json.dump(result, out, indent=2, sort_keys=True)
+        print(f"\nsaved baseline to {args.save}")
+
+    if baseline:
+        found = regressions(result, baseline, args.max_regression)
+        if found:
+            print(f"\nregressions beyond {args.max_regression:.0%}:")
+            for line in found:
+                print(f"  {line}")
+            return 1
+        print(f"\nno regressions beyond {args.max_regression:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--target", choices=("inprocess", "uvicorn"), default="inprocess")
+    parser.add_argument("--url", help="drive an already running server instead (no seeding)")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--items-per-cart", type=int, default=3)
+    parser.add_argument("--orders-per-user", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save", metavar="PATH", help="write the result as a JSON baseline")
+    parser.add_argument("--baseline", metavar="PATH", help="compare against a saved baseline")
+    parser.add_argument("--max-regression", type=float, default=0.25)
+    sys.exit(run(parser.parse_args()))
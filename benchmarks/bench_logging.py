@@ -0,0 +1,95 @@
+"""
+Benchmark: latency of a logging route with logging off, with the old
+synchronous handlers (format + write on the request thread) and with the
+queue-based setup from app.logging_config, against a fast sink (scratch
+file + /dev/null) and a slow one (a console that blocks ~1 ms per write,
+like a congested container stdout pipe).
+
+    python -m benchmarks.bench_logging
+"""
+import logging
+import os
+import statistics
+import tempfile
+import time
+
+WORKDIR = tempfile.mkdtemp(prefix="bench-logging-")
+os.environ["DATABASE_URL"] = f"sqlite:///{WORKDIR}/bench.db"
+os.environ["LOG_FILE"] = ""
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.logging_config import TEXT_FORMAT, RequestContextFilter, configure_logging, shutdown_logging  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+class SlowStream:
+    """A console that blocks on every write."""
+
+    def __init__(self, delay: float = 0.001):
+        self.delay = delay
+
+    def write(self, text: str) -> int:
+        time.sleep(self.delay)
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+
+def direct_handlers(path: str, stream) -> None:
+    """The previous setup: file + stream handlers attached straight to the root logger."""
+    shutdown_logging()
+    root = logging.getLogger()
+    for old in list(root.handlers):
+        root.removeHandler(old)
+    formatter = logging.Formatter(TEXT_FORMAT)
+    for handler in (logging.FileHandler(path), logging.StreamHandler(stream)):
+        handler.setFormatter(formatter)
+        handler.addFilter(RequestContextFilter())
+        root.addHandler(handler)
+    root.setLevel(logging.INFO)
+
+
+def measure(client: TestClient, cart_id: int, requests: int) -> tuple:
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        client.get(f"/cart/{cart_id}")
+        timings.append((time.perf_counter() - start) * 1e3)
+    timings.sort()
+    return statistics.mean(timings), timings[int(len(timings) * 0.99) - 1]
+
+
+def run(requests: int = 1000):
+    log_path = os.path.join(WORKDIR, "app.log")
+    devnull = open(os.devnull, "w")
+    configure_logging(log_file=None, stream=devnull)
+    with TestClient(app) as client:
+        user = client.post("/users/", json={"email": "bench-logging@example.com"}).json()
+        cart_id = client.post(f"/cart/{user['id']}").json()["id"]
+        measure(client, cart_id, 200)  # warm up
+
+        slow = SlowStream()
+        setups = {
+            "disabled": lambda: logging.disable(logging.CRITICAL),
+            "direct, fast sink": lambda: direct_handlers(log_path, devnull),
+            "queue, fast sink": lambda: configure_logging(log_file=log_path, stream=devnull),
+            "direct, slow sink": lambda: direct_handlers(log_path, slow),
+            "queue, slow sink": lambda: configure_logging(log_file=log_path, stream=slow),
+            "queue, slow sink, 10% sampled": lambda: configure_logging(
+                log_file=log_path, stream=slow, sample_rate=0.1
+            ),
+        }
+        print(f"{'setup':<30} {'mean (ms)':>10} {'p99 (ms)':>10}")
+        for name, setup in setups.items():
+            logging.disable(logging.NOTSET)
+            setup()
+            mean, p99 = measure(client, cart_id, requests)
+            shutdown_logging()  # drain the queue before the next setup
+            print(f"{name:<30} {mean:>10.3f} {p99:>10.3f}")
+    shutdown_logging()
+
+
+if __name__ == "__main__":
+    run()
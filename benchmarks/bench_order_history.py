@@ -0,0 +1,126 @@
+"""
+Benchmark: order history with line items for users with thousands of orders.
+
+Seeds a scratch sqlite database with --users users, each with --orders
+orders of --lines lines, then times one page of GET /orders/user/{user_id}
+per user (_get_orders_for_user) at each --page size:
+
+    plain      orders only (no lines)
+    lazy       lines loaded per order on access (1 + N queries)
+    selectin   lines in a second query (SELECT ... WHERE order_id IN ...)
+    joined     orders + lines in one query (what items=true uses)
+
+    python -m benchmarks.bench_order_history [--users 20] [--orders 5000] [--lines 3]
+"""
+import argparse
+import logging
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import selectinload, sessionmaker
+
+from app.database import Order
+from app.migrations import upgrade
+from app.pagination import keyset_page
+from app.routers.orders import _get_orders_for_user
+from app.schemas import OrderWithItems
+
+
+def seed(path: str, users: int, orders: int, lines: int, rng: random.Random) -> None:
+    engine = create_engine(f"sqlite:///{path}")
+    upgrade(engine)
+    products = 50
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "INSERT INTO products (id, title, price) VALUES (?, ?, ?)",
+            [(i, f"Product {i}", round(rng.uniform(1, 200), 2)) for i in range(1, products + 1)],
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO users (id, email) VALUES (?, ?)",
+            [(i, f"user{i}@example.com") for i in range(1, users + 1)],
+        )
+        order_rows, line_rows = [], []
+        order_id = 0
+        for user_id in range(1, users + 1):
+            for _ in range(orders):
+                order_id += 1
+                cents = 0
+                for product_id in rng.sample(range(1, products + 1), lines):
+                    quantity, unit = rng.randint(1, 3), rng.randint(100, 20000)
+                    cents += quantity * unit
+                    line_rows.append((order_id, product_id, f"Product {product_id}", quantity, unit))
+                order_rows.append((order_id, user_id, cents / 100, cents))
+        conn.exec_driver_sql(
+            "INSERT INTO orders (id, user_id, total, total_cents) VALUES (?, ?, ?, ?)", order_rows
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO order_items (order_id, product_id, title, quantity, unit_price_cents) "
+            "VALUES (?, ?, ?, ?, ?)",
+            line_rows,
+        )
+    engine.dispose()
+
+
+def _page_with(option):
+    def page(db, user_id, limit):
+        query = db.query(Order).filter(Order.user_id == user_id)
+        if option is not None:
+            query = query.options(option)
+        orders, _ = keyset_page(query, Order.id, None, limit)
+        return [OrderWithItems.from_orm(o) for o in orders]
+
+    return page
+
+
+VARIANTS = {
+    "plain": lambda db, user_id, limit: _get_orders_for_user(db, user_id, None, limit),
+    "lazy": _page_with(None),
+    "selectin": _page_with(selectinload(Order.items)),
+    "joined": lambda db, user_id, limit: _get_orders_for_user(db, user_id, None, limit, True),
+}
+
+
+def run(users: int, orders: int, lines: int, pages) -> None:
+    logging.disable(logging.INFO)
+    workdir = tempfile.mkdtemp(prefix="bench-orders-")
+    try:
+        path = os.path.join(workdir, "orders.db")
+        start = time.perf_counter()
+        seed(path, users, orders, lines, random.Random(42))
+        print(f"seeded {users} users x {orders:,} orders x {lines} lines "
+              f"in {time.perf_counter() - start:.1f}s")
+
+        engine = create_engine(f"sqlite:///{path}")
+        Session = sessionmaker(bind=engine)
+        statements = []
+        event.listen(engine, "before_cursor_execute", lambda *args: statements.append(1))
+
+        print(f"{'page':>6} {'variant':<10} {'ms/page':>9} {'queries':>8}")
+        for limit in pages:
+            for name, fetch in VARIANTS.items():
+                elapsed, queries = 0.0, 0
+                for user_id in range(1, users + 1):
+                    with Session() as db:
+                        statements.clear()
+                        start = time.perf_counter()
+                        fetch(db, user_id, limit)
+                        elapsed += time.perf_counter() - start
+                        queries += len(statements)
+                print(f"{limit:>6} {name:<10} {elapsed / users * 1e3:>9.2f} {queries / users:>8.0f}")
+        engine.dispose()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--orders", type=int, default=5000)
+    parser.add_argument("--lines", type=int, default=3)
+    parser.add_argument("--page", type=int, nargs="+", default=[100, 1000])
+    args = parser.parse_args()
+    run(args.users, args.orders, args.lines, args.page)
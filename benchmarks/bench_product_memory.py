@@ -0,0 +1,87 @@
+"""
+Benchmark: memory per product, plain dicts vs. ProductRecords vs. the
+struct-of-arrays ColumnStore, and what it costs per lookup.
+
+Builds --products synthetic products (unique titles, as in a real shop),
+decodes them from JSON like the catalogue loader does, and measures with
+tracemalloc the memory held by the products alone, then by a whole
+Catalogue (all its indexes) for each CATALOGUE_STORAGE.
+
+    python -m benchmarks.bench_product_memory [--products 100000]
+"""
+import argparse
+import gc
+import json
+import random
+import time
+import tracemalloc
+
+from app.services.catalogue import Catalogue
+from app.services.external_products import PRODUCTS
+from app.services.records import ColumnStore, RecordStore
+from app.services.response_cache import render_json
+
+
+def source_json(count: int, rng: random.Random) -> str:
+    products = []
+    for i in range(1, count + 1):
+        base = rng.choice(PRODUCTS).as_dict()
+        products.append({**base, "id": i, "title": f"{base['title']} #{i}",
+                         "price": round(rng.uniform(1, 1000), 2)})
+    return json.dumps(products)
+
+
+def held_bytes(build):
+    """(result, bytes still allocated once `build()` returned)."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def per_call_us(fn, number: int) -> float:
+    start = time.perf_counter()
+    for _ in range(number):
+        fn()
+    return (time.perf_counter() - start) / number * 1e6
+
+
+def run(count: int) -> None:
+    source = source_json(count, random.Random(42))
+    dicts, dict_bytes = held_bytes(lambda: json.loads(source))
+    by_id = {p["id"]: p for p in dicts}
+
+    stores = {"dicts": (dicts, dict_bytes, by_id.get)}
+    for name, store_class in (("records", RecordStore), ("columns", ColumnStore)):
+        store, size = held_bytes(lambda: store_class(json.loads(source)))
+        assert render_json(list(store[:1000])) == render_json(dicts[:1000])
+        stores[name] = (store, size, store.get)
+
+    rng = random.Random(1)
+    ids = [rng.randint(1, count) for _ in range(10_000)]
+    print(f"{count:,} products\n")
+    print(f"{'storage':<10} {'bytes/product':>14} {'vs dicts':>9} {'get(id) µs':>11} {'to JSON, 100 (µs)':>18}")
+    for name, (store, size, get) in stores.items():
+        it = iter(ids * 2)
+        lookup = per_call_us(lambda: get(next(it)), len(ids))
+        page = [get(i) for i in ids[:100]]
+        encode = per_call_us(lambda: render_json(page), 200)
+        print(f"{name:<10} {size / count:>14.0f} {size / dict_bytes:>8.0%} {lookup:>11.2f} {encode:>18.0f}")
+    del stores, dicts, by_id
+    gc.collect()
+
+    print(f"\n{'whole Catalogue':<16} {'bytes/product':>14}   (products + id/category/search/price indexes)")
+    for storage in ("records", "columns"):
+        catalogue, size = held_bytes(lambda: Catalogue(json.loads(source), storage=storage))
+        print(f"{storage:<16} {size / count:>14.0f}")
+        del catalogue
+        gc.collect()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--products", type=int, default=100_000)
+    args = parser.parse_args()
+    run(args.products)
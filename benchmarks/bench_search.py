@@ -0,0 +1,99 @@
+"""
+Benchmark: /products/search on a 100k-product catalogue, inverted index
+vs. a linear substring scan.
+
+Products are synthesised from the words of the demo catalogue (random
+titles and descriptions, plus a model number), so terms are spread over
+the catalogue like in a real shop instead of repeating 20 products. Each
+query runs through:
+
+    scan    every query word must appear in title + description
+            (lower-cased substring test per product, then sorted by
+            how often the words occur)
+    index   SearchIndex.search (BM25, last word as prefix)
+
+    python -m benchmarks.bench_search [--products 100000] [--repeat 20]
+"""
+import argparse
+import random
+import statistics
+import time
+from typing import Dict, List
+
+from app.services.external_products import PRODUCTS
+from app.services.search import SearchIndex, tokenize
+
+QUERIES = [
+    "jacket",
+    "women jacket",
+    "ssd",
+    "gold ring",
+    "cotton",
+    "gaming monitor",
+    "wom",  # autocomplete while typing
+    "slim fit t",
+    "x100",
+]
+
+
+def synthetic_products(count: int, rng: random.Random) -> List[Dict]:
+    title_words = sorted({w for p in PRODUCTS for w in p["title"].split()})
+    description_words = sorted({w for p in PRODUCTS for w in p["description"].split()})
+    out = []
+    for i in range(1, count + 1):
+        base = rng.choice(PRODUCTS)
+        title = " ".join(rng.sample(title_words, rng.randint(3, 7)))
+        description = " ".join(rng.sample(description_words, rng.randint(6, 12)))
+        out.append({**base, "id": i, "title": f"{title} X{i}", "description": description})
+    return out
+
+
+def linear_search(products: List[Dict], query: str, limit: int = 20) -> List[Dict]:
+    words = query.lower().split()
+    hits = []
+    for p in products:
+        text = (p["title"] + " " + p["description"]).lower()
+        if all(w in text for w in words):
+            hits.append((sum(text.count(w) for w in words), p))
+    hits.sort(key=lambda h: -h[0])
+    return [p for _, p in hits[:limit]]
+
+
+def timed(fn, repeat: int) -> List[float]:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def run(count: int, repeat: int) -> None:
+    products = synthetic_products(count, random.Random(42))
+    start = time.perf_counter()
+    index = SearchIndex(products)
+    print(f"built index over {count:,} products in {time.perf_counter() - start:.2f} s "
+          f"({len(index._postings):,} terms)\n")
+
+    print(f"{'query':<16} {'matches':>8} {'scan ms':>9} {'index ms':>9} {'index p95':>10}")
+    all_index = []
+    for query in QUERIES:
+        total, _ = index.search(query)
+        scan = timed(lambda: linear_search(products, query), max(1, repeat // 10))
+        # first call of a prefix builds its merged postings; time a cold and warm mix
+        index._prefixes.clear()
+        fast = timed(lambda: index.search(query), repeat)
+        all_index += fast
+        p95 = statistics.quantiles(fast, n=20)[-1] if len(fast) > 1 else fast[0]
+        print(f"{query:<16} {total:>8,} {statistics.fmean(scan) * 1e3:>9.1f} "
+              f"{statistics.fmean(fast) * 1e3:>9.2f} {p95 * 1e3:>10.2f}")
+    print(f"\nindex, all queries: mean {statistics.fmean(all_index) * 1e3:.2f} ms, "
+          f"max {max(all_index) * 1e3:.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    run(args.products, args.repeat)
@@ -0,0 +1,86 @@
+"""
+Benchmark: response serialization for a 500-item cart and a 10k-user list.
+
+Times the path from loaded ORM objects to response bytes (no DB, no HTTP):
+
+    before   Schema.from_orm -> FastAPI response_model validation +
+             jsonable_encoder -> JSONResponse (stdlib json)
+    after    app.serializers (construct, no validation) -> FastJSONResponse
+             (orjson), as routers in FAST_JSON_ROUTERS do
+
+    python -m benchmarks.bench_serialization [--items 500] [--users 10000] [--repeat 20]
+"""
+import argparse
+import asyncio
+import time
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app import serializers
+from app.database import Cart, CartItem, User
+from app.schemas import Cart as CartSchema
+from app.schemas import User as UserSchema
+
+
+def before(schema, response_type, rows):
+    field = create_response_field(name="response", type_=response_type)
+
+    def render():
+        if isinstance(rows, list):
+            content = [schema.from_orm(row) for row in rows]
+        else:
+            content = schema.from_orm(rows)
+        encoded = asyncio.run(serialize_response(field=field, response_content=content))
+        return JSONResponse(encoded).body
+
+    return render
+
+
+def after(serialize, rows):
+    def render():
+        if isinstance(rows, list):
+            content = [serialize(row) for row in rows]
+        else:
+            content = serialize(rows)
+        return serializers.FastJSONResponse(content).body
+
+    return render
+
+
+def best_of(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1e3
+
+
+def run(items: int, users: int, repeat: int) -> None:
+    cart = Cart(id=1, items=[CartItem(id=i, product_id=i, quantity=2) for i in range(1, items + 1)])
+    user_rows = [User(id=i, email=f"user{i}@example.com") for i in range(1, users + 1)]
+    cases = [
+        (f"cart, {items} items", before(CartSchema, CartSchema, cart), after(serializers.cart, cart)),
+        (
+            f"users, {users:,} rows",
+            before(UserSchema, List[UserSchema], user_rows),
+            after(serializers.user, user_rows),
+        ),
+    ]
+    print(f"{'response':<22} {'before (ms)':>12} {'after (ms)':>11} {'speed-up':>9}")
+    for name, slow, fast in cases:
+        assert slow() == fast()  # byte-identical bodies
+        t_slow, t_fast = best_of(slow, repeat), best_of(fast, repeat)
+        print(f"{name:<22} {t_slow:>12.2f} {t_fast:>11.2f} {t_slow / t_fast:>8.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    run(args.items, args.users, args.repeat)
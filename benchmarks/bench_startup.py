@@ -0,0 +1,123 @@
+"""
+Benchmark: cold start of the shop API.
+
+  - import: `import app.main` in a fresh interpreter (best of --repeat)
+  - time to first request per worker: starts Gunicorn (UvicornWorker) with
+    --workers N on a fresh sqlite file, with and without --preload, and
+    polls GET /health/pool over new connections; each response carries the
+    answering worker's pid, so the first response seen from every pid gives
+    that worker's time-to-first-request (from spawning the master)
+
+    python -m benchmarks.bench_startup [--workers 2] [--repeat 3] [--root PATH]
+
+--root runs another checkout (e.g. a `git worktree` of an older commit)
+for before/after comparisons.
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_async_db import free_port
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_time(root: str, repeat: int) -> float:
+    code = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+    times = []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as workdir:
+            out = subprocess.run(
+                [sys.executable, "-c", code],
+                cwd=workdir,
+                env={**os.environ, "PYTHONPATH": root, "LOG_FILE": ""},
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+        times.append(float(out.stdout.strip().splitlines()[-1]))
+    return min(times) * 1e3
+
+
+def worker_pid(port: int):
+    """
+    GET /health/pool over a fresh connection, with a raw socket: an HTTP
+    client would spend more CPU per poll than the workers being timed.
+    """
+    try:
+        with socket.create_connection(("127.0.0.1", port), timeout=5) as sock:
+            sock.sendall(b"GET /health/pool HTTP/1.1\r\nHost: bench\r\nConnection: close\r\n\r\n")
+            data = b""
+            while chunk := sock.recv(65536):
+                data += chunk
+    except OSError:
+        return None
+    head, _, body = data.partition(b"\r\n\r\n")
+    if not head.startswith(b"HTTP/1.1 200"):
+        return None
+    return json.loads(body)["pid"]
+
+
+def first_request_per_worker(root: str, workers: int, preload: bool, timeout: float = 60.0) -> list:
+    with tempfile.TemporaryDirectory() as workdir:
+        port = free_port()
+        config = os.path.join(root, "gunicorn.conf.py")
+        cmd = [sys.executable, "-m", "gunicorn", "--workers", str(workers),
+               "--bind", f"127.0.0.1:{port}", "--log-level", "warning"]
+        if os.path.exists(config):
+            cmd += ["-c", config]
+        else:
+            cmd += ["-k", "uvicorn.workers.UvicornWorker"]
+        if preload:
+            cmd.append("--preload")
+        cmd.append("app.main:app")
+
+        env = {**os.environ, "PYTHONPATH": root, "LOG_FILE": "", "WEB_CONCURRENCY": str(workers)}
+        env.pop("DATABASE_URL", None)
+        started = time.perf_counter()
+        server = subprocess.Popen(cmd, cwd=workdir, env=env,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        seen = {}
+        try:
+            deadline = started + timeout
+            while len(seen) < workers and time.perf_counter() < deadline:
+                pid = worker_pid(port)
+                if pid is None:
+                    time.sleep(0.005)
+                else:
+                    seen.setdefault(pid, time.perf_counter() - started)
+        finally:
+            server.terminate()
+            server.wait()
+    return sorted(seen.values())
+
+
+def run(root: str, workers: int, repeat: int) -> None:
+    print(f"import app.main: {import_time(root, repeat):.0f} ms (best of {repeat})\n")
+    print(f"{'gunicorn':<14} {'first worker (s)':>17} {'last worker (s)':>16} {'workers seen':>13}")
+    for preload in (False, True):
+        firsts, lasts, seen = [], [], []
+        for _ in range(repeat):
+            times = first_request_per_worker(root, workers, preload)
+            if times:
+                firsts.append(times[0])
+                lasts.append(times[-1])
+            seen.append(len(times))
+        label = "--preload" if preload else "no preload"
+        print(f"{label:<14} {statistics.median(firsts):>17.2f} {statistics.median(lasts):>16.2f} "
+              f"{min(seen):>10}/{workers}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--root", default=ROOT, help="checkout to benchmark (default: this one)")
+    args = parser.parse_args()
+    run(os.path.abspath(args.root), args.workers, args.repeat)
@@ -0,0 +1,118 @@
+"""
+Benchmark: absolute cost of app.telemetry, measured in-process with
+interleaved rounds (whole-app runs on a shared box swing more than the
+overhead being measured):
+
+  - TelemetryMiddleware around a trivial ASGI endpoint, per exporter
+  - the SQLAlchemy query hooks around `SELECT 1` on in-memory sqlite
+
+    python -m benchmarks.bench_telemetry
+
+Budget: middleware + hooks for a typical two-query route (GET /cart/{id},
+~2.5 ms here) must stay under 100 us, i.e. < 5% of the request. Most of the
+per-query cost is SQLAlchemy's event dispatch itself, shown separately as
+"no-op listeners". Exits non-zero when over budget.
+"""
+import asyncio
+import logging
+import sys
+import tempfile
+import time
+
+from fastapi import FastAPI
+from sqlalchemy import create_engine, event, text
+
+from app.telemetry import (
+    FileExporter,
+    InMemoryExporter,
+    MetricsRegistry,
+    TelemetryMiddleware,
+    instrument_engine,
+)
+
+BUDGET_US = 100
+QUERIES_PER_REQUEST = 2
+
+
+async def endpoint(scope, receive, send):
+    scope["endpoint"] = endpoint
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+def make_scope(app) -> dict:
+    return {"type": "http", "method": "GET", "path": "/items/1", "headers": [], "app": app}
+
+
+async def _noop(message):
+    pass
+
+
+async def _drive(asgi, scope, n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        await asgi(dict(scope), None, _noop)
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def best_of(fn, rounds: int) -> float:
+    return min(fn() for _ in range(rounds))
+
+
+def run(requests: int = 20000, queries: int = 20000, rounds: int = 7) -> int:
+    logging.disable(logging.CRITICAL)
+    app = FastAPI()
+    app.add_api_route("/items/{item_id}", endpoint)
+    scope = make_scope(app)
+    file_exporter = FileExporter(f"{tempfile.mkdtemp(prefix='bench-telemetry-')}/t.jsonl")
+    stacks = {
+        "bare endpoint": endpoint,
+        "histograms only": TelemetryMiddleware(endpoint, registry=MetricsRegistry()),
+        "memory exporter": TelemetryMiddleware(
+            endpoint, registry=MetricsRegistry(), exporter=InMemoryExporter()
+        ),
+        "file exporter": TelemetryMiddleware(endpoint, registry=MetricsRegistry(), exporter=file_exporter),
+    }
+    loop = asyncio.new_event_loop()
+    request_us = {
+        name: best_of(lambda: loop.run_until_complete(_drive(asgi, scope, requests)), rounds)
+        for name, asgi in stacks.items()
+    }
+    file_exporter.shutdown()
+
+    plain, noop, hooked = (create_engine("sqlite://") for _ in range(3))
+    for name in ("before_cursor_execute", "after_cursor_execute"):
+        event.listen(noop, name, lambda *args: None)
+    instrument_engine(hooked)
+
+    def per_query(engine) -> float:
+        with engine.connect() as conn:
+            stmt = text("SELECT 1")
+            start = time.perf_counter()
+            for _ in range(queries):
+                conn.execute(stmt)
+            return (time.perf_counter() - start) / queries * 1e6
+
+    query_us = {
+        name: best_of(lambda: per_query(engine), rounds)
+        for name, engine in (("plain", plain), ("no-op listeners", noop), ("instrumented", hooked))
+    }
+
+    bare = request_us["bare endpoint"]
+    print(f"{'request path':<18} {'us/request':>11} {'overhead':>10}")
+    for name, us in request_us.items():
+        print(f"{name:<18} {us:>11.1f} {us - bare:>9.1f}us")
+    print(f"\n{'query path':<18} {'us/query':>11} {'overhead':>10}")
+    for name, us in query_us.items():
+        print(f"{name:<18} {us:>11.1f} {us - query_us['plain']:>9.1f}us")
+
+    middleware = max(us for name, us in request_us.items() if name != "bare endpoint") - bare
+    hooks = query_us["instrumented"] - query_us["plain"]
+    total = middleware + QUERIES_PER_REQUEST * hooks
+    verdict = "ok" if total <= BUDGET_US else "FAIL"
+    print(f"\n{QUERIES_PER_REQUEST}-query request: {total:.1f}us (budget {BUDGET_US}us) -> {verdict}")
+    return 0 if verdict == "ok" else 1
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,60 @@
+# gunicorn.conf.py
+"""
+Gunicorn settings for the shop API (used by the dockerfile):
+
+    gunicorn -c gunicorn.conf.py --preload app.main:app
+
+With --preload the app is imported once in the master and workers fork
+from it, so they skip the imports; app.main is import-side-effect free and
+does per-worker setup in its startup hooks. Schema migrations and the
+products table warm-up run once here in the master rather than in every
+worker.
+
+The catalogue is loaded in the master too: workers share its pages until
+they change them (copy-on-write), which is why pre_fork freezes the GC.
+"""
+import gc
+import glob
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+worker_class = "uvicorn.workers.UvicornWorker"
+# exported for app.config too: with several workers the in-process cache
+# cannot be kept coherent, so users and carts are not cached locally
+os.environ.setdefault("WEB_CONCURRENCY", "2")
+workers = int(os.environ["WEB_CONCURRENCY"])
+
+# the master migrates; workers must not race it (read by app.config on import)
+os.environ.setdefault("DB_MIGRATE_ON_STARTUP", "0")
+
+
+def on_starting(server):
+    from app.config import METRICS_MULTIPROC_DIR, PRODUCT_WARMUP
+    from app.database import SessionLocal, engine
+    from app.migrations import upgrade
+    from app.services.product_store import warm_product_table
+
+    upgrade(engine)
+    if PRODUCT_WARMUP:
+        # workers find this catalogue version synced and only fill their cache
+        with SessionLocal() as db:
+            warm_product_table(db)
+    engine.dispose()  # don't hand the master's connections to the workers
+
+    # per-worker metric snapshots from a previous run would be summed in
+    if METRICS_MULTIPROC_DIR:
+        for path in glob.glob(os.path.join(METRICS_MULTIPROC_DIR, "*.json")):
+            os.remove(path)
+
+
+def pre_fork(server, worker):
+    # move everything loaded so far (app, catalogue and its indexes) out of
+    # the collector's reach: a worker's GC passes would otherwise write to
+    # every object header and turn the shared pages into private copies
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    from app.database import dispose_engines_after_fork
+
+    dispose_engines_after_fork()
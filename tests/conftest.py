@@ -0,0 +1,51 @@
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.database import engine
+from app.db_pool import engine_options, install_sqlite_pragmas
+from app.migrations import upgrade
+from app.services.cache import CART_CACHE, USER_CACHE
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    """The app no longer migrates at import; most tests skip the startup hooks."""
+    upgrade(engine)
+
+
+@pytest.fixture(autouse=True)
+def empty_caches():
+    """Tests use several scratch databases whose ids overlap."""
+    USER_CACHE.clear()
+    CART_CACHE.clear()
+
+
+class ScratchDB:
+    """
+    A fresh sqlite file with the app's schema, set up like the app's own
+    engine (pool, WAL, busy_timeout). `statements` records every SQL
+    statement run on it.
+    """
+
+    def __init__(self, path):
+        url = f"sqlite:///{path}"
+        self.engine = create_engine(url, **engine_options(url))
+        install_sqlite_pragmas(self.engine)
+        upgrade(self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+        self.statements = []
+        event.listen(self.engine, "before_cursor_execute", lambda *args: self.statements.append(args[2]))
+
+    def seed(self, *rows) -> None:
+        """Add `rows` (ORM objects) in one commit."""
+        with self.Session() as db:
+            db.add_all(rows)
+            db.commit()
+
+
+@pytest.fixture
+def scratch_db(tmp_path):
+    db = ScratchDB(tmp_path / "scratch.db")
+    yield db
+    db.engine.dispose()
@@ -0,0 +1,50 @@
+import asyncio
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, run_db, to_async_url
+from app.routers.users import _create_user, _get_user
+from app.schemas import UserCreate
+
+
+def test_to_async_url():
+    assert to_async_url("sqlite:///./data.db") == "sqlite+aiosqlite:///./data.db"
+    assert (
+        to_async_url("postgresql+psycopg2://u:p@host/db")
+        == "postgresql+asyncpg://u:p@host/db"
+    )
+    assert to_async_url("postgres://u:p@host/db") == "postgresql+asyncpg://u:p@host/db"
+
+
+def test_helpers_run_on_async_session(tmp_path):
+    async def scenario():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'async.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+        sessions = async_sessionmaker(engine, expire_on_commit=False)
+        async with sessions() as db:
+            created = await run_db(db, _create_user, UserCreate(email="async@example.com"))
+            fetched = await run_db(db, _get_user, created.id)
+        await engine.dispose()
+        return created, fetched
+
+    created, fetched = asyncio.run(scenario())
+    assert fetched == created
+    assert fetched.email == "async@example.com"
+
+
+def test_helpers_run_on_sync_session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'sync.db'}")
+    Base.metadata.create_all(bind=engine)
+
+    async def scenario():
+        with sessionmaker(bind=engine)() as db:
+            created = await run_db(db, _create_user, UserCreate(email="sync@example.com"))
+            return created, await run_db(db, _get_user, created.id)
+
+    created, fetched = asyncio.run(scenario())
+    engine.dispose()
+    assert fetched == created
@@ -0,0 +1,88 @@
+import csv
+import io
+import json
+import uuid
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.bulk import insert_batch
+from app.database import Base, User
+from app.main import app
+
+client = TestClient(app)
+
+
+def _email():
+    return f"bulk-{uuid.uuid4().hex[:10]}@example.com"
+
+
+def _import(body: str, content_type: str):
+    return client.post("/users/import", content=body.encode(), headers={"Content-Type": content_type})
+
+
+def test_csv_import_reports_duplicates_and_bad_rows_by_line():
+    taken = client.post("/users/", json={"email": _email()}).json()["email"]
+    a, b = _email(), _email()
+    body = f"\ufeffemail,name\r\n{a},A\r\n\r\n ,blank\r\n{b},B\r\n{a},again\r\n{taken},old\r\ntoo,many,fields\r\n"
+
+    response = _import(body, "text/csv; charset=utf-8")
+
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["rows"], report["inserted"], report["failed"]) == (6, 2, 4)
+    assert report["errors"] == [
+        {"line": 4, "error": "email is required"},
+        {"line": 6, "error": "duplicate email (first on line 2)"},
+        {"line": 8, "error": "expected 2 fields, got 3"},
+        {"line": 7, "error": "email already exists"},
+    ]
+    assert report["rows_per_sec"] > 0
+
+
+def test_ndjson_import():
+    a = _email()
+    body = "\n".join([json.dumps({"email": a}), "{oops", "[1]", json.dumps({"email": "x" * 256})])
+
+    report = _import(body, "application/x-ndjson").json()
+
+    assert report["inserted"] == 1
+    assert [e["line"] for e in report["errors"]] == [2, 3, 4]
+    assert report["errors"][0]["error"] == "invalid JSON"
+
+
+def test_import_rejects_unknown_content_type_and_missing_columns():
+    assert _import("email\nx@example.com\n", "application/json").status_code == 415
+    response = _import("mail\nx@example.com\n", "text/csv")
+    assert response.status_code == 400
+    assert "email" in response.json()["detail"]
+
+
+def test_csv_export_round_trips():
+    emails = sorted(_email() for _ in range(3))
+    _import("email\n" + "\n".join(emails), "text/csv")
+
+    response = client.get("/users/?format=csv")
+
+    assert response.headers["content-type"] == "text/csv; charset=utf-8"
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert list(rows[0]) == ["id", "email"]
+    exported = [row["email"] for row in rows]
+    assert [e for e in exported if e in emails] == emails
+
+    again = _import(response.text, "text/csv").json()
+    assert again["inserted"] == 0 and again["failed"] == len(rows)
+
+
+def test_insert_batch_skips_existing_keys(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'bulk.db'}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        db.add(User(email="old@example.com"))
+        db.commit()
+
+        rows = [{"email": "old@example.com"}, {"email": "new@example.com"}]
+        assert insert_batch(db, User.__table__, "email", rows) == {"new@example.com"}
+        assert db.scalar(select(func.count()).select_from(User)) == 2
@@ -0,0 +1,137 @@
+import sys
+import time
+import uuid
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import cache
+from app.services.cache import CART_CACHE, LocalCache, RedisCache, make_cache, shared_backend
+
+client = TestClient(app)
+
+
+class FakeRedis:
+    """The slice of the redis-py client RedisCache uses, backed by a dict."""
+
+    def __init__(self):
+        self.data = {}
+        self.down = False
+
+    def _check(self):
+        if self.down:
+            raise ConnectionError("redis is down")
+
+    def mget(self, keys):
+        self._check()
+        return [self.data.get(k) for k in keys]
+
+    def set(self, key, value, ex=None, nx=False):
+        self._check()
+        if not (nx and key in self.data):
+            self.data[key] = value if isinstance(value, bytes) else value.encode()
+
+    def delete(self, *keys):
+        self._check()
+        for key in keys:
+            self.data.pop(key, None)
+
+    def scan_iter(self, match):
+        self._check()
+        return [k for k in self.data if k.startswith(match.rstrip("*"))]
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def execute(self):
+        pass
+
+
+def test_local_cache_evicts_least_recently_used_and_expires():
+    lru = LocalCache(maxsize=2)
+    lru.set(1, "a")
+    lru.set(2, "b")
+    lru.get(1)
+    lru.set(3, "c")
+    assert lru.get_many([1, 2, 3]) == {1: "a", 3: "c"}
+    assert lru.stats() == {"hits": 3, "misses": 1, "entries": 2}
+
+    short = LocalCache(ttl=0.01)
+    short.set("k", {"v": 1})
+    assert short.get("k") == {"v": 1}
+    time.sleep(0.02)
+    assert short.get("k") is None
+
+
+def test_redis_cache_round_trip_and_outage():
+    redis = FakeRedis()
+    users = RedisCache(redis, ttl=30, prefix="shop:users:")
+    users.set(7, {"id": 7, "email": "a@example.com"})
+    assert list(redis.data) == ["shop:users:7"]
+    assert users.get(7) == {"id": 7, "email": "a@example.com"}
+
+    users.delete(7)
+    assert users.get(7) is None
+
+    redis.down = True
+    users.set(8, {"id": 8})
+    assert users.get(8) is None  # a miss, not an error
+    assert users.stats() == {"hits": 1, "misses": 2, "errors": 2}
+
+
+def test_deleted_keys_are_held_against_refills():
+    lru = LocalCache(hold=0.05)
+    lru.set(1, "old")
+    lru.delete(1)
+    lru.set(1, "old")  # a read from before the write
+    assert lru.get(1) is None
+    time.sleep(0.06)
+    lru.set(1, "new")
+    assert lru.get(1) == "new"
+
+
+def test_redis_hold_is_seen_by_every_worker():
+    redis = FakeRedis()
+    a, b = (RedisCache(redis, ttl=30, prefix="shop:carts:", hold=2) for _ in range(2))
+    a.set(1, {"items": []})
+    b.delete(1)  # worker b wrote to cart 1
+    assert a.get(1) is None
+    a.set(1, {"items": []})  # worker a's read from before the write
+    assert a.get(1) is None and b.get(1) is None
+
+
+def test_local_cache_is_off_for_users_and_carts_with_several_workers():
+    assert shared_backend("local", 1) == "local"
+    assert shared_backend("local", 2) == "none"
+    assert shared_backend("redis", 4) == "redis"
+    assert shared_backend("none", 1) == "none"
+
+
+def test_redis_backend_falls_back_without_redis_package(monkeypatch):
+    monkeypatch.setitem(sys.modules, "redis", None)
+    monkeypatch.setattr(cache, "_redis_clients", {})
+    assert isinstance(make_cache("users", "redis", "redis://localhost"), LocalCache)
+
+
+def test_cart_cache_is_dropped_by_writes_and_checkout(monkeypatch):
+    monkeypatch.setattr(CART_CACHE, "hold", 0.05)
+    user_id = client.post("/users/", json={"email": f"{uuid.uuid4().hex}@example.com"}).json()["id"]
+    cart_id = client.post(f"/cart/{user_id}").json()["id"]
+    assert CART_CACHE.get(cart_id) is not None
+    client.post(f"/cart/{cart_id}/items", json={"product_id": 1, "quantity": 2})
+
+    # invalidated by the write, and not refilled while held
+    assert CART_CACHE.get(cart_id) is None
+    assert len(client.get(f"/cart/{cart_id}").json()["items"]) == 1
+    assert CART_CACHE.get(cart_id) is None
+    time.sleep(0.06)
+    assert len(client.get(f"/cart/{cart_id}").json()["items"]) == 1
+    assert [i["quantity"] for i in CART_CACHE.get(cart_id)["items"]] == [2]
+    hits = CART_CACHE.hits
+    assert len(client.get(f"/cart/{cart_id}").json()["items"]) == 1
+    assert CART_CACHE.hits == hits + 1
+
+    client.post(f"/orders/{user_id}")
+    assert client.get(f"/cart/{cart_id}").json()["items"] == []
+
+    assert 'cache_hits_total{cache="carts"}' in client.get("/metrics").text
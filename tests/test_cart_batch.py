@@ -0,0 +1,87 @@
+import pytest
+
+from app.database import Cart, CartItem, Product, User
+from app.routers import cart as cart_router
+from app.routers.cart import _add_items, _get_cart
+from app.schemas import CartItemBase
+
+
+@pytest.fixture
+def cart_db(scratch_db):
+    """Cart 1 and products 1-40."""
+    scratch_db.seed(
+        Cart(id=1, user=User(email="batch@example.com")),
+        *(Product(id=i, title=f"Product {i}", price=1.0) for i in range(1, 41)),
+    )
+    return scratch_db
+
+
+def test_batch_merges_duplicates_and_existing_lines(cart_db):
+    with cart_db.Session() as db:
+        _add_items(db, 1, [CartItemBase(product_id=1, quantity=1)])
+        cart = _add_items(
+            db,
+            1,
+            [
+                CartItemBase(product_id=1, quantity=2),
+                CartItemBase(product_id=2, quantity=1),
+                CartItemBase(product_id=2, quantity=4),
+            ],
+        )
+        assert db.query(CartItem).count() == 2
+
+    assert {i.product_id: i.quantity for i in cart.items} == {1: 3, 2: 5}
+
+
+def test_batch_statement_count_is_constant(cart_db):
+    statements = cart_db.statements
+
+    counts = []
+    for first, size in ((1, 1), (2, 30)):
+        with cart_db.Session() as db:
+            items = [CartItemBase(product_id=i, quantity=1) for i in range(first, first + size)]
+            statements.clear()
+            cart = _add_items(db, 1, items)
+            counts.append(len(statements))
+        assert len(cart.items) == first + size - 1
+
+    assert counts[0] == counts[1]
+
+
+def test_interleaved_writers_never_leave_a_stale_cart_cached(cart_db, monkeypatch):
+    load_cart = cart_router._load_cart
+
+    def load_then_let_b_write(db, cart_id):
+        # A has committed and loaded its copy; B commits (and reads) before A finishes
+        cart = load_cart(db, cart_id)
+        monkeypatch.setattr(cart_router, "_load_cart", load_cart)
+        with cart_db.Session() as other:
+            _add_items(other, 1, [CartItemBase(product_id=2, quantity=1)])
+            _get_cart(other, 1)
+        return cart
+
+    monkeypatch.setattr(cart_router, "_load_cart", load_then_let_b_write)
+    with cart_db.Session() as db:
+        a_copy = _add_items(db, 1, [CartItemBase(product_id=1, quantity=1)])
+    assert [i.product_id for i in a_copy.items] == [1]
+
+    with cart_db.Session() as db:
+        assert sorted(i.product_id for i in _get_cart(db, 1).items) == [1, 2]
+
+
+def test_a_read_racing_a_write_does_not_cache_the_old_cart(cart_db, monkeypatch):
+    load_cart = cart_router._load_cart
+
+    def load_then_let_b_write(db, cart_id):
+        # A has read the empty cart; B adds a line and invalidates before A caches its copy
+        cart = load_cart(db, cart_id)
+        monkeypatch.setattr(cart_router, "_load_cart", load_cart)
+        with cart_db.Session() as other:
+            _add_items(other, 1, [CartItemBase(product_id=3, quantity=1)])
+        return cart
+
+    monkeypatch.setattr(cart_router, "_load_cart", load_then_let_b_write)
+    with cart_db.Session() as db:
+        assert _get_cart(db, 1).items == []
+    with cart_db.Session() as db:
+        assert [i.product_id for i in _get_cart(db, 1).items] == [3]
@@ -0,0 +1,35 @@
+from app.services.catalogue import Catalogue, category_id
+from app.services.external_products import (
+    PRODUCTS,
+    get_categories,
+    get_product,
+    get_products_by_category,
+)
+
+
+def test_lookups_match_linear_scan():
+    catalogue = Catalogue(PRODUCTS)
+
+    for p in PRODUCTS:
+        assert catalogue.get(p["id"]) is p
+
+    for cat in {p["category"] for p in PRODUCTS}:
+        expected = [p for p in PRODUCTS if p["category"] == cat]
+        assert list(catalogue.by_category(cat)) == expected
+        assert list(catalogue.by_category_id(category_id(cat))) == expected
+
+
+def test_unknown_lookups_are_empty():
+    catalogue = Catalogue(PRODUCTS)
+
+    assert catalogue.get(10_000) is None
+    assert catalogue.by_category("books") == ()
+    assert catalogue.by_category_id("books") == ()
+
+
+def test_service_helpers():
+    assert [c["id"] for c in get_categories()] == [
+        "electronics", "jewelery", "mens_clothing", "womens_clothing",
+    ]
+    assert [p["id"] for p in get_products_by_category("MENS_CLOTHING")] == [11, 12, 13, 14]
+    assert get_product(7)["category"] == "jewelery"
@@ -0,0 +1,89 @@
+import json
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import external_products
+from app.services.catalogue_store import CatalogueStore, read_catalogue_file
+
+client = TestClient(app)
+
+PRODUCTS = [
+    {"id": 1, "title": "Pen", "price": 1.5, "category": "office", "description": "Blue ink."},
+    {"id": 2, "title": "Desk", "price": 99.0, "category": "office", "description": "Oak."},
+]
+
+
+def _write(path, version, products, ndjson=False):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        if ndjson:
+            f.write(json.dumps({"version": version}) + "\n")
+            f.writelines(json.dumps(p) + "\n" for p in products)
+        else:
+            json.dump({"version": version, "products": products}, f)
+    os.replace(tmp, path)  # atomic, like a deploy should do it
+
+
+def test_reload_swaps_a_new_snapshot_only_when_the_file_changes(tmp_path):
+    path = str(tmp_path / "catalogue.json")
+    _write(path, "v1", PRODUCTS)
+    store = CatalogueStore(path, interval=0)
+    swapped = []
+    store.on_swap(swapped.append)
+    before = store.current
+
+    assert store.reload() is False
+    _write(path, "v2", PRODUCTS + [{"id": 3, "title": "Lamp", "price": 20, "category": "office"}])
+
+    assert store.reload() is True
+    assert store.current.data_version == "v2" and store.current.get(3)["title"] == "Lamp"
+    assert swapped == [store.current]
+    # a request still holding the old snapshot keeps seeing it whole
+    assert before.data_version == "v1" and before.get(3) is None and len(before.listing("office")) == 2
+    assert store.stats()["reloads"] == 1
+
+
+def test_broken_file_keeps_the_previous_catalogue(tmp_path):
+    path = str(tmp_path / "catalogue.json")
+    _write(path, "v1", PRODUCTS)
+    store = CatalogueStore(path, interval=0)
+
+    with open(path, "w") as f:
+        f.write('{"version": "v2", "products": [')
+    assert store.reload() is False
+    _write(path, "v3", [{"id": 1, "title": "Pen"}])
+    assert store.reload() is False
+
+    assert store.current.data_version == "v1"
+    assert store.stats()["errors"] == 2
+
+
+def test_ndjson_file_and_validation(tmp_path):
+    path = str(tmp_path / "catalogue.ndjson")
+    _write(path, 7, PRODUCTS, ndjson=True)
+    assert read_catalogue_file(path) == ("7", PRODUCTS)
+
+    _write(path, 8, PRODUCTS + PRODUCTS[:1], ndjson=True)
+    with pytest.raises(ValueError, match="duplicate product id 1"):
+        read_catalogue_file(path)
+
+
+def test_routes_follow_the_swapped_catalogue(tmp_path, monkeypatch):
+    path = str(tmp_path / "catalogue.json")
+    _write(path, "v1", PRODUCTS)
+    monkeypatch.setattr(external_products, "CATALOGUE_STORE", CatalogueStore(path, interval=0))
+
+    assert client.get("/products/categories").json() == ["office"]
+    first = client.get("/products/category/office")
+    assert [p["id"] for p in first.json()] == [1, 2]
+
+    _write(path, "v2", [{**PRODUCTS[0], "price": 2.0}])
+    external_products.CATALOGUE_STORE.reload()
+
+    second = client.get("/products/category/office")
+    assert second.json() == [{**PRODUCTS[0], "price": 2.0}]
+    assert second.headers["etag"] != first.headers["etag"]
+    assert client.get("/products/search", params={"q": "desk"}).json()["total"] == 0
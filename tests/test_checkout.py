@@ -0,0 +1,115 @@
+import json
+import threading
+import uuid
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.database import Cart, CartItem, Order, Product, User
+from app.main import app
+from app.routers import orders
+from app.routers.orders import _create_order, _create_order_once
+
+client = TestClient(app)
+
+THREADS = 16
+
+
+@pytest.fixture
+def checkout_db(scratch_db):
+    """Cart 1 of user 1 holding 4 x product 1 at 2.50."""
+    scratch_db.seed(
+        Product(id=1, title="Product 1", price=2.5),
+        Cart(id=1, user=User(id=1, email="checkout@example.com")),
+        CartItem(cart_id=1, product_id=1, quantity=4),
+    )
+    return scratch_db
+
+
+def _hammer(Session, fn, *args):
+    """Run fn(session, *args) from THREADS threads at once; results or exceptions."""
+    barrier = threading.Barrier(THREADS)
+    results = []
+
+    def run():
+        with Session() as db:
+            barrier.wait()
+            try:
+                results.append(fn(db, *args))
+            except Exception as exc:
+                results.append(exc)
+
+    threads = [threading.Thread(target=run) for _ in range(THREADS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_concurrent_checkouts_order_the_cart_once(checkout_db):
+    results = _hammer(checkout_db.Session, _create_order, 1)
+
+    orders = [r for r in results if not isinstance(r, Exception)]
+    errors = [r for r in results if isinstance(r, Exception)]
+    assert len(orders) == 1 and orders[0].total == 10.0
+    assert all(isinstance(e, HTTPException) and e.status_code == 400 for e in errors)
+    with checkout_db.Session() as db:
+        assert db.query(Order).count() == 1
+        assert db.query(CartItem).count() == 0
+
+
+def test_concurrent_retries_with_one_key_replay_the_same_order(checkout_db):
+    results = _hammer(checkout_db.Session, _create_order_once, 1, "retry-key", "POST /orders/1")
+
+    assert all(status == 200 for status, _, _ in results)
+    assert len({body for _, body, _ in results}) == 1
+    assert sum(not replayed for _, _, replayed in results) == 1
+    with checkout_db.Session() as db:
+        assert db.query(Order).count() == 1
+
+
+def test_retries_with_one_key_are_serialized_without_a_write_lock(checkout_db, monkeypatch):
+    # PostgreSQL: begin_write takes no lock, only the key claim serializes the retries
+    monkeypatch.setattr(orders, "begin_write", lambda db: None)
+    results = _hammer(checkout_db.Session, _create_order_once, 1, "pg-key", "POST /orders/1")
+
+    assert [r for r in results if isinstance(r, Exception)] == []
+    assert all(status == 200 for status, _, _ in results)
+    assert len({body for _, body, _ in results}) == 1
+    assert sum(not replayed for _, _, replayed in results) == 1
+    with checkout_db.Session() as db:
+        assert db.query(Order).count() == 1
+
+
+def _user_with_cart_item():
+    user_id = client.post("/users/", json={"email": f"{uuid.uuid4().hex}@example.com"}).json()["id"]
+    cart_id = client.post(f"/cart/{user_id}").json()["id"]
+    client.post(f"/cart/{cart_id}/items", json={"product_id": 1, "quantity": 1})
+    return user_id
+
+
+def test_idempotency_key_replays_response():
+    user_id = _user_with_cart_item()
+    key = uuid.uuid4().hex
+
+    first = client.post(f"/orders/{user_id}", headers={"Idempotency-Key": key})
+    retry = client.post(f"/orders/{user_id}", headers={"Idempotency-Key": key})
+    assert first.status_code == retry.status_code == 200
+    assert json.loads(retry.content) == first.json()
+    assert "idempotent-replayed" not in first.headers
+    assert retry.headers["idempotent-replayed"] == "true"
+
+    # the cart is empty now; without the key this is a new (failing) checkout
+    assert client.post(f"/orders/{user_id}").status_code == 400
+
+
+def test_idempotency_key_reused_for_another_request():
+    key = uuid.uuid4().hex
+    user_id = _user_with_cart_item()
+    assert client.post(f"/orders/{user_id}", headers={"Idempotency-Key": key}).status_code == 200
+
+    other = _user_with_cart_item()
+    response = client.post(f"/orders/{other}", headers={"Idempotency-Key": key})
+    assert response.status_code == 422
@@ -0,0 +1,59 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.catalogue import Catalogue
+from app.services.columnar import PriceColumns
+from app.services.external_products import PRODUCTS
+
+client = TestClient(app)
+
+
+def test_listing_matches_python_filter_and_sort():
+    catalogue = Catalogue(PRODUCTS)
+
+    expected = sorted(
+        (p for p in PRODUCTS if p["category"] == "women's clothing" and 9 <= p["price"] <= 40),
+        key=lambda p: -p["price"],
+    )
+    assert catalogue.listing("women's clothing", 9, 40, "-price") == expected
+    assert catalogue.listing(sort="id") == sorted(PRODUCTS, key=lambda p: p["id"])
+    assert catalogue.listing("books") == []
+    assert catalogue.listing("electronics", min_price=10_000) == []
+
+
+def test_ties_keep_catalogue_order():
+    products = [{"id": i, "price": price, "category": "c"} for i, price in enumerate([5, 1, 5, 1])]
+    rows, prices = PriceColumns(products).select("c", sort="-price")
+
+    assert rows.tolist() == [0, 2, 1, 3]
+    assert prices.tolist() == [5, 5, 1, 1]
+
+
+def test_currency_conversion_is_cached_and_filters_on_converted_prices():
+    columns = PriceColumns(PRODUCTS, currency="EUR", rates={"USD": 1.5})
+    usd = columns.prices_in("USD")
+
+    assert columns.prices_in("USD") is usd
+    # half-cent ties may round either way
+    assert usd.tolist() == pytest.approx([p["price"] * 1.5 for p in PRODUCTS], abs=0.0051)
+    rows, prices = columns.select("jewelery", max_price=15, currency="USD")
+    assert [PRODUCTS[i]["id"] for i in rows] == [9]
+    assert prices.tolist() == [14.98]  # 9.99 * 1.5, rounded
+    with pytest.raises(KeyError):
+        columns.prices_in("XYZ")
+
+
+def test_category_endpoint_filters():
+    response = client.get(
+        "/products/category/jewelery", params={"max_price": 200, "sort": "price", "currency": "usd"}
+    )
+
+    assert response.status_code == 200
+    products = response.json()
+    assert [p["id"] for p in products] == [9, 10, 8]
+    assert {p["currency"] for p in products} == {"USD"}
+    assert client.get("/products/category/jewelery", params={"currency": "XYZ"}).status_code == 400
+    assert client.get("/products/category/jewelery", params={"sort": "title"}).status_code == 422
+    # without parameters the cached listing (with its ETag) is served as before
+    assert "etag" in client.get("/products/category/jewelery").headers
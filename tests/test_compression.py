@@ -0,0 +1,118 @@
+import json
+
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.compression import CompressionMiddleware, CompressionStats, compress, negotiate
+from app.main import app
+from app.services.response_cache import ResponseCache
+
+client = TestClient(app)
+
+BIG = [{"id": i, "title": f"Product {i}", "description": "A very fine product. " * 5} for i in range(100)]
+
+
+def _app(stats: CompressionStats) -> FastAPI:
+    demo = FastAPI()
+    demo.add_middleware(CompressionMiddleware, minimum_size=500, stats=stats)
+    cache = ResponseCache(min_compress_size=500)
+
+    @demo.get("/big")
+    def big():
+        return BIG
+
+    @demo.get("/small")
+    def small():
+        return {"ok": True}
+
+    @demo.get("/text")
+    def text():
+        return PlainTextResponse("x" * 1000, media_type="image/png")
+
+    @demo.get("/stream")
+    def stream():
+        return StreamingResponse((json.dumps(p).encode() + b"\n" for p in BIG), media_type="application/x-ndjson")
+
+    @demo.get("/cached")
+    def cached(request: Request):
+        return cache.response(request, "big", "v1", lambda: BIG)
+
+    @demo.get("/encoded")
+    def encoded():
+        return Response(compress(b"{}" * 1000, "gzip"), media_type="application/json", headers={"Content-Encoding": "gzip"})
+
+    return demo
+
+
+def test_negotiate_prefers_highest_q_then_server_order():
+    assert negotiate("gzip, deflate, br", ("br", "gzip")) == "br"
+    assert negotiate("gzip;q=1.0, br;q=0.5", ("br", "gzip")) == "gzip"
+    assert negotiate("br;q=0, *", ("br", "gzip")) == "gzip"
+    assert negotiate("identity", ("br", "gzip")) is None
+    assert negotiate("", ("br", "gzip")) is None
+    # without the Brotli package only gzip is offered
+    assert negotiate("br", ("gzip",)) is None
+
+
+def test_middleware_compresses_large_compressible_bodies():
+    stats = CompressionStats()
+    demo = TestClient(_app(stats))
+
+    response = demo.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) < len(response.content) / 5
+    assert response.json() == BIG
+
+    streamed = demo.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert streamed.headers["content-encoding"] == "gzip"
+    assert [json.loads(line) for line in streamed.text.splitlines()] == BIG
+
+    for path, headers in [
+        ("/small", {"Accept-Encoding": "gzip"}),
+        ("/text", {"Accept-Encoding": "gzip"}),
+        ("/big", {"Accept-Encoding": "identity"}),
+    ]:
+        assert "content-encoding" not in demo.get(path, headers=headers).headers
+
+    # already encoded: passed through, not compressed twice
+    encoded = demo.get("/encoded", headers={"Accept-Encoding": "gzip"})
+    assert encoded.content == b"{}" * 1000
+
+    totals = stats.stats()["gzip"]
+    assert totals["responses"] == 2
+    assert totals["bytes_out"] < totals["bytes_in"]
+
+
+def test_cached_payloads_are_precompressed_once_per_coding():
+    demo = TestClient(_app(CompressionStats()))
+
+    plain = demo.get("/cached", headers={"Accept-Encoding": "identity"})
+    gzipped = demo.get("/cached", headers={"Accept-Encoding": "gzip"})
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert gzipped.content == plain.content
+    assert gzipped.headers["etag"] != plain.headers["etag"]
+    assert gzipped.headers["vary"] == "Accept-Encoding"
+
+    revalidated = demo.get(
+        "/cached", headers={"Accept-Encoding": "gzip", "If-None-Match": gzipped.headers["etag"]}
+    )
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == gzipped.headers["etag"]
+
+    # an identity copy does not validate the gzip representation this request negotiates
+    mismatched = demo.get(
+        "/cached", headers={"Accept-Encoding": "gzip", "If-None-Match": plain.headers["etag"]}
+    )
+    assert mismatched.status_code == 200
+    assert mismatched.headers["etag"] == gzipped.headers["etag"]
+    assert mismatched.headers["content-encoding"] == "gzip"
+
+
+def test_app_serves_catalogue_compressed():
+    response = client.get("/products/category/electronics", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert int(response.headers["content-length"]) < len(response.content)
+    assert all(p["category"] == "electronics" for p in response.json())
+    assert 'http_response_bytes_compressed_total{encoding="gzip"}' in client.get("/metrics").text
@@ -0,0 +1,44 @@
+import pytest
+from sqlalchemy import create_engine, exc
+
+from app.db_pool import (
+    InstrumentedQueuePool,
+    engine_options,
+    install_sqlite_pragmas,
+    pool_status,
+)
+
+
+def test_engine_options_for_servers_and_sqlite():
+    pg = engine_options("postgresql://u:p@host/db")
+    assert pg["poolclass"] is InstrumentedQueuePool
+    assert pg["pool_pre_ping"] is True
+    assert {"pool_size", "max_overflow", "pool_timeout", "pool_recycle"} <= set(pg)
+
+    lite = engine_options("sqlite:///./data.db")
+    assert "pool_pre_ping" not in lite
+    assert lite["connect_args"] == {"check_same_thread": False}
+
+
+def test_pool_counts_waits_and_timeouts(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    install_sqlite_pragmas(engine)
+
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert pool_status(engine)["checked_out"] == 1
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+
+    status = pool_status(engine)
+    engine.dispose()
+    assert status["checked_out"] == 0
+    assert status["checkouts"] == 1
+    assert status["waits"] == 1
+    assert status["timeouts"] == 1
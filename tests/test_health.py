@@ -0,0 +1,56 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.health import HealthMonitor
+from app.main import app
+
+
+def test_liveness_and_readiness_after_startup():
+    with TestClient(app) as client:
+        assert client.get("/health/live").json() == {"status": "healthy"}
+
+        response = client.get("/health/ready")
+        assert response.status_code == 200
+        body = response.json()
+        assert body["status"] == "ready"
+        assert body["checks"]["database"]["ok"] is True
+        assert body["checks"]["warmup"]["pending"] == []
+
+
+def test_not_ready_when_db_down_warmup_pending_or_pool_saturated(tmp_path):
+    down = HealthMonitor(create_engine("sqlite:////nonexistent-dir/x.db"))
+    down.check_db()
+    ready, body = down.readiness()
+    assert not ready and not body["checks"]["database"]["ok"]
+
+    engine = create_engine(f"sqlite:///{tmp_path}/h.db", pool_size=1, max_overflow=0)
+    monitor = HealthMonitor(engine, warmups=["products"])
+    monitor.check_db()
+    assert monitor.readiness()[1]["checks"]["warmup"]["pending"] == ["products"]
+    monitor.mark_warm("products")
+    assert monitor.readiness()[0]
+
+    with engine.connect():
+        ready, body = monitor.readiness()
+        assert not ready and body["checks"]["pool"]["usage"] == 1.0
+
+
+def test_not_ready_when_async_pool_saturated(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/h.db", pool_size=1, max_overflow=0)
+    async_engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path}/h.db", poolclass=AsyncAdaptedQueuePool, pool_size=1, max_overflow=0
+    )
+    monitor = HealthMonitor(engine, async_engine=async_engine)
+    monitor.check_db()
+    assert monitor.readiness()[0]
+
+    async def hold_connection():
+        async with async_engine.connect():
+            return monitor.readiness()
+
+    ready, body = asyncio.run(hold_connection())
+    assert not ready and body["checks"]["pool"]["usage"] == 1.0
@@ -0,0 +1,56 @@
+from fastapi.testclient import TestClient
+
+from app import metrics
+from app.main import app
+
+client = TestClient(app)
+
+
+def test_metrics_endpoint_exposes_route_histograms_pool_and_cache_stats():
+    client.get("/products/categories")
+    client.get("/products/categories")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == metrics.CONTENT_TYPE
+    text = response.text
+    assert "# TYPE http_request_duration_seconds histogram" in text
+    assert (
+        'http_request_duration_seconds_bucket{method="GET",route="/products/categories",'
+        'status="200",le="+Inf"}' in text
+    )
+    assert 'http_requests_total{method="GET",route="/products/categories",status="200"}' in text
+    assert 'db_pool_size{pool="sync"}' in text
+    assert 'cache_hit_ratio{cache="product_responses"}' in text
+
+
+def _worker(pid, requests, in_flight):
+    return {
+        "pid": pid,
+        "histograms": [
+            {
+                "name": "http_request_duration_seconds",
+                "labels": {"route": "/x"},
+                "bounds": [0.1, 1.0],
+                "counts": [requests, 0, 0],
+                "sum": 0.05 * requests,
+                "count": requests,
+            }
+        ],
+        "counters": [["cache_hits_total", {"cache": "c"}, 3], ["cache_misses_total", {"cache": "c"}, 1]],
+        "gauges": [["http_requests_in_flight", {}, in_flight]],
+    }
+
+
+def test_workers_are_summed_and_dead_workers_drop_out_of_gauges():
+    merged = metrics.aggregate(
+        [_worker(101, 4, 2), _worker(102, 6, 5)], live=lambda pid: pid == 101
+    )
+    text = metrics.render(merged)
+
+    assert 'http_requests_total{route="/x"} 10' in text
+    assert 'http_request_duration_seconds_bucket{route="/x",le="0.1"} 10' in text
+    assert 'cache_hits_total{cache="c"} 6' in text
+    assert 'cache_hit_ratio{cache="c"} 0.75' in text
+    # 102 has exited: its counters stay, its gauges don't
+    assert "http_requests_in_flight 2" in text
@@ -0,0 +1,72 @@
+from sqlalchemy import MetaData, create_engine, inspect
+
+from app.database import Base
+from app.migrations import MIGRATIONS, current_version, upgrade
+
+
+def _legacy_engine(tmp_path):
+    """A database created by the original create_all: no lookup indexes."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    legacy = MetaData()
+    for table in Base.metadata.sorted_tables:
+        table.to_metadata(legacy).indexes.clear()
+    legacy.create_all(bind=engine)
+    return engine
+
+
+def test_upgrade_adds_indexes_and_merges_duplicate_lines(tmp_path):
+    engine = _legacy_engine(tmp_path)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("INSERT INTO users (id, email) VALUES (1, 'a@example.com')")
+        conn.exec_driver_sql("INSERT INTO carts (id, user_id) VALUES (1, 1)")
+        conn.exec_driver_sql(
+            "INSERT INTO cart_items (cart_id, product_id, quantity) "
+            "VALUES (1, 5, 1), (1, 5, 2), (1, 6, 1)"
+        )
+
+    assert upgrade(engine) == [version for version, _, _ in MIGRATIONS]
+    assert upgrade(engine) == []
+    assert current_version(engine) == MIGRATIONS[-1][0]
+
+    indexes = {
+        ix["name"]: ix["unique"]
+        for table in ("carts", "cart_items", "orders")
+        for ix in inspect(engine).get_indexes(table)
+    }
+    assert indexes["uq_cart_items_cart_product"]
+    assert {"ix_carts_user_id", "ix_orders_user_id", "ix_cart_items_product_id"} <= set(indexes)
+
+    with engine.connect() as conn:
+        lines = conn.exec_driver_sql(
+            "SELECT product_id, quantity FROM cart_items ORDER BY product_id"
+        ).all()
+    assert [tuple(r) for r in lines] == [(5, 3), (6, 1)]
+    engine.dispose()
+
+
+def test_fresh_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    upgrade(engine)
+    assert set(Base.metadata.tables) <= set(inspect(engine).get_table_names())
+    engine.dispose()
+
+
+def test_upgrade_backfills_order_totals_in_cents(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'orders.db'}")
+    legacy = MetaData()
+    for table in Base.metadata.sorted_tables:
+        if table.name not in {"orders", "order_items"}:
+            table.to_metadata(legacy)
+    legacy.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "CREATE TABLE orders (id INTEGER PRIMARY KEY, user_id INTEGER, total FLOAT NOT NULL)"
+        )
+        conn.exec_driver_sql("INSERT INTO orders (user_id, total) VALUES (1, 19.99), (1, 0.3)")
+
+    upgrade(engine)
+    with engine.connect() as conn:
+        cents = conn.exec_driver_sql("SELECT total_cents FROM orders ORDER BY id").scalars().all()
+    assert cents == [1999, 30]
+    assert "order_items" in inspect(engine).get_table_names()
+    engine.dispose()
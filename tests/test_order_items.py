@@ -0,0 +1,108 @@
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.database import Cart, CartItem, OrderItem, Product, User
+from app.main import app
+from app.routers.orders import _create_order, _get_orders_for_user
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def orders_db(scratch_db):
+    """Cart 1 of user 1 and two products."""
+    # 0.1 + 0.2 style prices: float sums drift, cents do not
+    scratch_db.seed(
+        Product(id=1, title="Pen", price=0.1),
+        Product(id=2, title="Ink", price=19.99),
+        Cart(id=1, user=User(id=1, email="lines@example.com")),
+    )
+    return scratch_db
+
+
+def _fill_cart(db):
+    db.add_all([CartItem(cart_id=1, product_id=1, quantity=3), CartItem(cart_id=1, product_id=2, quantity=2)])
+    db.commit()
+
+
+def test_checkout_snapshots_lines_in_cents(orders_db):
+    with orders_db.Session() as db:
+        _fill_cart(db)
+        order = _create_order(db, 1)
+        assert (order.total_cents, order.total) == (4028, 40.28)
+
+        # later price changes do not touch the order
+        db.get(Product, 2).price = 25.0
+        db.commit()
+        lines = db.query(OrderItem).order_by(OrderItem.id).all()
+        assert [(l.product_id, l.title, l.quantity, l.unit_price_cents) for l in lines] == [
+            (1, "Pen", 3, 10),
+            (2, "Ink", 2, 1999),
+        ]
+
+
+def test_order_history_with_items_is_one_query(orders_db):
+    for _ in range(5):
+        with orders_db.Session() as db:
+            _fill_cart(db)
+            _create_order(db, 1)
+    statements = orders_db.statements
+    statements.clear()
+
+    with orders_db.Session() as db:
+        orders, cursor = _get_orders_for_user(db, 1, limit=3, with_items=True)
+    assert len(statements) == 1
+    assert [len(o.items) for o in orders] == [2, 2, 2]
+    assert cursor is not None
+
+
+def test_orders_endpoint_items_flag():
+    user_id = client.post("/users/", json={"email": f"{uuid.uuid4().hex}@example.com"}).json()["id"]
+    cart_id = client.post(f"/cart/{user_id}").json()["id"]
+    client.post(f"/cart/{cart_id}/items", json={"product_id": 1, "quantity": 2})
+    order = client.post(f"/orders/{user_id}").json()
+
+    plain = client.get(f"/orders/user/{user_id}").json()
+    assert plain == [order] and "items" not in order
+
+    [detailed] = client.get(f"/orders/user/{user_id}", params={"items": "true"}).json()
+    [line] = detailed["items"]
+    assert (line["product_id"], line["quantity"]) == (1, 2)
+    assert detailed["total_cents"] == 2 * line["unit_price_cents"]
+
+
+def test_order_history_fields_are_selected_in_sql(orders_db):
+    for _ in range(3):
+        with orders_db.Session() as db:
+            _fill_cart(db)
+            _create_order(db, 1)
+    statements = orders_db.statements
+    statements.clear()
+
+    with orders_db.Session() as db:
+        orders, cursor = _get_orders_for_user(db, 1, limit=2, fields=("total_cents",))
+        assert orders == [{"total_cents": 4028}, {"total_cents": 4028}]
+        assert cursor is not None
+        [select] = statements
+        assert "total_cents" in select and "orders.total," not in select and "user_id," not in select
+
+        [first, _, _] = _get_orders_for_user(db, 1, with_items=True, fields=("id", "items"))[0]
+        assert list(first) == ["id", "items"]
+        assert [line.unit_price_cents for line in first["items"]] == [10, 1999]
+
+
+def test_orders_endpoint_fields():
+    user_id = client.post("/users/", json={"email": f"{uuid.uuid4().hex}@example.com"}).json()["id"]
+    cart_id = client.post(f"/cart/{user_id}").json()["id"]
+    client.post(f"/cart/{cart_id}/items", json={"product_id": 1, "quantity": 2})
+    order = client.post(f"/orders/{user_id}").json()
+
+    assert client.get(f"/orders/user/{user_id}", params={"fields": "id"}).json() == [{"id": order["id"]}]
+    [lines] = client.get(f"/orders/user/{user_id}", params={"fields": "items", "items": "true"}).json()
+    assert list(lines) == ["items"]
+    # lines are only available with items=true
+    assert client.get(f"/orders/user/{user_id}", params={"fields": "items"}).status_code == 400
+    export = client.get(f"/orders/user/{user_id}", params={"fields": "total", "format": "ndjson"})
+    assert export.text == f'{{"total": {order["total"]}}}\n'
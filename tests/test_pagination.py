@@ -0,0 +1,69 @@
+import json
+import uuid
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.pagination import decode_cursor, encode_cursor, parse_fields
+
+client = TestClient(app)
+
+
+def test_cursor_round_trip_and_rejects_garbage():
+    assert decode_cursor(encode_cursor(42)) == 42
+    assert decode_cursor(None) is None
+    with pytest.raises(HTTPException):
+        decode_cursor("not-a-cursor")
+
+    assert client.get("/users/", params={"cursor": "nope"}).status_code == 400
+
+
+def test_users_keyset_pages_match_ndjson_export():
+    for _ in range(5):
+        client.post("/users/", json={"email": f"{uuid.uuid4()}@example.com"})
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/users/", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page) <= 2
+        seen += [u["id"] for u in page]
+        cursor = response.headers.get("x-next-cursor")
+        if cursor is None:
+            break
+        assert 'rel="next"' in response.headers["link"]
+
+    assert seen == sorted(set(seen))
+
+    export = client.get("/users/", params={"format": "ndjson"})
+    assert export.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in export.text.splitlines()]
+    assert [r["id"] for r in rows] == seen
+
+
+def test_parse_fields_and_product_projection():
+    assert parse_fields(None, ("id", "title", "price")) is None
+    assert parse_fields(" price,id,price ", ("id", "title", "price")) == ("id", "price")
+    with pytest.raises(HTTPException):
+        parse_fields("id,secret", ("id", "title"))
+    with pytest.raises(HTTPException):
+        parse_fields(",", ("id", "title"))
+
+    full = client.get("/products/category/electronics").json()
+    grid = client.get("/products/category/electronics", params={"fields": "image,title,price"})
+    assert grid.status_code == 200
+    assert grid.json() == [{k: p[k] for k in ("title", "price", "image")} for p in full]
+    assert grid.headers["etag"] != client.get("/products/category/electronics").headers["etag"]
+
+    cheapest = client.get(
+        "/products/category/electronics", params={"fields": "id", "sort": "price"}
+    ).json()
+    assert cheapest == [{"id": p["id"]} for p in sorted(full, key=lambda p: p["price"])]
+    assert client.get("/products/category/electronics", params={"fields": "secret"}).status_code == 400
+
+    items = client.get("/products/search", params={"q": "jacket", "fields": "title"}).json()["items"]
+    assert items and all(list(item) == ["title"] for item in items)
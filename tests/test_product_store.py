@@ -0,0 +1,65 @@
+import asyncio
+import threading
+
+from app.database import Product
+from app.routers import cart
+from app.services import product_store
+from app.services.catalogue import Catalogue
+from app.services.external_products import PRODUCTS
+
+
+def test_warm_up_upserts_catalogue(scratch_db):
+    scratch_db.seed(Product(id=1, title="stale", price=1.0))
+    with scratch_db.Session() as db:
+        assert product_store.warm_product_table(db) == len(PRODUCTS)
+        assert db.query(Product).count() == len(PRODUCTS)
+        assert db.get(Product, 1).title == PRODUCTS[0]["title"]
+    assert product_store.PRODUCT_CACHE.get(1)["price"] == PRODUCTS[0]["price"]
+
+
+def test_each_catalogue_version_is_written_by_one_process(scratch_db):
+    catalogue = Catalogue(PRODUCTS)
+    written = []
+
+    def worker():
+        with scratch_db.Session() as db:
+            written.append(product_store.warm_product_table(db, catalogue))
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(written) == [0, 0, 0, len(PRODUCTS)]
+
+    # a reload with a changed product is written again, once
+    changed = Catalogue([{**PRODUCTS[0], "price": 1.5}, *PRODUCTS[1:]])
+    with scratch_db.Session() as db:
+        assert product_store.warm_product_table(db, changed) == len(PRODUCTS)
+        assert product_store.warm_product_table(db, changed) == 0
+        assert db.get(Product, 1).price == 1.5
+    assert product_store.PRODUCT_CACHE.get(1)["price"] == 1.5
+
+
+def test_product_cache_holds_a_large_catalogue():
+    ids = range(10**6, 10**6 + 50_000)  # beyond the test catalogue's ids
+    product_store.PRODUCT_CACHE.put_many({"id": i} for i in ids)
+    assert len(product_store.PRODUCT_CACHE.get_many(ids)) == len(ids)
+
+
+def test_ensure_product_never_calls_remote_for_catalogue_items(scratch_db, monkeypatch):
+    async def no_remote(product_id):
+        raise AssertionError("remote fetch for a catalogue product")
+
+    monkeypatch.setattr(cart, "fetch_remote_product", no_remote)
+    product_store.PRODUCT_CACHE.clear()
+    statements = scratch_db.statements
+
+    with scratch_db.Session() as db:
+        asyncio.run(cart._ensure_product_in_db(db, 5))
+        assert db.get(Product, 5).title == PRODUCTS[4]["title"]
+
+        # now served from the in-process cache: no SQL at all
+        statements.clear()
+        asyncio.run(cart._ensure_product_in_db(db, 5))
+        assert statements == []
@@ -39,3 +39,28 @@ def test_get_products_for_electronics():
 
     # every product should be in the "electronics" category
     assert all(item["category"] == "electronics" for item in data)
+
+
+def test_category_products_etag_and_304():
+    response = client.get("/products/category/jewelery")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert "max-age" in response.headers["cache-control"]
+    etag = response.headers["etag"]
+    assert etag.startswith('"')
+
+    cached = client.get(
+        "/products/category/jewelery", headers={"If-None-Match": etag}
+    )
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"] == etag
+
+    other = client.get("/products/category/electronics")
+    assert other.headers["etag"] != etag
+
+
+def test_unknown_category_is_empty():
+    response = client.get("/products/category/books")
+    assert response.status_code == 200
+    assert response.json() == []
@@ -0,0 +1,32 @@
+from app.database import Cart, CartItem, Product, User
+from app.routers.cart import _get_cart
+from app.routers.orders import _create_order
+
+
+def _count(scratch_db, n_items):
+    user_id = cart_id = n_items
+    scratch_db.seed(
+        Cart(id=cart_id, user=User(id=user_id, email=f"{n_items}@example.com")),
+        *(CartItem(cart_id=cart_id, product_id=i, quantity=2) for i in range(1, n_items + 1)),
+    )
+    statements = scratch_db.statements
+
+    counts = {}
+    with scratch_db.Session() as db:
+        statements.clear()
+        result = _get_cart(db, cart_id)
+        counts["get_cart"] = len(statements)
+        assert len(result.items) == n_items
+
+    with scratch_db.Session() as db:
+        statements.clear()
+        order = _create_order(db, user_id)
+        counts["create_order"] = len(statements)
+        assert order.total == n_items * 2 * 1.5
+        assert db.query(CartItem).filter(CartItem.cart_id == cart_id).count() == 0
+    return counts
+
+
+def test_statement_count_independent_of_cart_size(scratch_db):
+    scratch_db.seed(*(Product(id=i, title=f"Product {i}", price=1.5) for i in range(1, 51)))
+    assert _count(scratch_db, 1) == _count(scratch_db, 50)
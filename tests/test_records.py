@@ -0,0 +1,61 @@
+import json
+import pickle
+
+import pytest
+
+from app import serializers
+from app.services.catalogue import Catalogue
+from app.services.records import ColumnStore, ProductRecord, RecordStore
+from app.services.response_cache import render_json
+
+SOURCE = json.dumps([
+    {"id": 3, "title": "Ring", "price": 9.99, "description": "Gold – 18k", "category": "jewelery", "image": "/r.png"},
+    {"id": 1, "title": "Pen", "price": 1.5, "category": "office", "image": None},
+    {"id": 2, "title": "Lamp", "price": 20.0, "description": "", "category": "office", "rating": {"rate": 4.5}},
+])
+
+
+def _products():
+    return json.loads(SOURCE)  # fresh, separately decoded strings each time
+
+
+def test_record_reads_like_the_dict_and_is_immutable():
+    data = _products()[0]
+    record = ProductRecord.from_dict(data)
+
+    assert record["price"] == 9.99 and record.get("image") == "/r.png" and record.get("nope") is None
+    assert dict(record) == {**record} == record.as_dict() == data
+    assert record == data and list(record) == list(data)
+    with pytest.raises(KeyError):
+        record["rating"]
+    with pytest.raises(AttributeError):
+        record.price = 1.0
+    assert not hasattr(record, "__dict__")
+    assert pickle.loads(pickle.dumps(record)) == record
+
+    other = ProductRecord.from_dict(_products()[0])
+    assert other["category"] is record["category"]  # interned
+
+
+@pytest.mark.parametrize("store_class", [RecordStore, ColumnStore])
+def test_stores_keep_the_json_output(store_class):
+    products = _products()
+    store = store_class(products)
+
+    assert len(store) == 3 and store[-1] == products[2] and list(store[0:2]) == products[:2]
+    assert render_json(list(store)) == render_json(products)
+    assert serializers.dumps(list(store)) == serializers.dumps(products)
+    assert store.get(1) == products[1] and store.get(4) is None
+
+
+@pytest.mark.parametrize("storage", ["records", "columns"])
+def test_catalogue_storage(storage):
+    catalogue = Catalogue(_products(), storage=storage)
+
+    assert [p["id"] for p in catalogue.by_category_id("office")] == [1, 2]
+    assert catalogue.product_ids("jewelery") == (3,)
+    assert catalogue.get(2)["rating"] == {"rate": 4.5}
+    assert [p["id"] for p in catalogue.listing(sort="price")] == [1, 3, 2]
+    assert catalogue.search("gold")[1] == [_products()[0]]
+    with pytest.raises(ValueError):
+        Catalogue(_products(), storage="dicts")
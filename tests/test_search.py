@@ -0,0 +1,62 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.search import SearchIndex, tokenize
+
+client = TestClient(app)
+
+PRODUCTS = [
+    {"id": 1, "title": "Rain Jacket", "description": "Light jacket for rain and wind."},
+    {"id": 2, "title": "Cotton T-Shirt", "description": "Wear it under a jacket."},
+    {"id": 3, "title": "Women's Moto Jacket", "description": "Faux leather."},
+    {"id": 4, "title": "Leather Wallet", "description": "Slim fit for any pocket."},
+]
+
+
+def _ids(result):
+    return [p["id"] for p in result[1]]
+
+
+def test_tokenize():
+    assert tokenize("Women's T-Shirt, 2TB USB_3.0") == ["women", "s", "t", "shirt", "2tb", "usb", "3", "0"]
+
+
+def test_ranking_and_all_words_must_match():
+    index = SearchIndex(PRODUCTS)
+
+    # title matches outrank a description-only mention
+    assert _ids(index.search("jacket ")) == [1, 3, 2]
+    assert _ids(index.search("leather jacket")) == [3]
+    assert index.search("jacket bicycle") == (0, [])
+    assert index.search("?!") == (0, [])
+
+
+def test_prefix_autocomplete():
+    index = SearchIndex(PRODUCTS)
+
+    assert _ids(index.search("women jack")) == [3]
+    assert sorted(_ids(index.search("lea"))) == [3, 4]
+    # a trailing space, prefix=False or a one-letter word only match whole terms
+    assert index.search("lea ") == (0, [])
+    assert index.search("lea", prefix=False) == (0, [])
+    assert _ids(index.search("cotton t")) == [2]
+
+
+def test_limit_offset():
+    index = SearchIndex(PRODUCTS)
+    total, ranked = index.search("jacket")
+
+    assert total == 3
+    assert index.search("jacket", limit=1, offset=1) == (3, ranked[1:2])
+    assert index.search("jacket", offset=5) == (3, [])
+
+
+def test_search_endpoint():
+    response = client.get("/products/search", params={"q": "gold pla", "limit": 1})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total"] == 2 and len(body["items"]) == 1
+    assert "Gold Plated" in body["items"][0]["title"]
+    assert client.get("/products/search", params={"q": ""}).status_code == 422
+    assert client.get("/products/search", params={"q": "ring", "limit": 101}).status_code == 422
@@ -0,0 +1,50 @@
+from fastapi import Response
+
+from app import serializers
+from app.database import Cart, CartItem, Order, OrderItem, User
+from app.schemas import Cart as CartSchema
+from app.schemas import OrderWithItems, User as UserSchema
+from app.services.response_cache import render_json
+
+
+def _cart():
+    return Cart(id=3, items=[CartItem(id=i, product_id=i * 10, quantity=i) for i in range(1, 4)])
+
+
+def _order():
+    lines = [OrderItem(product_id=1, title="Pen – blue", quantity=3, unit_price_cents=10)]
+    return Order(id=9, total=40.28, total_cents=4028, items=lines)
+
+
+def test_serializers_match_validated_schemas():
+    user = User(id=1, email="ünïcode@example.com")
+    assert serializers.user(user).dict() == UserSchema.from_orm(user).dict()
+    assert serializers.cart(_cart()).dict() == CartSchema.from_orm(_cart()).dict()
+    assert serializers.order_with_items(_order()).dict() == OrderWithItems.from_orm(_order()).dict()
+
+    cached = CartSchema.from_orm(_cart()).dict()
+    assert serializers.cart_from_dict(cached).dict() == cached
+
+
+def test_dumps_matches_stdlib_json(monkeypatch):
+    models = [serializers.order_with_items(_order()), serializers.cart(_cart())]
+    expected = render_json([m.dict() for m in models])
+    assert serializers.dumps(models) == expected
+
+    monkeypatch.setattr(serializers, "orjson", None)
+    assert serializers.dumps(models) == expected
+
+
+def test_fast_json_switch_per_router(monkeypatch):
+    monkeypatch.setattr(serializers, "FAST_JSON_ROUTERS", {"cart"})
+    fast, default = serializers.FastJSON("cart"), serializers.FastJSON("users")
+
+    sub_response = Response()
+    sub_response.headers["X-Next-Cursor"] = "abc"
+    response = fast.respond([serializers.cart(_cart())], sub_response)
+    assert isinstance(response, serializers.FastJSONResponse)
+    assert response.headers["x-next-cursor"] == "abc"
+    assert response.body.startswith(b'[{"id":3,"items":[{"product_id":10')
+
+    content = [serializers.cart(_cart())]
+    assert default.respond(content) is content
@@ -0,0 +1,58 @@
+import uuid
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.main import app
+from app.middleware import RequestIdMiddleware
+from app.telemetry import METRICS, InMemoryExporter, MetricsRegistry, configure_telemetry
+
+client = TestClient(app)
+
+
+def _series(registry_snapshot, name, route):
+    return [s for s in registry_snapshot[name] if s["labels"].get("route") == route]
+
+
+def test_requests_are_recorded_per_route_template_with_db_time():
+    user = client.post("/users/", json={"email": f"{uuid.uuid4()}@example.com"}).json()
+    cart_id = client.post(f"/cart/{user['id']}").json()["id"]
+
+    response = client.get(f"/cart/{cart_id}")
+    assert response.headers["server-timing"].startswith("db;dur=")
+
+    snapshot = METRICS.snapshot()
+    (duration,) = [
+        s for s in _series(snapshot, "http.server.duration", "/cart/{cart_id}")
+        if s["labels"]["status"] == "200"
+    ]
+    assert duration["count"] >= 1
+    (queries,) = _series(snapshot, "http.server.db.queries", "/cart/{cart_id}")
+    assert queries["sum"] >= 1
+
+
+def test_exporter_gets_one_record_per_request():
+    engine = create_engine("sqlite://")
+    small = FastAPI()
+
+    @small.get("/items/{item_id}")
+    def read_item(item_id: int):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+        return {"id": item_id}
+
+    exporter = InMemoryExporter()
+    configure_telemetry(small, engines=[engine], exporter=exporter, registry=MetricsRegistry())
+    small.add_middleware(RequestIdMiddleware)
+
+    with TestClient(small) as local:
+        local.get("/items/7", headers={"X-Request-ID": "tel-1"})
+        local.get("/nope")
+
+    first, second = exporter.records
+    assert first["route"] == "/items/{item_id}"
+    assert first["request_id"] == "tel-1"
+    assert first["db_queries"] == 2
+    assert second["route"] == "<unmatched>" and second["status"] == 404